@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from src.chance_constraint import fatigue_thresholds
+from src.matrix_builder import EARTH_RADIUS_KM, build_matrices
+
+# Same physical parameters and penalty weights as main.py
+PARAMETERS = {
+    'g': 9.81,       # Gravitational acceleration (m/s^2)
+    'rho': 1.204,    # Air density (kg/m^3)
+    'C_DA': 0.648,   # Drag area (m^2)
+    'v': 5.6,        # Velocity (m/s)
+    'B_0': 0.091,    # Bearing coefficient (N)
+    'B_1': 0.0087,   # Bearing coefficient (Ns/m)
+    'C_RR': 0.006,   # Rolling resistance coefficient
+    'METS': 4.9      # Metabolic equivalents (kcal/kg/hour)
+}
+
+WEIGHTS = {
+    'wG': 10,   # Penalty weight for battery constraint violations
+    'wF': 5,    # Penalty weight for fatigue constraint violations
+    'wQ': 3,    # Penalty weight for capacity constraint violations
+    'wT': 2     # Penalty weight for time window constraint violations
+}
+
+DEPOT = (41.8827, -87.6233)  # Latitude and longitude of the depot
+
+def generate_instance(n_customers, seed=0, n_shifts=3, n_vehicles=None, radius_km=8.0, speed_kmh=15.0,
+                      day_start=8.0, day_end=20.0, p=0.95, chunk_size=1024):
+    """
+    Generate a seeded synthetic CC-HMVRP instance.
+    Args:
+        n_customers: Number of customers (the depot is added as id 0).
+        seed: Random seed; the same seed always yields the same instance.
+        n_shifts: Number of equal-length shifts between day_start and day_end.
+        n_vehicles: Fleet size (default: enough capacity for the demand over all shifts, plus slack).
+        radius_km: Customers are scattered uniformly within this radius of the depot.
+        speed_kmh: Riding speed used to turn distances into travel times (hours).
+        day_start: Start of the first shift (hours).
+        day_end: End of the last shift (hours).
+        p: Probability level of the rider fatigue chance constraint.
+        chunk_size: Matrix rows computed per NumPy pass.
+    Returns:
+        Dict with customers, vehicles, shifts, travel_time_matrix, grade_matrix,
+        parameters and weights, in the shapes main.py uses.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_customers + 1
+
+    # Customer locations in a disc around the depot; elevations from a smooth random surface
+    r = radius_km * np.sqrt(rng.uniform(0, 1, n))
+    angle = rng.uniform(0, 2 * np.pi, n)
+    r[0] = 0.0
+    latitude = DEPOT[0] + np.degrees(r * np.sin(angle) / EARTH_RADIUS_KM)
+    longitude = DEPOT[1] + np.degrees(r * np.cos(angle) / (EARTH_RADIUS_KM * np.cos(np.radians(DEPOT[0]))))
+    k1, k2 = rng.uniform(0.5, 2.0, 2)
+    elevation = 180 + 15 * np.sin(k1 * r * np.cos(angle)) + 10 * np.cos(k2 * r * np.sin(angle))
+
+    # Time windows within the working day
+    a_i = rng.uniform(day_start, day_end - 1.0, n)
+    b_i = np.minimum(a_i + rng.uniform(1.0, 4.0, n), day_end)
+    demand = rng.integers(2, 20, n).astype(float)
+    a_i[0], b_i[0], demand[0] = day_start, day_end, 0.0
+
+    travel_time_matrix, grade_matrix = build_matrices(latitude, longitude, elevation, speed_kmh=speed_kmh,
+                                                      chunk_size=chunk_size, dtype=np.float64)
+
+    customers = pd.DataFrame({
+        'id': np.arange(n),
+        'a_i': a_i,
+        'b_i': b_i,
+        'longitude': longitude,
+        'latitude': latitude,
+        'demand': demand,
+    })
+
+    # Heterogeneous fleet: bike class sets mass and capacity, riders differ in mass and fatigue
+    capacity_classes = np.array([50.0, 80.0, 120.0])
+    mass_classes = np.array([40.0, 50.0, 60.0])
+    if n_vehicles is None:
+        n_vehicles = max(2, int(np.ceil(1.2 * demand.sum() / (capacity_classes.mean() * n_shifts))))
+    bike_class = rng.integers(0, len(capacity_classes), n_vehicles)
+    alpha = rng.uniform(6.0, 10.0, n_vehicles)
+    beta = rng.uniform(0.4, 0.6, n_vehicles)
+    vehicles = pd.DataFrame({
+        'id': np.arange(1, n_vehicles + 1),
+        'mass': mass_classes[bike_class],
+        'rider_mass': rng.uniform(55.0, 95.0, n_vehicles).round(1),
+        'capacity': capacity_classes[bike_class],
+        'alpha': alpha,
+        'beta': beta,
+        'fatigue_threshold': fatigue_thresholds(alpha, beta, p),
+        'battery_range': rng.uniform(8.0, 12.0, n_vehicles).round(1),
+    })
+
+    bounds = np.linspace(day_start, day_end, n_shifts + 1)
+    shifts = pd.DataFrame({'E_t': bounds[:-1], 'L_t': bounds[1:]})
+
+    return {
+        'customers': customers,
+        'vehicles': vehicles,
+        'shifts': shifts,
+        'travel_time_matrix': travel_time_matrix,
+        'grade_matrix': grade_matrix,
+        'parameters': dict(PARAMETERS),
+        'weights': dict(WEIGHTS),
+    }
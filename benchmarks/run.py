@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generator import generate_instance
+from src.alns import alns
+from src.cost_function import solution_cost
+from src.instance import compile_instance
+from src.local_search import local_search
+from src.route_cache import RouteCache
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Direction of each metric: +1 if higher is better, -1 if lower is better
+METRICS = {
+    'compile_time': -1,
+    'cost_evaluations_per_sec': +1,
+    'alns_iterations_per_sec': +1,
+    'local_search_pass_time': -1,
+    'peak_memory_mb': -1,
+    'final_cost': -1,
+}
+
+# Metrics that depend on the machine and interpreter running the benchmark
+MACHINE_DEPENDENT = {'compile_time', 'cost_evaluations_per_sec', 'alns_iterations_per_sec', 'local_search_pass_time',
+                     'peak_memory_mb'}
+
+# Report fields identifying the machine and interpreter
+FINGERPRINT = ('python', 'machine', 'cpu')
+
+# Smallest absolute change of a metric that can count as a regression
+ABSOLUTE_FLOORS = {
+    'compile_time': 0.005,           # seconds
+    'local_search_pass_time': 0.05,  # seconds
+    'peak_memory_mb': 1.0,
+    'final_cost': 1e-6,
+}
+
+def round_robin_solution(customers, vehicles):
+    """Deal customers, ordered by time-window opening, to the vehicles in turn."""
+    order = customers.loc[customers['id'] != 0].sort_values('a_i')['id'].tolist()
+    vehicle_ids = vehicles['id'].tolist()
+    solution = {vehicle_id: [] for vehicle_id in vehicle_ids}
+    for position, customer_id in enumerate(order):
+        solution[vehicle_ids[position % len(vehicle_ids)]].append(customer_id)
+    return solution
+
+def cpu_model():
+    """Model name of the CPU (from /proc/cpuinfo where available), or platform.processor()."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+def _rate(function, min_time=0.5, min_calls=3):
+    """Calls per second of function(), measured over at least min_time seconds."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and calls >= min_calls:
+            return calls / elapsed
+
+def _best_time(function, repeats):
+    """Shortest wall time of repeats calls to function(), and the last call's result."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def benchmark_size(n_customers, seed=0, iterations=20, granularity=20, repeats=3):
+    """
+    Benchmark one generated instance size.
+
+    The timed sections run without tracemalloc, whose tracing slows Python
+    code several times over; every timing is the best of repeats runs (ALNS
+    starts from a fresh cache each time). Peak memory comes from a separate, untimed pass over
+    the same compile, local search and ALNS run.
+    Args:
+        n_customers: Number of customers.
+        seed: Instance and ALNS seed.
+        iterations: ALNS iterations to time.
+        granularity: Candidate neighbours per customer in local search (None for the full neighbourhoods).
+        repeats: Runs of each timed section.
+    Returns:
+        Dict of metrics for this size.
+    """
+    data = generate_instance(n_customers, seed=seed)
+    customers, vehicles = data['customers'], data['vehicles']
+    parameters, weights = data['parameters'], data['weights']
+
+    def compile_():
+        return compile_instance(customers, vehicles, parameters, data['travel_time_matrix'], data['grade_matrix'],
+                                data['shifts'])
+
+    compile_time, instance = _best_time(compile_, repeats)
+    solution = round_robin_solution(customers, vehicles)
+    evaluations_per_sec = max(_rate(lambda: solution_cost(instance, solution, weights)) for _ in range(repeats))
+    local_search_time, _ = _best_time(
+        lambda: local_search(solution, customers, vehicles, parameters, weights, instance=instance,
+                             granularity=granularity), repeats)
+
+    def run_alns():
+        cache = RouteCache(instance)
+        return cache, alns(solution, customers, vehicles, parameters, weights, max_iter=iterations, cache=cache,
+                           seed=seed, granularity=granularity)
+
+    alns_time, (cache, best_solution) = _best_time(run_alns, repeats)
+
+    # Untimed memory pass
+    tracemalloc.start()
+    memory_instance = compile_()
+    local_search(solution, customers, vehicles, parameters, weights, instance=memory_instance,
+                 granularity=granularity)
+    alns(solution, customers, vehicles, parameters, weights, max_iter=iterations, cache=RouteCache(memory_instance),
+         seed=seed, granularity=granularity)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'n_customers': n_customers,
+        'n_vehicles': len(vehicles),
+        'compile_time': compile_time,
+        'cost_evaluations_per_sec': evaluations_per_sec,
+        'alns_iterations_per_sec': iterations / alns_time,
+        'local_search_pass_time': local_search_time,
+        'peak_memory_mb': peak / 2**20,
+        'final_cost': cache.solution_cost(best_solution, weights),
+        'cache_hit_rate': cache.stats()['hit_rate'],
+    }
+
+def fingerprint_mismatch(results, baseline):
+    """Message naming the FINGERPRINT fields two reports differ in, or None if they match."""
+    fields = [f"{field} {baseline.get(field)!r} -> {results.get(field)!r}" for field in FINGERPRINT
+              if results.get(field) != baseline.get(field)]
+    return f"baseline fingerprint differs ({', '.join(fields)})" if fields else None
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Compare benchmark results against a baseline.
+
+    A metric regresses only if it moves the wrong way by more than
+    tolerance relative to the baseline and by more than its entry in
+    ABSOLUTE_FLOORS, so jitter on millisecond-scale timings is not flagged.
+    Timings and memory are only comparable on the same machine and
+    interpreter: against a baseline with another fingerprint (see
+    fingerprint_mismatch) the MACHINE_DEPENDENT metrics are skipped and
+    only the final cost is compared.
+    Args:
+        results: Report produced by run_benchmarks.
+        baseline: Earlier report to compare against.
+        tolerance: Relative change allowed before a metric counts as a regression.
+    Returns:
+        List of human-readable regression messages (empty if none).
+    """
+    same_machine = fingerprint_mismatch(results, baseline) is None
+    regressions = []
+    for size, metrics in results['results'].items():
+        reference = baseline.get('results', {}).get(size)
+        if reference is None:
+            continue
+        for metric, direction in METRICS.items():
+            if metric not in metrics or metric not in reference or reference[metric] == 0:
+                continue
+            if metric in MACHINE_DEPENDENT and not same_machine:
+                continue
+            difference = metrics[metric] - reference[metric]
+            change = difference / abs(reference[metric])
+            if direction * change < -tolerance and abs(difference) > ABSOLUTE_FLOORS.get(metric, 0.0):
+                regressions.append(f"n={size} {metric}: {reference[metric]:.4g} -> {metrics[metric]:.4g} "
+                                   f"({change:+.1%})")
+    return regressions
+
+def run_benchmarks(sizes, seed=0, iterations=20, granularity=20, repeats=3):
+    """Benchmark every size and collect the report."""
+    report = {
+        'seed': seed,
+        'iterations': iterations,
+        'granularity': granularity,
+        'repeats': repeats,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu': cpu_model(),
+        'results': {},
+    }
+    for n_customers in sizes:
+        report['results'][str(n_customers)] = benchmark_size(n_customers, seed, iterations, granularity, repeats)
+        print(json.dumps(report['results'][str(n_customers)]), file=sys.stderr)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CC-HMVRP heuristics on synthetic instances.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--granularity', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=3, help="Runs of each timed section (minimum kept)")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--update-baseline', action='store_true', help="Store this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.seed, args.iterations, args.granularity, args.repeats)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(text + '\n')
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatch = fingerprint_mismatch(report, baseline)
+        if mismatch:
+            print(f"WARNING {mismatch}: only the final cost is compared", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,11 @@
 import pandas as pd
-import numpy as np
 from src.initial_solution import generate_initial_solution
 from src.alns import alns
-from src.cost_function import augmented_cost_function
+from src.chance_constraint import fatigue_thresholds
+from src.cost_function import solution_cost
+from src.instance import compile_instance
+from src.matrix_builder import matrices_from_customers
+from src.route_cache import RouteCache
 from src.visualize_routes import visualize_routes
 
 def main():
@@ -26,36 +29,26 @@ def main():
         'wT': 2     # Penalty weight for time window constraint violations
     }
 
-    # Customers and Depot Data (0 is the depot)
+    # Customers and Depot Data (0 is the depot); elevations in metres
     customers = pd.DataFrame([
-        {'id': 0, 'a_i': 0, 'b_i': 24, 'longitude': 41.8827, 'latitude':  -87.6233,'demand': 0},  # Depot
-        {'id': 1, 'a_i': 8, 'b_i': 12, 'longitude': 41.8917, 'latitude': -87.6055,'demand': 10},
-        {'id': 2, 'a_i': 9, 'b_i': 11, 'longitude': 41.8789, 'latitude': -87.6359,'demand': 15},
-        {'id': 3, 'a_i': 10, 'b_i': 14, 'longitude': 41.9211, 'latitude': -87.6338,'demand': 8}
+        {'id': 0, 'a_i': 0, 'b_i': 24, 'latitude': 41.8827, 'longitude': -87.6233, 'elevation': 181, 'demand': 0},  # Depot
+        {'id': 1, 'a_i': 8, 'b_i': 12, 'latitude': 41.8917, 'longitude': -87.6055, 'elevation': 177, 'demand': 10},
+        {'id': 2, 'a_i': 9, 'b_i': 11, 'latitude': 41.8789, 'longitude': -87.6359, 'elevation': 183, 'demand': 15},
+        {'id': 3, 'a_i': 10, 'b_i': 14, 'latitude': 41.9211, 'longitude': -87.6338, 'elevation': 179, 'demand': 8}
     ])
 
-    # Full Travel Time Matrix (hours)
-    travel_time_matrix = np.array([
-        [0.0, 1.0, 1.5, 2.0],  # From Depot
-        [1.0, 0.0, 1.2, 1.8],  # From Customer 1
-        [1.5, 1.2, 0.0, 1.0],  # From Customer 2
-        [2.0, 1.8, 1.0, 0.0]   # From Customer 3
-    ])
-
-    # Grade Matrix (slopes between points)
-    grade_matrix = np.array([
-        [0.0, 0.01, 0.02, 0.03],  # From Depot
-        [0.01, 0.0, 0.015, 0.025],  # From Customer 1
-        [0.02, 0.015, 0.0, 0.01],  # From Customer 2
-        [0.03, 0.025, 0.01, 0.0]   # From Customer 3
-    ])
+    # Travel Time Matrix (hours, at the riding speed) and Grade Matrix (slopes between points),
+    # from the coordinates and elevations
+    travel_time_matrix, grade_matrix = matrices_from_customers(customers, speed_kmh=3.6 * parameters['v'])
 
     # Vehicles Data
-    # The fatigue threshold is calculated for each rider based on p=0.95 and aplha_k and beta_k described in the paper
+    # Each rider's fatigue tolerance (hours) is Gamma(alpha_k, scale=beta_k) as described in the paper;
+    # the fatigue threshold is its p=0.95 quantile
     vehicles = pd.DataFrame([
-        {'id': 1, 'mass': 40, 'rider_mass': 70, 'capacity': 50, 'fatigue_threshold': 4, 'battery_range': 10},
-        {'id': 2, 'mass': 42, 'rider_mass': 65, 'capacity': 45, 'fatigue_threshold': 3.5, 'battery_range': 9}
+        {'id': 1, 'mass': 40, 'rider_mass': 70, 'capacity': 50, 'alpha': 8.0, 'beta': 0.3, 'battery_range': 10},
+        {'id': 2, 'mass': 42, 'rider_mass': 65, 'capacity': 45, 'alpha': 8.0, 'beta': 0.265, 'battery_range': 9}
     ])
+    vehicles['fatigue_threshold'] = fatigue_thresholds(vehicles['alpha'], vehicles['beta'], p=0.95)
 
     # Shifts Data
     shifts = pd.DataFrame([
@@ -65,17 +58,19 @@ def main():
 
     # Generate the initial solution
     print("\n--- Generating Initial Solution ---")
-    initial_solution, multi_shift_customers = generate_initial_solution(customers, vehicles, shifts)
+    initial_solution, multi_shift_customers = generate_initial_solution(customers, vehicles, shifts,
+                                                                             travel_time_matrix, parameters)
     print("Initial Solution:", initial_solution)
     print("Multi-Shift Customers:", multi_shift_customers)
 
-    # Integrate travel time and grade matrix into customer DataFrame
-    customers['travel_time_matrix'] = [travel_time_matrix] * len(customers)
-    customers['grade_matrix'] = [grade_matrix] * len(customers)
+    # Compile the instance once; the matrices are referenced, not copied per customer.
+    # Large matrices can be loaded with src.matrix_store.load_matrix instead.
+    instance = compile_instance(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    cache = RouteCache(instance)
 
     # Run the ALNS algorithm
     print("\n--- Running ALNS Algorithm ---")
-    best_solution = alns(initial_solution, customers, vehicles, parameters, weights, max_iter=100)
+    best_solution = alns(initial_solution, customers, vehicles, parameters, weights, max_iter=100, cache=cache)
 
     print("\n--- Best Solution Found ---")
     for vehicle, assigned_customers in best_solution.items():
@@ -83,14 +78,15 @@ def main():
 
     # Calculate the final cost of the best solution
     print("\n--- Final Cost ---")
-    final_cost = augmented_cost_function(customers, vehicles, best_solution, parameters, weights)
+    final_cost = solution_cost(instance, best_solution, weights)
     print(f"Total Cost: {final_cost:.2f}")
 
 
     # Visualize routes
     print("\n--- Route Visualization ---")
     
-    visualize_routes(customers.iloc[1:, :].reset_index(drop = True), customers.iloc[:1, :], best_solution)
+    visualize_routes(customers.iloc[1:, :].reset_index(drop = True), customers.iloc[:1, :], best_solution,
+                     shifts=shifts)
 
 
 if __name__ == "__main__":
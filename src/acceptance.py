@@ -0,0 +1,99 @@
+import math
+from collections import deque
+
+# Acceptance criteria for ALNS.
+#
+# alns asks the criterion whether a repaired candidate replaces the current
+# solution, passing the candidate, current and best costs it already holds,
+# so no solution is re-evaluated. Every criterion advances its own schedule
+# (temperature, threshold or history) once per call.
+
+class AcceptAll:
+    """Always move to the candidate (the original ALNS behaviour)."""
+
+    def __call__(self, candidate_cost, current_cost, best_cost, rng):
+        return True
+
+class HillClimbing:
+    """Accept only candidates that are no worse than the current solution."""
+
+    def __call__(self, candidate_cost, current_cost, best_cost, rng):
+        return candidate_cost <= current_cost
+
+class SimulatedAnnealing:
+    """
+    Accept a worse candidate with probability exp(-(candidate - current) / T).
+
+    The temperature starts at start_temperature and is multiplied by step
+    (exponential cooling) or reduced by step (linear cooling) after every
+    decision, never going below end_temperature.
+    """
+
+    def __init__(self, start_temperature, end_temperature=1e-3, step=0.99, method='exponential'):
+        if method not in ('exponential', 'linear'):
+            raise ValueError(f"Unknown cooling method: {method!r}")
+        self.temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.step = step
+        self.method = method
+
+    def __call__(self, candidate_cost, current_cost, best_cost, rng):
+        delta = candidate_cost - current_cost
+        accepted = delta <= 0 or rng.random() < math.exp(-delta / self.temperature)
+        if self.method == 'exponential':
+            self.temperature = max(self.end_temperature, self.temperature * self.step)
+        else:
+            self.temperature = max(self.end_temperature, self.temperature - self.step)
+        return accepted
+
+class _Threshold:
+    """Shared linearly or exponentially decaying threshold schedule."""
+
+    def __init__(self, start_threshold, end_threshold=0.0, step=0.99, method='exponential'):
+        if method not in ('exponential', 'linear'):
+            raise ValueError(f"Unknown threshold method: {method!r}")
+        self.threshold = start_threshold
+        self.end_threshold = end_threshold
+        self.step = step
+        self.method = method
+
+    def _advance(self):
+        if self.method == 'exponential':
+            self.threshold = max(self.end_threshold, self.threshold * self.step)
+        else:
+            self.threshold = max(self.end_threshold, self.threshold - self.step)
+
+class RecordToRecordTravel(_Threshold):
+    """Accept candidates within the current threshold of the best (record) cost."""
+
+    def __call__(self, candidate_cost, current_cost, best_cost, rng):
+        accepted = candidate_cost - best_cost <= self.threshold
+        self._advance()
+        return accepted
+
+class ThresholdAccepting(_Threshold):
+    """Accept candidates within the current threshold of the current cost."""
+
+    def __call__(self, candidate_cost, current_cost, best_cost, rng):
+        accepted = candidate_cost - current_cost <= self.threshold
+        self._advance()
+        return accepted
+
+class LateAcceptance:
+    """
+    Late acceptance hill climbing: accept a candidate that is no worse than
+    the current solution or than the current cost history_length decisions ago.
+    """
+
+    def __init__(self, history_length=50):
+        self.history_length = history_length
+        self.history = deque(maxlen=history_length)
+
+    def __call__(self, candidate_cost, current_cost, best_cost, rng):
+        if len(self.history) < self.history_length:
+            late_cost = current_cost
+        else:
+            late_cost = self.history[0]
+        accepted = candidate_cost <= current_cost or candidate_cost <= late_cost
+        self.history.append(candidate_cost if accepted else current_cost)
+        return accepted
@@ -1,12 +1,23 @@
+import itertools
+import os
 import numpy as np
+from functools import partial
 from src.operators import random_removal, worst_removal, overlap_removal, worst_route_removal, greedy_insertion, regret_insertion
-from src.cost_function import augmented_cost_function
+from src.acceptance import AcceptAll
+from src.candidates import candidate_lists
+from src.checkpoint import save_checkpoint, load_checkpoint
+from src.local_search import local_search
+from src.instance import compile_instance
+from src.instrumentation import operator_name
+from src.route_cache import RouteCache
+from src.solution import Solution
 import random
+import time
 
-def roulette_wheel_selection(operators, weights):
+def roulette_wheel_selection(operators, weights, rng=random):
     """Select an operator based on a roulette wheel mechanism."""
     cumulative_weights = np.cumsum(weights)
-    r = random.uniform(0, cumulative_weights[-1])
+    r = rng.uniform(0, cumulative_weights[-1])
     for i, cw in enumerate(cumulative_weights):
         if r <= cw:
             return operators[i]
@@ -19,62 +30,307 @@ def update_weights(weights, scores, smoothing_factor):
     total_weight = sum(weights)
     return [w / total_weight for w in weights]
 
-def alns(initial_solution, customers, vehicles, parameters, weights, max_iter=100, smoothing_factor=0.7):
-    # Define destroy and repair operators
-    destroy_operators = [random_removal, worst_removal, overlap_removal, worst_route_removal]
-    repair_operators = [greedy_insertion, regret_insertion]
+def segment_weights(weights, scores, uses, smoothing_factor):
+    """
+    Segment-end weight update: operators used in the segment move towards
+    their average score per use, unused operators keep their weight.
+    """
+    weights = [smoothing_factor * w + (1 - smoothing_factor) * score / n if n else w
+               for w, score, n in zip(weights, scores, uses)]
+    total_weight = sum(weights)
+    return [w / total_weight for w in weights]
+
+def blend_weights(weights, peer_weights):
+    """Average operator weights with a peer's, keeping ours if the operator sets differ."""
+    if len(peer_weights) != len(weights):
+        return weights
+    return [(w + p) / 2 for w, p in zip(weights, peer_weights)]
+
+def alns(initial_solution, customers, vehicles, parameters, weights, max_iter=100, smoothing_factor=0.7,
+         cache=None, seed=None, overlap_costs=None, migration=None, granularity=None, recorder=None,
+         time_limit=None, stagnation_limit=None, local_search_interval=None, checkpoint_path=None,
+         checkpoint_interval=10, resume=None, should_stop=None, acceptance=None, segment_length=None,
+         travel_time_matrix=None, grade_matrix=None, shifts=None, return_stats=False):
+    """
+    Adaptive Large Neighborhood Search.
+
+    The run stops after max_iter iterations, once time_limit seconds have
+    passed, after stagnation_limit iterations without a new best
+    solution, or when should_stop() returns True, whichever comes first.
+    A running local search is cut short at the deadline too, so the best
+    solution is returned on time.
+
+    With checkpoint_path set, the search state (iteration, current and best
+    solutions, operator weights and scores, RNG state) is written every
+    checkpoint_interval iterations and when the run stops. Passing the file
+    (or a loaded state) as resume continues from there; with the same seed,
+    operators and budget the resumed run makes the same choices as an
+    uninterrupted one. time_limit applies to the resumed call on its own.
+
+    The current solution is an array-backed Solution (see src.solution)
+    that the destroy and repair operators change in place; a rejected
+    candidate is rolled back through its undo log, so iterations copy no
+    solution and only re-cost the routes they touched. Each repaired
+    candidate becomes the current solution if it is a new best or the
+    acceptance criterion (see src.acceptance) accepts it; the costs of the
+    current and best solutions are tracked, never recomputed.
+    Operators are rewarded for new best, improving, and accepted
+    candidates. Without segment_length the weights are smoothed towards the
+    cumulative scores every iteration; with it they are updated once per
+    segment from the average score per use, and the scores are reset.
+    Args:
+        initial_solution: Starting solution dict (ignored when resuming).
+        customers: DataFrame with customer data.
+        vehicles: DataFrame with vehicle details.
+        parameters: Problem parameters.
+        weights: Penalty weights for constraints.
+        max_iter: Total iteration count, or None for no iteration limit.
+        smoothing_factor: Weight of the old operator weight in each update.
+        cache: Optional RouteCache holding the compiled instance; without one the
+            instance is compiled from the frames, the matrices and the shifts.
+        seed: Seed of the run's random generator.
+        overlap_costs: Per-customer overlap costs enabling overlap removal.
+        migration: Optional island Migration channel (see src.islands).
+        granularity: Candidate neighbours per customer in local search.
+        recorder: Optional TraceCollector (see src.instrumentation).
+        time_limit: Wall-clock budget in seconds.
+        stagnation_limit: Iterations without a new best solution before stopping.
+        local_search_interval: Iterations between local searches (default a quarter of
+            max_iter, or 25 without an iteration limit).
+        checkpoint_path: File the search state is checkpointed to.
+        checkpoint_interval: Iterations between checkpoints.
+        resume: Checkpoint file or state dict to continue from.
+        should_stop: Optional callable polled before every iteration, e.g. for cancellation.
+        acceptance: Acceptance criterion called as acceptance(candidate_cost, current_cost,
+            best_cost, rng) (default AcceptAll).
+        segment_length: Iterations per weight-update segment.
+        travel_time_matrix, grade_matrix: Node-by-node matrices, used only without a cache
+            (see compile_instance).
+        shifts: Shifts DataFrame, used only without a cache; needed for (vehicle_id, shift) route keys.
+        return_stats: Also return the run statistics.
+    Returns:
+        Best solution found, or with return_stats a tuple (best_solution, stats)
+        where stats holds the iterations run by this call and the best cost.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    # Every random decision draws from one generator so a seed reproduces the run
+    rng = random.Random(seed)
+    if acceptance is None:
+        acceptance = AcceptAll()
+
+    # Compile the instance once so every evaluation uses array gathers, and share
+    # one route cache between ALNS, local search and the destroy operators
+    if cache is None:
+        cache = RouteCache(compile_instance(customers, vehicles, parameters, travel_time_matrix, grade_matrix,
+                                            shifts))
+    instance = cache.instance
+
+    # Candidate lists for granular local search, computed once per run
+    neighbors = candidate_lists(instance, granularity) if granularity is not None else None
+
+    def route_cost(vehicle_id, route):
+        return cache.route_cost(vehicle_id, route, weights)
+
+    # Define destroy and repair operators; overlap removal needs per-customer overlap costs
+    destroy_operators = [partial(random_removal, rng=rng),
+                         partial(worst_removal, instance=instance, weights=weights, rng=rng),
+                         partial(worst_route_removal, cost_function=route_cost)]
+    if overlap_costs is not None:
+        destroy_operators.insert(2, partial(overlap_removal, customers=customers, overlap_costs=overlap_costs))
+    repair_operators = [partial(greedy_insertion, instance=instance, weights=weights),
+                        partial(regret_insertion, instance=instance, weights=weights)]
     
     # Initialize weights and scores for destroy and repair operators
     destroy_weights = [1.0 / len(destroy_operators)] * len(destroy_operators)
     repair_weights = [1.0 / len(repair_operators)] * len(repair_operators)
     destroy_scores = [0] * len(destroy_operators)
     repair_scores = [0] * len(repair_operators)
+    destroy_uses = [0] * len(destroy_operators)
+    repair_uses = [0] * len(repair_operators)
     
     # Reward parameters
     reward_best = 10  # Reward for finding a new best solution
     reward_improve = 5  # Reward for improving the current solution
     reward_accept = 2  # Reward for accepting a worse solution
+    rewards = {'best': reward_best, 'improve': reward_improve, 'accept': reward_accept, 'reject': 0}
+
+    # The best solution is kept as a dict snapshot, taken only when it improves
+    best_solution = {key: list(route) for key, route in initial_solution.items()}
+    current_solution = initial_solution
+    best_cost = current_cost = cache.solution_cost(initial_solution, weights)
+    start_iter = last_improvement = 0
+
+    if resume is not None:
+        state = load_checkpoint(resume) if isinstance(resume, (str, bytes, os.PathLike)) else resume
+        if len(state['destroy_weights']) != len(destroy_operators) or len(state['repair_weights']) != len(repair_operators):
+            raise ValueError("Checkpoint was written with a different set of operators")
+        start_iter, last_improvement = state['iteration'], state['last_improvement']
+        current_solution, current_cost = state['current_solution'], state['current_cost']
+        best_solution, best_cost = state['best_solution'], state['best_cost']
+        destroy_weights, repair_weights = state['destroy_weights'], state['repair_weights']
+        destroy_scores, repair_scores = state['destroy_scores'], state['repair_scores']
+        destroy_uses, repair_uses = state['destroy_uses'], state['repair_uses']
+        acceptance = state['acceptance']
+        rng.setstate(state['rng_state'])
+
+    # Operators work in place on the current Solution; route_costs[r] is the cost of its route r
+    current = Solution.from_dict(instance, current_solution)
+    route_costs = [cache.route_cost(key, current.route(r), weights) for r, key in enumerate(current.keys)]
+
+    def adopt(solution):
+        nonlocal current, route_costs
+        current = Solution.from_dict(instance, solution)
+        route_costs = [cache.route_cost(key, current.route(r), weights) for r, key in enumerate(current.keys)]
+
+    def checkpoint(next_iter):
+        save_checkpoint(checkpoint_path, {
+            'iteration': next_iter,
+            'last_improvement': last_improvement,
+            'current_solution': current.to_dict(),
+            'current_cost': current_cost,
+            'best_solution': best_solution,
+            'best_cost': best_cost,
+            'destroy_weights': destroy_weights,
+            'repair_weights': repair_weights,
+            'destroy_scores': destroy_scores,
+            'repair_scores': repair_scores,
+            'destroy_uses': destroy_uses,
+            'repair_uses': repair_uses,
+            'acceptance': acceptance,
+            'rng_state': rng.getstate(),
+        })
+
+    if local_search_interval is None:
+        local_search_interval = max(1, int(max_iter * 0.25)) if max_iter is not None else 25
+
+    next_iter = start_iter
+    iterations = range(start_iter, max_iter) if max_iter is not None else itertools.count(start_iter)
+    for it in iterations:
+        # === Stopping criteria ===
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        if stagnation_limit is not None and it - last_improvement >= stagnation_limit:
+            break
+        if should_stop is not None and should_stop():
+            break
 
-    best_solution = initial_solution.copy()
-    current_solution = initial_solution.copy()
-    best_cost = augmented_cost_function(customers, vehicles, initial_solution, parameters, weights)
-    
-    for _ in range(max_iter):
         # Select destroy and repair operators using roulette wheel mechanism
-        destroy_op = roulette_wheel_selection(destroy_operators, destroy_weights)
-        repair_op = roulette_wheel_selection(repair_operators, repair_weights)
-        
-        # Apply destroy and repair operators
-        destroyed_solution, removed_customers = destroy_op(current_solution, n_remove=3)
-        repaired_solution = repair_op(destroyed_solution, removed_customers, customers, vehicles)
-        current_cost = augmented_cost_function(customers, vehicles, repaired_solution, parameters, weights)
+        destroy_op = roulette_wheel_selection(destroy_operators, destroy_weights, rng)
+        repair_op = roulette_wheel_selection(repair_operators, repair_weights, rng)
         
-        # Update scores based on solution quality
-        if current_cost < best_cost:
-            best_solution = repaired_solution
-            best_cost = current_cost
-            destroy_scores[destroy_operators.index(destroy_op)] += reward_best
-            repair_scores[repair_operators.index(repair_op)] += reward_best
-        elif current_cost < augmented_cost_function(customers, vehicles, current_solution, parameters, weights):
-            destroy_scores[destroy_operators.index(destroy_op)] += reward_improve
-            repair_scores[repair_operators.index(repair_op)] += reward_improve
+        if recorder is not None:
+            lookups = cache.hits + cache.misses
+            start = time.perf_counter()
+
+        # Apply destroy and repair operators in place, then re-cost the routes they touched
+        mark = current.mark()
+        removed_customers = destroy_op(current, n_remove=3)
+        if recorder is not None:
+            destroyed = time.perf_counter()
+        repair_op(current, removed_customers, customers, vehicles)
+        if recorder is not None:
+            repaired = time.perf_counter()
+        candidate_costs = list(route_costs)
+        for r in current.touched(mark):
+            candidate_costs[r] = cache.route_cost(current.keys[r], current.route(r), weights)
+        candidate_cost = sum(candidate_costs)
+
+        # Accept or reject the candidate; the criterion sees every candidate so its schedule advances
+        accepted = acceptance(candidate_cost, current_cost, best_cost, rng)
+        if candidate_cost < best_cost:
+            best_solution = current.to_dict()
+            best_cost = candidate_cost
+            last_improvement = it
+            outcome = 'best'
+        elif not accepted:
+            outcome = 'reject'
+        elif candidate_cost < current_cost:
+            outcome = 'improve'
+        else:
+            outcome = 'accept'
+        if outcome == 'reject':
+            current.rollback(mark)
         else:
-            destroy_scores[destroy_operators.index(destroy_op)] += reward_accept
-            repair_scores[repair_operators.index(repair_op)] += reward_accept
+            current.commit()
+            route_costs, current_cost = candidate_costs, candidate_cost
+
+        # Update scores based on solution quality
+        d, r = destroy_operators.index(destroy_op), repair_operators.index(repair_op)
+        destroy_scores[d] += rewards[outcome]
+        repair_scores[r] += rewards[outcome]
+        destroy_uses[d] += 1
+        repair_uses[r] += 1
+
+        if recorder is not None:
+            recorder.record({
+                'kind': 'iteration',
+                'iteration': it,
+                'destroy': operator_name(destroy_op),
+                'repair': operator_name(repair_op),
+                'destroy_time': destroyed - start,
+                'repair_time': repaired - destroyed,
+                'outcome': outcome,
+                'cost': candidate_cost,
+                'best_cost': best_cost,
+                'cache_lookups': cache.hits + cache.misses - lookups,
+            })
         
         # Update weights using the scores
-        destroy_weights = update_weights(destroy_weights, destroy_scores, smoothing_factor)
-        repair_weights = update_weights(repair_weights, repair_scores, smoothing_factor)
-        
-        # Set the current solution to the repaired solution
-        current_solution = repaired_solution
-        
-        # === Local Search every 0.25 iterations ===
-        if it % max(1, int(max_iter * 0.25)) == 0 and it > 0:
+        if segment_length is None:
+            destroy_weights = update_weights(destroy_weights, destroy_scores, smoothing_factor)
+            repair_weights = update_weights(repair_weights, repair_scores, smoothing_factor)
+        elif (it + 1) % segment_length == 0:
+            destroy_weights = segment_weights(destroy_weights, destroy_scores, destroy_uses, smoothing_factor)
+            repair_weights = segment_weights(repair_weights, repair_scores, repair_uses, smoothing_factor)
+            destroy_scores = [0] * len(destroy_operators)
+            repair_scores = [0] * len(repair_operators)
+            destroy_uses = [0] * len(destroy_operators)
+            repair_uses = [0] * len(repair_operators)
+
+        # === Local Search every local_search_interval iterations ===
+        if it % local_search_interval == 0 and it > 0:
+            if recorder is not None:
+                lookups = cache.hits + cache.misses
+                start = time.perf_counter()
             current_solution, current_cost = local_search(
-                current_solution, customers, vehicles, parameters, weights
+                current.to_dict(), customers, vehicles, parameters, weights, instance=instance, cache=cache,
+                neighbors=neighbors, deadline=deadline
             )
-            if current_cost < best_cost:
+            adopt(current_solution)
+            improved = current_cost < best_cost
+            if improved:
                 best_solution, best_cost = current_solution, current_cost
-    
+                last_improvement = it
+            if recorder is not None:
+                recorder.record({
+                    'kind': 'local_search',
+                    'iteration': it,
+                    'time': time.perf_counter() - start,
+                    'outcome': 'best' if improved else None,
+                    'cost': current_cost,
+                    'best_cost': best_cost,
+                    'cache_lookups': cache.hits + cache.misses - lookups,
+                })
+
+        # === Migration between cooperating islands ===
+        if migration is not None and (it + 1) % migration.interval == 0:
+            immigrant = migration.exchange(best_solution, best_cost, destroy_weights, repair_weights)
+            if immigrant is not None:
+                solution, cost, peer_destroy_weights, peer_repair_weights = immigrant
+                if cost < best_cost:
+                    best_solution, best_cost = solution, cost
+                    adopt(solution)
+                    current_cost = cost
+                    last_improvement = it
+                destroy_weights = blend_weights(destroy_weights, peer_destroy_weights)
+                repair_weights = blend_weights(repair_weights, peer_repair_weights)
+
+        next_iter = it + 1
+        if checkpoint_path is not None and next_iter % checkpoint_interval == 0:
+            checkpoint(next_iter)
+
+    if checkpoint_path is not None:
+        checkpoint(next_iter)
+    if return_stats:
+        return best_solution, {'iterations': next_iter - start_iter, 'best_cost': best_cost}
     return best_solution
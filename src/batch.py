@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from src.service import init_worker, solve_spec
+
+# Matrices of a spec that are placed in shared memory
+MATRIX_FIELDS = ('travel_time_matrix', 'grade_matrix')
+
+def _records(value):
+    """Records of a DataFrame, leaving lists of records untouched."""
+    return value.to_dict('records') if isinstance(value, pd.DataFrame) else value
+
+def _share_matrices(specs):
+    """
+    Place every distinct matrix of the specs in shared memory once.
+    Args:
+        specs: Instance specs; matrices that are the same object are shared.
+    Returns:
+        Tuple (specs, blocks): copies of the specs with shared-memory matrix
+        handles and DataFrames turned into records, and the SharedMemory
+        blocks, which the caller must close and unlink when done.
+    """
+    shared = {}
+    blocks = []
+    prepared = []
+    for spec in specs:
+        spec = {key: _records(value) for key, value in spec.items()}
+        for field in MATRIX_FIELDS:
+            value = spec.get(field)
+            if value is None or isinstance(value, tuple):
+                continue
+            if id(value) not in shared:
+                matrix = np.asarray(value, dtype=float)
+                block = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+                np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=block.buf)[...] = matrix
+                blocks.append(block)
+                # Keep the source alive so its id() is not reused by another matrix
+                shared[id(value)] = (value, ('shm', block.name, matrix.shape, matrix.dtype.str))
+            spec[field] = shared[id(value)][1]
+        prepared.append(spec)
+    return prepared, blocks
+
+def _solution(pairs):
+    """Solution dict from the [route_key, route] pairs of a solve result."""
+    return {tuple(key) if isinstance(key, list) else key: route for key, route in pairs}
+
+def solve_batch(specs, n_workers=4, max_pending=None):
+    """
+    Solve many independent instances on a pool of warm workers.
+
+    Instances are scheduled largest first (by customer count) so long jobs
+    do not end up last on an otherwise idle pool. Each distinct matrix
+    object is copied into shared memory once and attached once per worker;
+    workers keep compiled instances and their route caches between jobs,
+    so instances that share a matrix, or repeat, start warm. Specs that
+    give 'matrix_ids' take their customers' rows out of a larger shared
+    matrix, so e.g. every day of a depot can share the depot's one matrix.
+    Results are yielded as soon as each instance finishes, and a job that
+    raises yields its exception without stopping the others.
+    Args:
+        specs: Iterable of instance specs in the format of src.service.solve_spec;
+            'customers', 'vehicles' and 'shifts' may also be DataFrames and the
+            matrices NumPy arrays.
+        n_workers: Number of worker processes.
+        max_pending: Jobs handed to the pool at a time (default 2 * n_workers);
+            the rest wait here, already in largest-first order.
+    Yields:
+        Tuples (index, result): the position of the spec in specs and the
+        solve_spec result, with the solution as a {route_key: route} dict,
+        or the exception raised by that job.
+    """
+    specs, blocks = _share_matrices(specs)
+    order = sorted(range(len(specs)), key=lambda i: len(specs[i]['customers']), reverse=True)
+    max_pending = 2 * n_workers if max_pending is None else max_pending
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker) as pool:
+            pending = {}
+            queued = iter(order)
+            for i in queued:
+                pending[pool.submit(solve_spec, i, specs[i], None)] = i
+                if len(pending) >= max_pending:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    next_i = next(queued, None)
+                    if next_i is not None:
+                        pending[pool.submit(solve_spec, next_i, specs[next_i], None)] = next_i
+                    # A failing job is reported in place of its result; the other jobs carry on
+                    try:
+                        result = future.result()
+                    except Exception as error:
+                        yield i, error
+                        continue
+                    result['solution'] = _solution(result['solution'])
+                    yield i, result
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
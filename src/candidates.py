@@ -0,0 +1,49 @@
+import numpy as np
+
+def candidate_lists(instance, k, chunk_size=1024):
+    """
+    k-nearest candidate neighbours of every node for granular local search.
+
+    Nodes i and j are neighbours when they are time-window compatible, i.e.
+    one can be reached from the other before its window closes
+    (a_i + t_ij <= b_j or a_j + t_ji <= b_i), ranked by min(t_ij, t_ji).
+    The depot is never a candidate: every route already passes it.
+    Rows are processed in chunks so the working memory stays at
+    O(chunk_size * n).
+    Args:
+        instance: Compiled Instance.
+        k: Number of neighbours per node.
+        chunk_size: Rows handled per NumPy pass.
+    Returns:
+        List indexed by node index of neighbour node-index lists, nearest first.
+        Nodes with fewer than k compatible nodes get shorter lists.
+    """
+    n = instance.n_nodes
+    depot = instance.depot
+    k = min(k, n - 1 if depot is None else n - 2)
+    if k <= 0:
+        return [[] for _ in range(n)]
+    T = instance.arc_time
+    a = instance.ready_time
+    b = instance.due_time
+
+    neighbors = []
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        rows = np.arange(start, stop)
+        forward = T[start:stop]
+        backward = T[:, start:stop].T
+        compatible = ((a[rows, None] + forward <= b[None, :])
+                      | (a[None, :] + backward <= b[rows, None]))
+        dist = np.where(compatible, np.minimum(forward, backward), np.inf)
+        dist[rows - start, rows] = np.inf
+        if depot is not None:
+            dist[:, depot] = np.inf
+
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        nearest_dist = np.take_along_axis(dist, nearest, axis=1)
+        order = np.argsort(nearest_dist, axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        finite = np.isfinite(np.take_along_axis(nearest_dist, order, axis=1))
+        neighbors.extend(row[mask].tolist() for row, mask in zip(nearest, finite))
+    return neighbors
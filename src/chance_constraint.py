@@ -0,0 +1,164 @@
+import numpy as np
+from functools import lru_cache
+from scipy.special import gammainc
+from scipy.stats import gamma
+
+# The rider fatigue chance constraint of the paper. The ride time a rider
+# tolerates before fatigue is Gamma(alpha_k, scale=beta_k) distributed, and
+# a route is at risk when its ride time exceeds the rider's tolerance. The
+# deterministic fatigue_threshold used everywhere else is the p-quantile of
+# that distribution: the longest ride time whose risk is at most p. Ride
+# times and beta share one unit (hours in main.py and the benchmarks).
+
+@lru_cache(maxsize=4096)
+def gamma_quantile(alpha, beta, p):
+    """p-quantile of Gamma(alpha, scale=beta), computed once per (alpha, beta, p)."""
+    return float(gamma.ppf(p, alpha, scale=beta))
+
+def fatigue_thresholds(alpha, beta, p=0.95):
+    """
+    Fatigue thresholds of many riders through the quantile cache.
+    Args:
+        alpha, beta: Gamma shape and scale per rider (scalars or arrays).
+        p: Probability level of the chance constraint.
+    Returns:
+        Array of p-quantiles, broadcast from alpha and beta.
+    """
+    alpha, beta = np.broadcast_arrays(np.asarray(alpha, dtype=float), np.asarray(beta, dtype=float))
+    flat = [gamma_quantile(a, b, float(p)) for a, b in zip(alpha.ravel().tolist(), beta.ravel().tolist())]
+    return np.array(flat, dtype=float).reshape(alpha.shape)
+
+def exceedance_probability(ride_time, alpha, beta):
+    """
+    Closed-form probability that a ride time exceeds the rider's fatigue tolerance.
+
+    This is the Gamma CDF, evaluated as the regularized lower incomplete
+    gamma function without SciPy's distribution overhead, so whole arrays of
+    candidate routes are scored in one call.
+    Args:
+        ride_time: Ride time of each route (scalar or array).
+        alpha, beta: Gamma shape and scale of the rider of each route (broadcast).
+    Returns:
+        Array of probabilities P(tolerance < ride_time).
+    """
+    ride_time = np.maximum(np.asarray(ride_time, dtype=float), 0.0)
+    return gammainc(alpha, ride_time / np.asarray(beta, dtype=float))
+
+def sample_tolerances(alpha, beta, n_samples=1000, seed=None):
+    """
+    Draws of every rider's fatigue tolerance.
+    Args:
+        alpha, beta: Gamma shape and scale per rider (arrays of length n_vehicles).
+        n_samples: Draws per rider.
+        seed: Seed or Generator for numpy's default_rng.
+    Returns:
+        (n_vehicles, n_samples) array.
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    beta = np.asarray(beta, dtype=float)
+    rng = np.random.default_rng(seed)
+    return rng.gamma(alpha[:, None], beta[:, None], size=(len(alpha), n_samples))
+
+def monte_carlo_exceedance(ride_time, tolerances, ride_time_cv=0.0, seed=None):
+    """
+    Batched Monte Carlo estimate of the exceedance probability of many routes.
+
+    Each route is compared with all the draws of its rider's tolerance at
+    once. Routes served by the same rider share the same draws (common
+    random numbers), so differences between candidate routes are estimated
+    with little noise. With ride_time_cv > 0 the ride times are random too,
+    normally distributed with that coefficient of variation and truncated at
+    0, which has no closed form.
+    Args:
+        ride_time: Array of route ride times.
+        tolerances: (n_routes, n_samples) draws, e.g. sample_tolerances(...)[k]
+            for the dense vehicle index k of each route.
+        ride_time_cv: Coefficient of variation of the ride times.
+        seed: Seed or Generator for the ride-time noise.
+    Returns:
+        Array of estimated probabilities, one per route.
+    """
+    ride_time = np.asarray(ride_time, dtype=float)[:, None]
+    if ride_time_cv > 0:
+        rng = np.random.default_rng(seed)
+        noise = rng.standard_normal(tolerances.shape)
+        ride_time = np.maximum(ride_time * (1.0 + ride_time_cv * noise), 0.0)
+    return (ride_time > tolerances).mean(axis=1)
+
+def route_ride_times(instance, route_keys, routes):
+    """
+    Ride times of many routes from one flat gather.
+
+    Only the routes' own arcs count, depot legs included, as in the cost
+    function.
+    Args:
+        instance: Compiled Instance.
+        route_keys: Route key (vehicle id or (vehicle_id, shift)) of each route.
+        routes: Sequences of customer ids.
+    Returns:
+        Tuple (k, ride_time) of dense vehicle indices and ride times.
+    """
+    k = np.array([instance.vehicle_of(key) for key in route_keys], dtype=np.intp)
+    trips = [instance.route_nodes(route) for route in routes]
+    lengths = np.array([len(trip) for trip in trips], dtype=np.intp)
+    ride_time = np.zeros(len(lengths))
+    if lengths.sum() == 0:
+        return k, ride_time
+    idx = np.concatenate([trip for trip in trips if len(trip)])
+    arc = instance.arc_time[idx[:-1], idx[1:]]
+    # Arcs from each route's last stop into the next route's first are masked out
+    ends = np.cumsum(lengths[lengths > 0])
+    arc[ends[:-1] - 1] = 0.0
+    starts = np.concatenate([[0], ends[:-1]])
+    ride_time[lengths > 0] = np.add.reduceat(np.append(arc, 0.0), starts)
+    return k, ride_time
+
+class FatigueRisk:
+    """
+    Rider fatigue risk of routes under the Gamma tolerance model.
+
+    Holds every rider's Gamma parameters in dense vehicle order, the cached
+    thresholds, and one fixed set of tolerance draws reused by every Monte
+    Carlo call.
+    """
+
+    def __init__(self, alpha, beta, p=0.95, n_samples=1000, seed=None):
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.beta = np.asarray(beta, dtype=float)
+        self.p = p
+        self.thresholds = fatigue_thresholds(self.alpha, self.beta, p)
+        self.tolerances = sample_tolerances(self.alpha, self.beta, n_samples, seed)
+
+    @classmethod
+    def from_vehicles(cls, vehicles, p=0.95, n_samples=1000, seed=None):
+        """Model for a vehicles DataFrame with 'alpha' and 'beta' columns, in its row order."""
+        return cls(vehicles['alpha'].to_numpy(dtype=float), vehicles['beta'].to_numpy(dtype=float),
+                   p=p, n_samples=n_samples, seed=seed)
+
+    def probability(self, k, ride_time):
+        """Closed-form exceedance probability of routes with dense vehicle indices k."""
+        return exceedance_probability(ride_time, self.alpha[k], self.beta[k])
+
+    def estimate(self, k, ride_time, ride_time_cv=0.0, seed=None):
+        """Monte Carlo exceedance probability of routes with dense vehicle indices k."""
+        return monte_carlo_exceedance(np.atleast_1d(ride_time), self.tolerances[np.atleast_1d(k)],
+                                      ride_time_cv=ride_time_cv, seed=seed)
+
+    def route_risks(self, instance, solution, monte_carlo=False, ride_time_cv=0.0, seed=None):
+        """
+        Exceedance probability of every route of a solution (or candidate route dict).
+        Args:
+            instance: Compiled Instance whose vehicles are in the same order.
+            solution: Dict of route key -> list of customer ids.
+            monte_carlo: Use the Monte Carlo estimator instead of the closed form.
+            ride_time_cv, seed: Ride-time noise of the Monte Carlo estimator.
+        Returns:
+            Dict of route key -> probability.
+        """
+        keys = list(solution)
+        k, ride_time = route_ride_times(instance, keys, [solution[key] for key in keys])
+        if monte_carlo:
+            risk = self.estimate(k, ride_time, ride_time_cv=ride_time_cv, seed=seed)
+        else:
+            risk = self.probability(k, ride_time)
+        return dict(zip(keys, risk.tolist()))
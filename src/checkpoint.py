@@ -0,0 +1,37 @@
+import os
+import pickle
+
+# Bumped whenever the checkpoint layout changes
+CHECKPOINT_VERSION = 2
+
+def save_checkpoint(path, state):
+    """
+    Write an ALNS checkpoint atomically.
+
+    The state is pickled to a temporary file next to path and moved into
+    place with os.replace, so a run killed mid-write leaves the previous
+    checkpoint intact.
+    Args:
+        path: Checkpoint file.
+        state: Dict with the iteration, current/best solutions and costs,
+            operator weights, scores and uses, the acceptance criterion and
+            the RNG state.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': CHECKPOINT_VERSION, **state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    """
+    Read an ALNS checkpoint written by save_checkpoint.
+    Args:
+        path: Checkpoint file.
+    Returns:
+        The checkpoint state dict.
+    """
+    with open(path, 'rb') as f:
+        state = pickle.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {state.get('version')!r} in {path}")
+    return state
@@ -1,6 +1,125 @@
 import numpy as np
+from collections import OrderedDict, namedtuple
+from src.feasibility import route_time_warp
+from src.instance import compile_instance
 
-def calculate_energy_consumption(customers, vehicles, solution, parameters):
+# Energy and unweighted violation amounts of one route
+RouteEvaluation = namedtuple('RouteEvaluation', ['energy', 'battery', 'fatigue', 'capacity', 'time_window'])
+
+def route_energy(instance, vehicle_id, route):
+    """
+    Energy consumption of a single route under the objective function Z(s).
+    Args:
+        instance: Compiled Instance.
+        vehicle_id: Vehicle serving the route.
+        route: Sequence of customer ids.
+    Returns:
+        Energy consumed along the route's arcs, depot legs included.
+    """
+    idx = instance.route_nodes(route)
+    if len(idx) < 2:
+        return 0.0
+    k = instance.vehicle_of(vehicle_id)
+    return float(instance.gather_arc_energy(k, idx[:-1], idx[1:]).sum())
+
+def route_violations(instance, vehicle_id, route):
+    """
+    Unweighted constraint violations of a single route.
+    Args:
+        instance: Compiled Instance.
+        vehicle_id: Vehicle (or (vehicle_id, shift) route key) serving the route.
+        route: Sequence of customer ids.
+    Returns:
+        Tuple (battery, fatigue, capacity, time_window) of violation amounts.
+    """
+    k = instance.vehicle_of(vehicle_id)
+    idx = instance.route_nodes(route)
+    ride_time = instance.arc_time[idx[:-1], idx[1:]].sum()
+    time_warp = route_time_warp(instance, vehicle_id, idx.tolist())
+    return violations_from_totals(instance, k, instance.demand[instance.indices(route)].sum(), ride_time, time_warp)
+
+def violations_from_totals(instance, k, total_demand, ride_time, time_warp):
+    """
+    Unweighted constraint violations from a route's aggregated totals.
+
+    Battery use is the ridden distance (battery_rate * ride_time, km) beyond
+    the vehicle's battery_range; fatigue is the ride time beyond the rider's
+    fatigue_threshold. Both count the route's arcs, depot legs included,
+    and each route (trip) is charged separately. Accepts NumPy arrays of totals to score
+    many candidate routes at once.
+    Args:
+        instance: Compiled Instance.
+        k: Dense vehicle index.
+        total_demand: Summed demand of the route's customers.
+        ride_time: Summed travel time of the route's arcs.
+        time_warp: Time-window and shift-bound lateness of the route (see src.feasibility).
+    Returns:
+        Tuple (battery, fatigue, capacity, time_window) of violation amounts.
+    """
+    battery = _excess(instance.battery_rate * ride_time, instance.battery_range[k])
+    fatigue = _excess(ride_time, instance.fatigue_threshold[k])
+    capacity = _excess(total_demand, instance.capacity[k])
+    return battery, fatigue, capacity, time_warp
+
+def _excess(value, limit):
+    """Amount by which value exceeds limit, or 0."""
+    if isinstance(value, np.ndarray):
+        return np.maximum(value - limit, 0.0)
+    return float(max(value - limit, 0.0))
+
+def penalty_cost(violations, weights):
+    """Weight a (battery, fatigue, capacity, time_window) violation tuple."""
+    battery, fatigue, capacity, time_window = violations
+    return (weights['wG'] * battery + weights['wF'] * fatigue
+            + weights['wQ'] * capacity + weights.get('wT', 0) * time_window)
+
+def route_cost(instance, vehicle_id, route, weights):
+    """Augmented cost (energy plus weighted penalties) of a single route."""
+    return route_energy(instance, vehicle_id, route) + penalty_cost(route_violations(instance, vehicle_id, route), weights)
+
+def evaluate_route(instance, vehicle_id, route):
+    """Energy and unweighted violations of a single route, as a RouteEvaluation."""
+    return RouteEvaluation(route_energy(instance, vehicle_id, route), *route_violations(instance, vehicle_id, route))
+
+def evaluation_cost(evaluation, weights):
+    """Augmented cost of a RouteEvaluation under the given penalty weights."""
+    return evaluation.energy + penalty_cost(evaluation[1:], weights)
+
+def solution_energy(instance, solution):
+    """Total energy consumption Z(s) of a solution on a compiled Instance."""
+    return sum(route_energy(instance, vehicle_id, route) for vehicle_id, route in solution.items())
+
+def solution_cost(instance, solution, weights):
+    """Augmented cost f(s) of a solution on a compiled Instance."""
+    return sum(route_cost(instance, vehicle_id, route, weights) for vehicle_id, route in solution.items())
+
+# Instances compiled by the DataFrame wrappers below, keyed by the identity
+# of their inputs; the entries hold the inputs, so no id is reused while cached
+_COMPILED = OrderedDict()
+_COMPILED_SIZE = 4
+
+def _compiled(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts):
+    """
+    compile_instance of the inputs, memoized on their identity.
+
+    Repeated calls with the same frames and matrices (the usual pattern
+    in a search loop) reuse the compiled Instance instead of rebuilding
+    it; the inputs must not be modified in place between calls. The
+    last _COMPILED_SIZE input sets are kept, least recently used evicted.
+    """
+    inputs = (customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    key = tuple(map(id, inputs))
+    if key in _COMPILED:
+        _COMPILED.move_to_end(key)
+        return _COMPILED[key][1]
+    instance = compile_instance(*inputs[:3], travel_time_matrix, grade_matrix, shifts)
+    _COMPILED[key] = (inputs, instance)
+    if len(_COMPILED) > _COMPILED_SIZE:
+        _COMPILED.popitem(last=False)
+    return instance
+
+def calculate_energy_consumption(customers, vehicles, solution, parameters, travel_time_matrix=None, grade_matrix=None,
+                                 shifts=None, instance=None):
     """
     Calculate the energy consumption for the current solution based on the objective function Z(s).
     Args:
@@ -8,45 +127,18 @@ def calculate_energy_consumption(customers, vehicles, solution, parameters):
         vehicles: DataFrame with vehicle details (mass, capacity, etc.).
         solution: Dict with vehicle assignments.
         parameters: Dict of problem parameters.
+        travel_time_matrix, grade_matrix, shifts: Forwarded to compile_instance.
+        instance: Compiled Instance of the inputs; compiled (and memoized,
+            see _compiled) when omitted.
     Returns:
         Total energy consumption Z(s).
     """
-    g = parameters['g']  # Gravitational acceleration
-    rho = parameters['rho']  # Air density
-    C_DA = parameters['C_DA']  # Drag area
-    v = parameters['v']  # Velocity
-    B_0 = parameters['B_0']  # Bearing coefficient constant
-    B_1 = parameters['B_1']  # Bearing coefficient linear
-    C_RR = parameters['C_RR']  # Rolling resistance coefficient
-    METS = parameters['METS']  # Metabolic equivalents (constant)
-
-    total_cost = 0
-
-    for vehicle_id, assigned_customers in solution.items():
-        vehicle = vehicles.loc[vehicles['id'] == vehicle_id].iloc[0]
-        mc_k = vehicle['mass']  # Vehicle mass
-        mr_k = vehicle['rider_mass']  # Rider mass
-
-        for idx in range(len(assigned_customers) - 1):
-            i = assigned_customers[idx]
-            j = assigned_customers[idx + 1]
-
-            t_ij = customers.loc[customers['id'] == i, f'travel_time_to_{j}'].values[0]
-            e_ij = customers.loc[customers['id'] == i, f'grade_to_{j}'].values[0]
-            m_ijk_t = customers.loc[customers['id'] == j, 'demand'].values[0]
-
-            # Objective function components
-            metabolic_cost = 3.96 * ((69.8 * 3.5 * METS * mr_k) / 200)
-            grade_cost = (1 / 0.7) * ((mc_k + mr_k + m_ijk_t) * g * v * np.sin(np.arctan(e_ij)))
-            drag_cost = (1 / 0.7) * (0.5 * rho * C_DA * v**3)
-            bearing_cost = (1 / 0.7) * ((B_0 + B_1 * v) * v)
-            rolling_cost = (1 / 0.7) * (C_RR * (mc_k + mr_k + m_ijk_t) * g * np.cos(np.arctan(e_ij)) * v)
-
-            total_cost += t_ij * (metabolic_cost + grade_cost + drag_cost + bearing_cost + rolling_cost)
-
-    return total_cost
-
-def augmented_cost_function(customers, vehicles, solution, parameters, weights):
+    if instance is None:
+        instance = _compiled(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    return solution_energy(instance, solution)
+
+def augmented_cost_function(customers, vehicles, solution, parameters, weights, travel_time_matrix=None,
+                            grade_matrix=None, shifts=None, instance=None):
     """
     Calculate the augmented cost function f(s) including penalties for infeasibilities.
     Args:
@@ -55,33 +147,12 @@ def augmented_cost_function(customers, vehicles, solution, parameters, weights):
         solution: Current solution dict.
         parameters: Problem parameters.
         weights: Penalty weights for constraints.
+        travel_time_matrix, grade_matrix, shifts: Forwarded to compile_instance.
+        instance: Compiled Instance of the inputs; compiled (and memoized,
+            see _compiled) when omitted.
     Returns:
         Total augmented cost f(s).
     """
-    # Objective function Z(s)
-    Z_s = calculate_energy_consumption(customers, vehicles, solution, parameters)
-    
-    # Penalty terms
-    penalty_battery = 0
-    penalty_fatigue = 0
-    penalty_capacity = 0
-    penalty_time_window = 0
-
-    for vehicle_id, assigned_customers in solution.items():
-        vehicle = vehicles.loc[vehicles['id'] == vehicle_id].iloc[0]
-        total_demand = sum(customers.loc[customers['id'] == c_id, 'demand'].values[0] for c_id in assigned_customers)
-
-        # Battery range violation
-        if vehicle['battery_range'] < sum(customers.loc[customers['id'] == c_id, 'travel_time'].values[0] for c_id in assigned_customers):
-            penalty_battery += weights['wG'] * (sum(customers['travel_time']) - vehicle['battery_range'])
-
-        # Fatigue threshold violation
-        if vehicle['fatigue_threshold'] < sum(customers['travel_time']):
-            penalty_fatigue += weights['wF'] * (sum(customers['travel_time']) - vehicle['fatigue_threshold'])
-
-        # Capacity violation
-        if total_demand > vehicle['capacity']:
-            penalty_capacity += weights['wQ'] * (total_demand - vehicle['capacity'])
-
-    total_augmented_cost = Z_s + penalty_battery + penalty_fatigue + penalty_capacity + penalty_time_window
-    return total_augmented_cost
+    if instance is None:
+        instance = _compiled(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    return solution_cost(instance, solution, weights)
@@ -0,0 +1,276 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from src.alns import alns
+from src.candidates import candidate_lists
+from src.initial_solution import calculate_overlap
+from src.instance import compile_instance
+from src.local_search import local_search
+from src.operators import greedy_insertion
+from src.solution import Solution
+from src.parallel import share_instance, attach_instance
+from src.route_cache import RouteCache
+
+def assign_shifts(customers, shifts):
+    """
+    Demand-balanced shift of each customer.
+
+    A customer can go to any shift its time window overlaps (see
+    calculate_overlap), or to the closest shift if it overlaps none.
+    Customers with the fewest such shifts are placed first, largest demand
+    first, each in its eligible shift with the least demand so far, so
+    flexible customers even out the load between shifts.
+    Args:
+        customers: DataFrame with 'a_i', 'b_i' and 'demand'.
+        shifts: DataFrame with 'E_t' and 'L_t'.
+    Returns:
+        Array of 0-based shift positions, one per customer row.
+    """
+    bounds = list(zip(shifts['E_t'], shifts['L_t']))
+    eligible = []
+    for a_i, b_i in zip(customers['a_i'], customers['b_i']):
+        options = [s for s, (E_t, L_t) in enumerate(bounds) if calculate_overlap(a_i, b_i, E_t, L_t) > 0]
+        if not options:
+            options = [int(np.argmin([max(E_t - b_i, a_i - L_t) for E_t, L_t in bounds]))]
+        eligible.append(options)
+
+    demand = customers['demand'].to_numpy(dtype=float)
+    load = [0.0] * len(bounds)
+    result = np.zeros(len(eligible), dtype=np.intp)
+    for c in sorted(range(len(eligible)), key=lambda c: (len(eligible[c]), -demand[c])):
+        s = min(eligible[c], key=lambda s: load[s])
+        result[c] = s
+        load[s] += demand[c]
+    return result
+
+def bisect(ids, x, y, demand, n_parts):
+    """
+    Recursive coordinate bisection into demand-balanced geographic groups.
+
+    Each step cuts along the axis with the wider spread, at the point where
+    the demand on either side is proportional to the number of parts it will
+    be split into.
+    Args:
+        ids: Array of customer ids.
+        x, y: Planar coordinates of the customers.
+        demand: Customer demands.
+        n_parts: Number of groups (at most len(ids)).
+    Returns:
+        List of n_parts arrays of customer ids.
+    """
+    if n_parts <= 1:
+        return [ids]
+    left_parts = n_parts // 2
+    axis = x if np.ptp(x) >= np.ptp(y) else y
+    order = np.argsort(axis, kind='stable')
+    weight = np.maximum(demand[order], 1e-9)
+    share = np.cumsum(weight) / weight.sum()
+    cut = int(np.searchsorted(share, left_parts / n_parts)) + 1
+    # Leave at least one customer for every part on each side
+    cut = min(max(cut, left_parts), len(ids) - (n_parts - left_parts))
+    left, right = order[:cut], order[cut:]
+    return (bisect(ids[left], x[left], y[left], demand[left], left_parts)
+            + bisect(ids[right], x[right], y[right], demand[right], n_parts - left_parts))
+
+def share_fleet(part_demands, vehicle_ids, capacities):
+    """
+    Split vehicles between parts in proportion to their demand.
+
+    The largest vehicles go one each to the parts with the most demand; every
+    further vehicle goes to the part whose demand is least covered by the
+    capacity it already has.
+    Args:
+        part_demands: Total demand of each part.
+        vehicle_ids: Vehicles to share (at least one per part).
+        capacities: Capacity of each vehicle.
+    Returns:
+        List of vehicle id lists, one per part.
+    """
+    order = sorted(range(len(vehicle_ids)), key=lambda v: -capacities[v])
+    by_demand = sorted(range(len(part_demands)), key=lambda p: -part_demands[p])
+    shares = [[] for _ in part_demands]
+    allocated = [0.0] * len(part_demands)
+    for position, v in enumerate(order):
+        if position < len(by_demand):
+            p = by_demand[position]
+        else:
+            p = max(range(len(part_demands)), key=lambda p: part_demands[p] / allocated[p])
+        shares[p].append(vehicle_ids[v])
+        allocated[p] += capacities[v]
+    return shares
+
+def decompose(customers, vehicles, shifts=None, n_parts=4):
+    """
+    Partition an instance into balanced subproblems with fleet shares.
+
+    Customers are split into n_parts demand-balanced regions by recursive
+    bisection on their latitude and longitude. Each region then gets a
+    share of the fleet. Without shifts these are whole vehicles. With
+    shifts, every customer is given a shift its time window overlaps
+    (balanced with assign_shifts), and in each shift the vehicles are shared
+    in proportion to the regions' demand in that shift, as (vehicle_id,
+    shift) route keys; the subproblem's ALNS still picks the shift of every
+    customer. n_parts is capped by the number of customers and vehicles.
+    Args:
+        customers: DataFrame with 'id', 'demand', 'a_i', 'b_i', 'latitude'
+            and 'longitude'; the depot (id 0) is skipped.
+        vehicles: DataFrame with 'id' and 'capacity'.
+        shifts: Optional DataFrame with 'E_t' and 'L_t'.
+        n_parts: Requested number of subproblems.
+    Returns:
+        List of dicts with the part's 'customers' (ids) and 'route_keys'.
+    """
+    customers = customers.loc[customers['id'] != 0]
+    ids = customers['id'].to_numpy(dtype=np.intp)
+    demand = customers['demand'].to_numpy(dtype=float)
+    latitude = customers['latitude'].to_numpy(dtype=float)
+    # Equirectangular projection so a degree of longitude is not overweighted
+    x = customers['longitude'].to_numpy(dtype=float) * np.cos(np.radians(latitude.mean() if len(ids) else 0.0))
+    y = latitude
+    vehicle_ids = vehicles['id'].tolist()
+    capacities = vehicles['capacity'].astype(float).tolist()
+
+    n_parts = max(1, min(n_parts, len(ids), len(vehicle_ids)))
+    position = {c: i for i, c in enumerate(ids.tolist())}
+    regions = [region.tolist() for region in bisect(ids, x, y, demand, n_parts)]
+    route_keys = [[] for _ in regions]
+
+    if shifts is None:
+        region_demands = [sum(demand[position[c]] for c in region) for region in regions]
+        for keys, fleet in zip(route_keys, share_fleet(region_demands, vehicle_ids, capacities)):
+            keys.extend(fleet)
+    else:
+        customer_shift = assign_shifts(customers, shifts)
+        for shift in range(len(shifts)):
+            region_demands = [sum(demand[position[c]] for c in region if customer_shift[position[c]] == shift)
+                              for region in regions]
+            for keys, fleet in zip(route_keys, share_fleet(region_demands, vehicle_ids, capacities)):
+                keys.extend((vehicle_id, shift) for vehicle_id in fleet)
+    return [{'customers': region, 'route_keys': keys} for region, keys in zip(regions, route_keys)]
+
+# Per-process state set up once by _init_worker
+_worker = {}
+
+def _init_worker(handle):
+    instance, blocks = attach_instance(handle)
+    _worker['instance'] = instance
+    _worker['blocks'] = blocks
+
+def _solve_part(part, weights, max_iter, seed, alns_kwargs):
+    """Build a greedy start for one subproblem and improve it with ALNS on the shared instance."""
+    instance = _worker['instance']
+    cache = RouteCache(instance)
+    start = time.perf_counter()
+    initial = Solution(instance, part['route_keys'])
+    greedy_insertion(initial, part['customers'], None, None, instance, weights)
+    initial_solution = initial.to_dict()
+    best_solution = alns(initial_solution, None, None, instance.parameters, weights, max_iter=max_iter,
+                         cache=cache, seed=seed, **alns_kwargs)
+    stats = {
+        'customers': len(part['customers']),
+        'routes': len(part['route_keys']),
+        'seed': seed,
+        'best_cost': cache.solution_cost(best_solution, weights),
+        'runtime': time.perf_counter() - start,
+        'cache': cache.stats(),
+    }
+    return best_solution, stats
+
+def boundary_customers(instance, parts, neighbors):
+    """
+    Customers with a candidate neighbour in a different part.
+    Args:
+        instance: Compiled Instance.
+        parts: Parts returned by decompose.
+        neighbors: Candidate lists from candidate_lists.
+    Returns:
+        Set of customer ids.
+    """
+    part_of = {}
+    for p, part in enumerate(parts):
+        for node in instance.indices(part['customers']).tolist():
+            part_of[node] = p
+    boundary = set()
+    for node, p in part_of.items():
+        if any(part_of.get(w, p) != p for w in neighbors[node]):
+            boundary.add(int(instance.customer_ids[node]))
+    return boundary
+
+def decomposed_alns(customers, vehicles, parameters, weights, shifts=None, n_parts=4, n_workers=4,
+                    max_iter=100, boundary_iterations=50, granularity=10, seed=None, instance=None,
+                    travel_time_matrix=None, grade_matrix=None, **alns_kwargs):
+    """
+    ALNS for very large instances by decomposition.
+
+    The instance is partitioned with decompose, every subproblem is started
+    greedily and solved by its own ALNS in a process pool sharing the
+    instance matrices, and the sub-solutions are stitched together. The
+    stitched solution is then repaired where the parts meet: the routes
+    holding a boundary customer (one with a candidate neighbour in another
+    part) get a short joint ALNS and a granular local search, while every
+    other route is kept as solved.
+    Args:
+        customers: DataFrame with customer data, including 'latitude' and 'longitude'.
+        vehicles: DataFrame with vehicle details.
+        parameters: Problem parameters.
+        weights: Penalty weights for constraints.
+        shifts: Optional shifts DataFrame; route keys become (vehicle_id, shift).
+        n_parts: Requested number of subproblems (see decompose).
+        n_workers: Number of worker processes.
+        max_iter: ALNS iterations per subproblem.
+        boundary_iterations: ALNS iterations of the boundary repair (0 to skip it).
+        granularity: Candidate neighbours per customer, for the boundary and the local search.
+        seed: Base seed; part seeds are derived from it with numpy's SeedSequence.
+        instance: Optional compiled Instance, reused instead of compiling the frames.
+        travel_time_matrix, grade_matrix: Node-by-node matrices in customers row order,
+            compiled with the frames when no instance is given.
+        **alns_kwargs: Extra keyword arguments forwarded to every ALNS run.
+    Returns:
+        Tuple (solution, stats), where stats holds the per-part statistics, the
+        number of boundary customers and routes, and the stitched and final costs.
+    """
+    if instance is None:
+        instance = compile_instance(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    parts = decompose(customers, vehicles, shifts, n_parts)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(parts) + 1)]
+
+    start = time.perf_counter()
+    handle, blocks = share_instance(instance)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(handle,)) as pool:
+            futures = [pool.submit(_solve_part, part, weights, max_iter, part_seed, alns_kwargs)
+                       for part, part_seed in zip(parts, seeds)]
+            results = [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    solution = {}
+    for part_solution, _ in results:
+        solution.update(part_solution)
+    cache = RouteCache(instance)
+    stitched_cost = cache.solution_cost(solution, weights)
+
+    # Repair across part boundaries; interior routes are left as solved
+    neighbors = candidate_lists(instance, granularity)
+    boundary = boundary_customers(instance, parts, neighbors)
+    boundary_keys = [key for key, route in solution.items() if boundary.intersection(route)]
+    if boundary_keys:
+        border = {key: solution[key] for key in boundary_keys}
+        if boundary_iterations:
+            border = alns(border, None, None, instance.parameters, weights, max_iter=boundary_iterations,
+                          cache=cache, seed=seeds[-1], granularity=granularity, **alns_kwargs)
+        border, _ = local_search(border, None, None, instance.parameters, weights, instance=instance,
+                                 cache=cache, neighbors=neighbors)
+        solution.update(border)
+
+    stats = {
+        'parts': [part_stats for _, part_stats in results],
+        'boundary_customers': len(boundary),
+        'boundary_routes': len(boundary_keys),
+        'stitched_cost': stitched_cost,
+        'final_cost': cache.solution_cost(solution, weights),
+        'runtime': time.perf_counter() - start,
+    }
+    return solution, stats
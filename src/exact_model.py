@@ -0,0 +1,586 @@
+import itertools
+import math
+import os
+
+# Exact MILP of the CC-HMVRP.
+#
+# The model is parameterised by a data dict with the keys of the original
+# script: customers, vehicles and shifts (id lists), nodes ([0] + customers
+# + [end depot]), demands, bike_masses, rider_masses, bike_capacities,
+# battery_capacity, fatigue_limit (hours of riding per shift), Rk (reload
+# time), time_windows, ST and ET (shift start and end), service_times,
+# travel_times and grades (dicts keyed by arc), W and M_reload (big-Ms), and
+# the physical constants g, rho, METs, psi_h, psi_m, B0, B1, C_D_A, v, C_RR.
+#
+# build_model creates the docplex model; write_lp streams the same
+# formulation to a CPLEX LP file from generators, so memory stays flat
+# however many x[i, j, k, l] there are.
+
+PSI_H = 4.429  # Human power to energy conversion
+PSI_M = 1.369  # Metabolic energy conversion
+
+def model_data(customers, vehicles, shifts, parameters, travel_time_matrix, grade_matrix, reload_time=0.25):
+    """
+    Exact-model data from the DataFrames used by the heuristics.
+    Args:
+        customers: DataFrame with 'id' (depot 0 first), 'demand', 'a_i', 'b_i'
+            and optionally 'service_time'; row order matches the matrices.
+        vehicles: DataFrame with 'id', 'mass', 'rider_mass', 'capacity',
+            'battery_range' and 'fatigue_threshold' (hours).
+        shifts: DataFrame with 'E_t' and 'L_t'; shifts are numbered from 1.
+        parameters: Dict of problem parameters (as in main.py).
+        travel_time_matrix: Node-by-node travel times.
+        grade_matrix: Node-by-node grades.
+        reload_time: Time to reload at the depot between trips (Rk).
+    Returns:
+        Data dict for build_model and write_lp.
+    """
+    ids = [int(i) for i in customers['id']]
+    depot_row = ids.index(0)
+    customer_ids = [i for i in ids if i != 0]
+    end = max(ids) + 1
+    nodes = [0] + customer_ids + [end]
+    row = {i: r for r, i in enumerate(ids)}
+    row[end] = depot_row
+
+    a = dict(zip(ids, customers['a_i'].astype(float)))
+    b = dict(zip(ids, customers['b_i'].astype(float)))
+    service = dict(zip(ids, customers['service_time'].astype(float))) if 'service_time' in customers else {}
+    vehicle_ids = [int(k) for k in vehicles['id']]
+    shift_ids = list(range(1, len(shifts) + 1))
+
+    travel_times = {(i, j): float(travel_time_matrix[row[i]][row[j]]) for i in nodes for j in nodes if i != j}
+    grades = {(i, j): float(grade_matrix[row[i]][row[j]]) for i in nodes for j in nodes if i != j}
+    time_windows = {i: (a[i], b[i]) for i in ids}
+    time_windows[end] = time_windows[0]
+    latest = max(window[1] for window in time_windows.values())
+
+    def column(name):
+        return dict(zip(vehicle_ids, vehicles[name].astype(float)))
+
+    return {
+        'customers': customer_ids,
+        'vehicles': vehicle_ids,
+        'shifts': shift_ids,
+        'nodes': nodes,
+        'demands': {i: float(d) for i, d in zip(ids, customers['demand']) if i != 0},
+        'bike_masses': column('mass'),
+        'rider_masses': column('rider_mass'),
+        'bike_capacities': column('capacity'),
+        'battery_capacity': column('battery_range'),
+        'fatigue_limit': column('fatigue_threshold'),
+        'Rk': reload_time,
+        'time_windows': time_windows,
+        'ST': dict(zip(shift_ids, shifts['E_t'].astype(float))),
+        'ET': dict(zip(shift_ids, shifts['L_t'].astype(float))),
+        'service_times': {i: service.get(i, 0.0) for i in nodes},
+        'travel_times': travel_times,
+        'grades': grades,
+        'W': max(travel_times.values()) + latest,
+        'M_reload': max(travel_times[i, 0] + reload_time for i in customer_ids) + latest,
+        'g': parameters['g'],
+        'rho': parameters['rho'],
+        'METs': parameters['METS'],
+        'psi_h': parameters.get('psi_h', PSI_H),
+        'psi_m': parameters.get('psi_m', PSI_M),
+        'B0': parameters['B_0'],
+        'B1': parameters['B_1'],
+        'C_D_A': parameters['C_DA'],
+        'v': parameters['v'],
+        'C_RR': parameters['C_RR'],
+    }
+
+def arcs(data):
+    """All (i, j, k, l) arc-vehicle-shift index tuples, in model order."""
+    nodes = data['nodes']
+    return ((i, j, k, l) for i in nodes for j in nodes if i != j for k in data['vehicles'] for l in data['shifts'])
+
+def visits(data):
+    """All (i, k, l) node-vehicle-shift index tuples, in model order."""
+    return ((i, k, l) for i in data['nodes'] for k in data['vehicles'] for l in data['shifts'])
+
+def arc_coefficients(data, i, j, k):
+    """Objective coefficients (of x and of z) of arc (i, j) driven by vehicle k."""
+    t = data['travel_times'][i, j]
+    angle = math.atan(data['grades'][i, j])
+    g, v = data['g'], data['v']
+    mass = data['bike_masses'][k] + data['rider_masses'][k]
+    load_term = g * v * math.sin(angle) + data['C_RR'] * g * math.cos(angle) * v
+    x_coef = t * (data['psi_m'] * data['METs'] * data['rider_masses'][k]
+                  + data['psi_h'] * (mass * load_term
+                                     + 0.5 * data['rho'] * data['C_D_A'] * v ** 3
+                                     + (data['B0'] + data['B1'] * v) * v))
+    return x_coef, t * data['psi_h'] * load_term
+
+def load_big_m(data, i, j, k):
+    """
+    Big-M of the load row (27) on arc (i, j) for vehicle k.
+
+    capacity - d_i + d_j is the smallest value that leaves unused arcs
+    unconstrained: with x_ij = 0 the row reduces to m_i >= m_j - capacity
+    + d_i, which the bounds d_i <= m <= capacity (28-29) already imply.
+    """
+    demands = data['demands']
+    return data['bike_capacities'][k] - demands.get(i, 0) + demands.get(j, 0)
+
+def var_name(prefix, key):
+    """docplex-style variable name, e.g. x_0_1_1_1."""
+    return '_'.join([prefix, *map(str, key)])
+
+# --- docplex model ---
+
+def build_model(data, relax=False):
+    """
+    Build the exact model with docplex.
+    Args:
+        data: Model data dict (see model_data).
+        relax: Use continuous x and y (LP relaxation).
+    Returns:
+        Tuple (mdl, variables) with variables a dict of the x, y, m, z, s var dicts.
+    """
+    from docplex.mp.model import Model
+
+    nodes, customers, vehicles, shifts = data['nodes'], data['customers'], data['vehicles'], data['shifts']
+    end = nodes[-1]
+    demands, capacities = data['demands'], data['bike_capacities']
+    T = data['travel_times']
+    W, M_reload, Rk = data['W'], data['M_reload'], data['Rk']
+    N = capacities
+
+    mdl = Model(name='energy_consumption_vrp_relaxed' if relax else 'energy_consumption_vrp')
+    var_dict = mdl.continuous_var_dict if relax else mdl.binary_var_dict
+    x = var_dict(list(arcs(data)), name='x')
+    y = var_dict(list(visits(data)), name='y')
+    m = mdl.continuous_var_dict(list(visits(data)), lb=0, name='m')
+    z = mdl.continuous_var_dict(list(arcs(data)), lb=0, name='z')
+    s = mdl.continuous_var_dict(list(visits(data)), lb=0, name='s')
+
+    def objective_terms():
+        for i, j, k, l in arcs(data):
+            x_coef, z_coef = arc_coefficients(data, i, j, k)
+            yield x_coef * x[i, j, k, l] + z_coef * z[i, j, k, l]
+
+    mdl.minimize(mdl.sum(objective_terms()))
+
+    # (21) Each customer is visited exactly once
+    for i in customers:
+        mdl.add_constraint(mdl.sum(y[i, k, l] for k in vehicles for l in shifts) == 1)
+
+    # (22) Flow conservation constraints
+    for k in vehicles:
+        for l in shifts:
+            for i in nodes:
+                mdl.add_constraint(mdl.sum(x[i, j, k, l] for j in nodes if i != j) == y[i, k, l])
+                mdl.add_constraint(mdl.sum(x[j, i, k, l] for j in nodes if i != j) == y[i, k, l])
+
+    # (23) Incoming arc consistency
+    for j in customers:
+        for k in vehicles:
+            for l in shifts:
+                mdl.add_constraint(mdl.sum(x[i, j, k, l] for i in nodes if i != j) == y[j, k, l])
+
+    # (24) Capacity constraint per shift
+    for k in vehicles:
+        for l in shifts:
+            mdl.add_constraint(mdl.sum(demands.get(i, 0) * y[i, k, l] for i in customers) <= capacities[k])
+
+    # (25) Vehicle depot departure constraint
+    for k in vehicles:
+        mdl.add_constraint(mdl.sum(x[0, j, k, l] for j in customers for l in shifts) <= len(shifts))
+
+    # (26) Depot balance: departures from start depot = arrivals to end depot
+    for k in vehicles:
+        for l in shifts:
+            mdl.add_constraint(mdl.sum(x[0, j, k, l] for j in customers)
+                               == mdl.sum(x[i, end, k, l] for i in customers))
+
+    # (27-29) Load propagation and limit. Flow conservation (22) closes every
+    # trip with the return arc end -> 0, which carries no load and is skipped;
+    # on any other cycle the rows still contradict each other.
+    for i, j, k, l in arcs(data):
+        if (i, j) == (end, 0):
+            continue
+        q = load_big_m(data, i, j, k)
+        mdl.add_constraint(m[i, k, l] >= m[j, k, l] + demands.get(j, 0) - q * (1 - x[i, j, k, l]))
+    for i, k, l in visits(data):
+        mdl.add_constraint(m[i, k, l] >= demands.get(i, 0))
+        mdl.add_constraint(m[i, k, l] <= capacities[k])
+
+    # (29-30) Time propagation and time windows
+    for i, j, k, l in arcs(data):
+        if i in demands:
+            service = data['service_times'][i]
+            mdl.add_constraint(s[i, k, l] + T[i, j] + service - W * (1 - x[i, j, k, l]) <= s[j, k, l])
+    for i in customers:
+        for k in vehicles:
+            for l in shifts:
+                mdl.add_constraint(s[i, k, l] + T[i, 0] + Rk - M_reload * (1 - x[i, end, k, l]) <= s[end, k, l])
+
+    # (31) Shift start-end and continuity
+    for k in vehicles:
+        for l, next_l in zip(shifts, shifts[1:]):
+            mdl.add_constraint(s[end, k, l] <= s[0, k, next_l])
+
+    # (32) Time windows for customers
+    for i in customers:
+        for k in vehicles:
+            for l in shifts:
+                a, b = data['time_windows'][i]
+                mdl.add_constraint(s[i, k, l] >= a)
+                mdl.add_constraint(s[i, k, l] <= b)
+
+    # (33) Fatigue constraint
+    for k in vehicles:
+        for l in shifts:
+            mdl.add_constraint(mdl.sum(T[i, j] * x[i, j, k, l] for i in nodes for j in nodes if i != j)
+                               <= data['fatigue_limit'][k])
+
+    # (34) Battery constraint
+    for k in vehicles:
+        mdl.add_constraint(mdl.sum(3.6 * data['v'] * T[i, j] * x[i, j, k, l]
+                                   for i in nodes for j in nodes if i != j for l in shifts)
+                           <= data['battery_capacity'][k])
+
+    # (39-42) McCormick linearization for z
+    for i, j, k, l in arcs(data):
+        mdl.add_constraint(z[i, j, k, l] <= N[k] * x[i, j, k, l])
+        mdl.add_constraint(z[i, j, k, l] <= m[i, k, l])
+        mdl.add_constraint(z[i, j, k, l] >= m[i, k, l] - N[k] * (1 - x[i, j, k, l]))
+
+    return mdl, {'x': x, 'y': y, 'm': m, 'z': z, 's': s}
+
+# --- Streaming LP writer ---
+
+def constraints(data):
+    """
+    Rows of the exact model, generated in build_model's order.
+    Yields:
+        Tuples (terms, sense, rhs): terms an iterable of (coefficient,
+        variable name), sense one of '<=', '>=', '='.
+    """
+    nodes, customers, vehicles, shifts = data['nodes'], data['customers'], data['vehicles'], data['shifts']
+    end = nodes[-1]
+    demands, capacities = data['demands'], data['bike_capacities']
+    T = data['travel_times']
+    W, M_reload, Rk = data['W'], data['M_reload'], data['Rk']
+    x = lambda *key: var_name('x', key)
+    y = lambda *key: var_name('y', key)
+    m = lambda *key: var_name('m', key)
+    z = lambda *key: var_name('z', key)
+    s = lambda *key: var_name('s', key)
+
+    # (21)
+    for i in customers:
+        yield (((1, y(i, k, l)) for k in vehicles for l in shifts), '=', 1)
+    # (22)
+    for k in vehicles:
+        for l in shifts:
+            for i in nodes:
+                yield (itertools.chain(((1, x(i, j, k, l)) for j in nodes if i != j), [(-1, y(i, k, l))]), '=', 0)
+                yield (itertools.chain(((1, x(j, i, k, l)) for j in nodes if i != j), [(-1, y(i, k, l))]), '=', 0)
+    # (23)
+    for j in customers:
+        for k in vehicles:
+            for l in shifts:
+                yield (itertools.chain(((1, x(i, j, k, l)) for i in nodes if i != j), [(-1, y(j, k, l))]), '=', 0)
+    # (24)
+    for k in vehicles:
+        for l in shifts:
+            yield (((demands.get(i, 0), y(i, k, l)) for i in customers), '<=', capacities[k])
+    # (25)
+    for k in vehicles:
+        yield (((1, x(0, j, k, l)) for j in customers for l in shifts), '<=', len(shifts))
+    # (26)
+    for k in vehicles:
+        for l in shifts:
+            yield (itertools.chain(((1, x(0, j, k, l)) for j in customers),
+                                   ((-1, x(i, end, k, l)) for i in customers)), '=', 0)
+    # (27-29): m_i - m_j - q_ijk x_ijkl >= d_j - q_ijk
+    for i, j, k, l in arcs(data):
+        if (i, j) == (end, 0):
+            continue
+        q = load_big_m(data, i, j, k)
+        yield ([(1, m(i, k, l)), (-1, m(j, k, l)), (-q, x(i, j, k, l))], '>=', demands.get(j, 0) - q)
+    for i, k, l in visits(data):
+        yield ([(1, m(i, k, l))], '>=', demands.get(i, 0))
+        yield ([(1, m(i, k, l))], '<=', capacities[k])
+    # (29-30): s_i - s_j + W x_ijkl <= W - t_ij - service_i
+    for i, j, k, l in arcs(data):
+        if i in demands:
+            yield ([(1, s(i, k, l)), (-1, s(j, k, l)), (W, x(i, j, k, l))], '<=',
+                   W - T[i, j] - data['service_times'][i])
+    for i in customers:
+        for k in vehicles:
+            for l in shifts:
+                yield ([(1, s(i, k, l)), (-1, s(end, k, l)), (M_reload, x(i, end, k, l))], '<=',
+                       M_reload - T[i, 0] - Rk)
+    # (31)
+    for k in vehicles:
+        for l, next_l in zip(shifts, shifts[1:]):
+            yield ([(1, s(end, k, l)), (-1, s(0, k, next_l))], '<=', 0)
+    # (32)
+    for i in customers:
+        for k in vehicles:
+            for l in shifts:
+                a, b = data['time_windows'][i]
+                yield ([(1, s(i, k, l))], '>=', a)
+                yield ([(1, s(i, k, l))], '<=', b)
+    # (33)
+    for k in vehicles:
+        for l in shifts:
+            yield (((T[i, j], x(i, j, k, l)) for i in nodes for j in nodes if i != j), '<=', data['fatigue_limit'][k])
+    # (34)
+    for k in vehicles:
+        yield (((3.6 * data['v'] * T[i, j], x(i, j, k, l)) for i in nodes for j in nodes if i != j for l in shifts),
+               '<=', data['battery_capacity'][k])
+    # (39-42)
+    for i, j, k, l in arcs(data):
+        n = capacities[k]
+        yield ([(1, z(i, j, k, l)), (-n, x(i, j, k, l))], '<=', 0)
+        yield ([(1, z(i, j, k, l)), (-1, m(i, k, l))], '<=', 0)
+        yield ([(1, z(i, j, k, l)), (-1, m(i, k, l)), (-n, x(i, j, k, l))], '>=', -n)
+
+def _format(value):
+    """Number in LP format: integral floats without a trailing .0."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _write_expression(file, terms, empty):
+    """
+    Write an LP-format linear expression term by term, eight terms per line.
+    Args:
+        file: Writable text file object.
+        terms: Iterable of (coefficient, variable name); zero coefficients are dropped.
+        empty: Variable name to write with a zero coefficient if no term is left.
+    """
+    count = 0
+    for coefficient, name in terms:
+        if coefficient == 0:
+            continue
+        magnitude = abs(coefficient)
+        term = name if magnitude == 1 else f"{_format(magnitude)} {name}"
+        if count == 0:
+            file.write(f"-{term}" if coefficient < 0 else term)
+        else:
+            separator = "\n     " if count % 8 == 0 else " "
+            file.write(f"{separator}{'-' if coefficient < 0 else '+'} {term}")
+        count += 1
+    if count == 0:
+        file.write(f"0 {empty}")
+
+def write_lp(data, file, relax=False):
+    """
+    Stream the exact model to a CPLEX LP file.
+
+    Produces the same rows, in the same order, as build_model without
+    creating any docplex object: variables, the objective and every
+    constraint are generated one at a time and written straight to the
+    file, so memory does not grow with the model. Constraints are named
+    c1, c2, ... in build_model order, and variables use docplex names
+    (x_0_1_1_1), so the output can be diffed against Model.export_as_lp on
+    small instances.
+    Args:
+        data: Model data dict (see model_data).
+        file: Path or writable text file object.
+        relax: Declare x and y continuous instead of binary.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'w') as f:
+            write_lp(data, f, relax)
+        return
+
+    name = 'energy_consumption_vrp_relaxed' if relax else 'energy_consumption_vrp'
+    first = var_name('x', next(arcs(data)))
+    file.write(f"\\Problem name: {name}\n\nMinimize\n obj: ")
+
+    def objective_terms():
+        for i, j, k, l in arcs(data):
+            x_coef, z_coef = arc_coefficients(data, i, j, k)
+            yield x_coef, var_name('x', (i, j, k, l))
+            yield z_coef, var_name('z', (i, j, k, l))
+
+    _write_expression(file, objective_terms(), first)
+    file.write("\nSubject To\n")
+    for number, (terms, sense, rhs) in enumerate(constraints(data), 1):
+        file.write(f" c{number}: ")
+        _write_expression(file, terms, first)
+        file.write(f" {sense} {_format(rhs)}\n")
+
+    # m, z and s are continuous with lb=0 (the LP default); x and y are
+    # binaries, or [0, +inf) continuous when relaxed, as in build_model.
+    if not relax:
+        file.write("\nBinaries\n")
+        for key in arcs(data):
+            file.write(f" {var_name('x', key)}\n")
+        for key in visits(data):
+            file.write(f" {var_name('y', key)}\n")
+    file.write("End\n")
+
+# --- Warm start from a heuristic solution ---
+
+def _trips(data, solution):
+    """Map {route_key: route} onto exact-model (vehicle, shift) trips; empty routes are dropped."""
+    trips = {}
+    for key, route in solution.items():
+        if not route:
+            continue
+        # Shifts are 0-based in route keys (src.instance) and 1-based here
+        k, l = (key[0], data['shifts'][key[1]]) if isinstance(key, tuple) else (key, data['shifts'][0])
+        if (k, l) in trips:
+            raise ValueError(f"vehicle {k} has more than one route in shift {l}")
+        trips[k, l] = [int(c) for c in route]
+    return trips
+
+def _loads(data, k, used):
+    """
+    Smallest m of one vehicle and shift satisfying the load rows (27-29).
+
+    With the arcs in used driven and every other arc unused, each row of
+    (27) reads m_i - m_j >= w_ij, with w_ij = d_j on a used arc and d_j
+    minus the big-M on an unused one, so together with m_i >= d_i the
+    rows are difference constraints: their smallest solution is the
+    longest-path potential, found by Bellman-Ford relaxation from the
+    demands. A trip over capacity ends with loads above it, which
+    violated_rows reports.
+    Args:
+        data: Model data dict.
+        k: Vehicle id.
+        used: Set of the (i, j) arcs driven in the shift.
+    Returns:
+        Dict {node: m}.
+    """
+    nodes, end = data['nodes'], data['nodes'][-1]
+    demands = data['demands']
+    rows = [(i, j, demands.get(j, 0) - (0 if (i, j) in used else load_big_m(data, i, j, k)))
+            for i, j in itertools.permutations(nodes, 2) if (i, j) != (end, 0)]
+    load = {i: demands.get(i, 0) for i in nodes}
+    for _ in nodes:
+        changed = False
+        for i, j, w in rows:
+            if load[j] + w > load[i]:
+                load[i] = load[j] + w
+                changed = True
+        if not changed:
+            break
+    return load
+
+def start_values(data, solution):
+    """
+    Exact-model values of a heuristic solution.
+
+    Each route becomes the trip 0 -> customers -> end depot -> 0 that flow
+    conservation (22) describes. m takes the smallest values the load rows
+    (27-29) allow for every node of each vehicle and shift, visited or not
+    (see _loads), z = m x, and s the earliest service starts from the shift
+    start; s is not clipped at time-window ends, so a late route gives an
+    infeasible start rather than a wrong one. Unvisited customers keep
+    s = window start.
+    Args:
+        data: Model data dict (see model_data).
+        solution: Dict {route_key: [customer_id, ...]} with vehicle ids (one
+            trip in the first shift) or (vehicle_id, shift) keys, as in alns.
+    Returns:
+        Dict {variable name: value} for every x, y, m, z and s.
+    Raises:
+        ValueError: If a vehicle has two routes in the same shift.
+    """
+    nodes, end = data['nodes'], data['nodes'][-1]
+    demands, T, service = data['demands'], data['travel_times'], data['service_times']
+    trips = _trips(data, solution)
+
+    values = {var_name('x', key): 0 for key in arcs(data)}
+    for i, k, l in visits(data):
+        values[var_name('y', (i, k, l))] = 0
+        values[var_name('s', (i, k, l))] = data['time_windows'][i][0] if i in demands else 0
+    used = {(k, l): set() for k in data['vehicles'] for l in data['shifts']}
+
+    for k in data['vehicles']:
+        previous_end = 0
+        for l in data['shifts']:
+            start = max(previous_end, data['ST'][l])
+            route = trips.get((k, l), [])
+            if not route:
+                values[var_name('s', (0, k, l))] = values[var_name('s', (end, k, l))] = previous_end = start
+                continue
+
+            path = [0] + route + [end]
+            time = start
+            values[var_name('s', (0, k, l))] = start
+            for i, j in zip(path, path[1:]):
+                values[var_name('y', (i, k, l))] = 1
+                values[var_name('x', (i, j, k, l))] = 1
+                used[k, l].add((i, j))
+                if j != end:
+                    time = max(data['time_windows'][j][0], time + service[i] + T[i, j])
+                    values[var_name('s', (j, k, l))] = time
+            last = route[-1]
+            previous_end = max(time + service[last] + T[last, end], time + T[last, 0] + data['Rk'])
+            values[var_name('s', (end, k, l))] = previous_end
+            values[var_name('y', (end, k, l))] = 1
+            values[var_name('x', (end, 0, k, l))] = 1
+            used[k, l].add((end, 0))
+
+    for (k, l), trip_arcs in used.items():
+        load = _loads(data, k, trip_arcs)
+        for i in nodes:
+            values[var_name('m', (i, k, l))] = load[i]
+        for i, j in itertools.permutations(nodes, 2):
+            values[var_name('z', (i, j, k, l))] = load[i] if (i, j) in trip_arcs else 0
+    return values
+
+def objective_value(data, values):
+    """Exact-model objective of a {variable name: value} assignment."""
+    total = 0.0
+    for i, j, k, l in arcs(data):
+        x_coef, z_coef = arc_coefficients(data, i, j, k)
+        total += x_coef * values[var_name('x', (i, j, k, l))] + z_coef * values[var_name('z', (i, j, k, l))]
+    return total
+
+def violated_rows(data, values, tolerance=1e-6):
+    """
+    Constraint rows (numbered c1, c2, ... as in write_lp) that an assignment violates.
+    Args:
+        data: Model data dict.
+        values: Dict {variable name: value} covering every variable.
+        tolerance: Absolute slack allowed on each row.
+    Returns:
+        List of row numbers.
+    """
+    violated = []
+    for number, (terms, sense, rhs) in enumerate(constraints(data), 1):
+        lhs = sum(coefficient * values[name] for coefficient, name in terms)
+        if ((sense == '<=' and lhs > rhs + tolerance) or (sense == '>=' and lhs < rhs - tolerance)
+                or (sense == '=' and abs(lhs - rhs) > tolerance)):
+            violated.append(number)
+    return violated
+
+def warm_start(mdl, data, solution, cutoff=True):
+    """
+    Give a heuristic solution to the docplex model as a MIP start.
+
+    All x, y, m, z and s values are passed with the Repair effort level, so
+    CPLEX patches a start that breaks a few rows. If the start satisfies
+    every row, its objective also becomes the upper cutoff, pruning every
+    node that cannot beat it; an infeasible start gives no valid bound and
+    sets no cutoff. The heuristic's own cost is not used for the cutoff,
+    as it adds penalties.
+    Args:
+        mdl: Model from build_model(data).
+        data: Model data dict.
+        solution: Dict {route_key: [customer_id, ...]} as returned by alns.
+        cutoff: Set the upper cutoff from a feasible start.
+    Returns:
+        Tuple (objective, violated) with the start's exact objective and the
+        list of rows it violates.
+    """
+    from docplex.mp.constants import EffortLevel, WriteLevel
+
+    values = start_values(data, solution)
+    start = mdl.new_solution({mdl.get_var_by_name(name): value for name, value in values.items()})
+    mdl.add_mip_start(start, effort_level=EffortLevel.Repair, write_level=WriteLevel.AllVars)
+    objective = objective_value(data, values)
+    violated = violated_rows(data, values)
+    if cutoff and not violated:
+        # Relative slack so the start itself is not cut off by round-off
+        mdl.parameters.mip.tolerances.uppercutoff = objective + 1e-9 * max(1.0, abs(objective))
+    return objective, violated
@@ -0,0 +1,235 @@
+import numpy as np
+
+# Time-window feasibility of routes.
+#
+# A time-window segment summarises a sequence of visits as a tuple
+# (duration, time_warp, earliest, latest): the time from starting service at
+# the first visit to finishing the last one (waiting included), the total
+# lateness, and the earliest and latest service start at the first visit
+# that achieve that lateness. Lateness is measured as time warp: a visit
+# reached after its window closes is served at b_i and the excess counts as
+# violation, so one late visit does not cascade into all later ones.
+# Segments concatenate in O(1), which lets any route assembled from prefixes,
+# suffixes and single visits of existing routes be checked in constant time.
+
+# Identity of concat: the segment of an empty sequence of visits
+EMPTY_SEGMENT = (0.0, 0.0, -np.inf, np.inf)
+
+def node_segment(instance, i):
+    """Time-window segment of a single visit to node index i."""
+    return (float(instance.service_time[i]), 0.0, float(instance.ready_time[i]), float(instance.due_time[i]))
+
+def horizon_segment(horizon):
+    """Zero-length segment bounding a route to a (start, end) working horizon."""
+    return (0.0, 0.0, horizon[0], horizon[1])
+
+def concat(first, second, travel):
+    """
+    Concatenate two time-window segments.
+    Args:
+        first: Segment visited first.
+        second: Segment visited second.
+        travel: Travel time from the last visit of first to the first visit of second.
+    Returns:
+        Segment of the combined sequence.
+    """
+    duration1, warp1, earliest1, latest1 = first
+    duration2, warp2, earliest2, latest2 = second
+    delta = duration1 - warp1 + travel
+    # Conditional expressions rather than max/min: this is the innermost call of every move evaluation
+    wait = earliest2 - delta - latest1
+    if wait < 0.0:
+        wait = 0.0
+    warp = earliest1 + delta - latest2
+    if warp < 0.0:
+        warp = 0.0
+    earliest = earliest2 - delta
+    if earliest < earliest1:
+        earliest = earliest1
+    latest = latest2 - delta
+    if latest > latest1:
+        latest = latest1
+    return (duration1 + duration2 + travel + wait, warp1 + warp2 + warp, earliest - wait, latest + warp)
+
+def concat_arrays(first, second, travel):
+    """concat() for segments whose fields are broadcastable NumPy arrays."""
+    duration1, warp1, earliest1, latest1 = first
+    duration2, warp2, earliest2, latest2 = second
+    delta = duration1 - warp1 + travel
+    wait = np.maximum(earliest2 - delta - latest1, 0.0)
+    warp = np.maximum(earliest1 + delta - latest2, 0.0)
+    return (duration1 + duration2 + travel + wait,
+            warp1 + warp2 + warp,
+            np.maximum(earliest2 - delta, earliest1) - wait,
+            np.minimum(latest2 - delta, latest1) + warp)
+
+def sequence_segment(instance, nodes):
+    """Time-window segment of visiting node indices in order, folded in O(len(nodes))."""
+    segment = EMPTY_SEGMENT
+    prev = None
+    for i in nodes:
+        travel = 0.0 if prev is None else float(instance.arc_time[prev, i])
+        segment = concat(segment, node_segment(instance, i), travel)
+        prev = i
+    return segment
+
+def prefix_segments(instance, nodes):
+    """Segments of nodes[:p] for p = 0..len(nodes)."""
+    segments = [EMPTY_SEGMENT]
+    prev = None
+    for i in nodes:
+        travel = 0.0 if prev is None else float(instance.arc_time[prev, i])
+        segments.append(concat(segments[-1], node_segment(instance, i), travel))
+        prev = i
+    return segments
+
+def suffix_segments(instance, nodes):
+    """Segments of nodes[p:] for p = 0..len(nodes)."""
+    segments = [EMPTY_SEGMENT]
+    nxt = None
+    for i in reversed(nodes):
+        travel = 0.0 if nxt is None else float(instance.arc_time[i, nxt])
+        segments.append(concat(node_segment(instance, i), segments[-1], travel))
+        nxt = i
+    return segments[::-1]
+
+def trip_segment(instance, segment, first, last):
+    """
+    Segment of a trip that leaves the depot, serves segment (from node index
+    first to node index last) and returns to the depot; segment itself when
+    the instance has no depot.
+    """
+    depot = instance.depot
+    if depot is None:
+        return segment
+    visit = node_segment(instance, depot)
+    out = float(instance.arc_time[depot, first])
+    back = float(instance.arc_time[last, depot])
+    return concat(concat(visit, segment, out), visit, back)
+
+def bounded_time_warp(segment, horizon):
+    """Time warp of a route segment once it is confined to a (start, end) working horizon."""
+    bound = horizon_segment(horizon)
+    return concat(concat(bound, segment, 0.0), bound, 0.0)[1]
+
+def route_time_warp(instance, route_key, nodes):
+    """Total time-window and shift-bound lateness of a route given as node indices."""
+    if len(nodes) == 0:
+        return 0.0
+    return float(bounded_time_warp(sequence_segment(instance, nodes), instance.horizon(route_key)))
+
+def route_schedule(instance, nodes, horizon):
+    """
+    Earliest schedule of a trip and its forward time slack.
+
+    The trip leaves the depot as early as the horizon allows (or, without a
+    depot, starts as soon as the horizon and the first window allow).
+    Waiting happens when a node is reached before it opens; a node reached
+    after it closes is served at its due time (time warp). The forward time
+    slack F_p is how far the service start at position p can be pushed back
+    without making any later visit, or the return to the depot, late:
+
+        F_p = min(b_p - start_p, waiting_{p+1} + F_{p+1}),  F_n = end - (finish + t_back)
+
+    Args:
+        instance: Compiled Instance.
+        nodes: Node indices of the route's customers in visiting order.
+        horizon: (start, end) working horizon of the route.
+    Returns:
+        Tuple (arrival, start, waiting, slack) of lists, one entry per position.
+    """
+    n = len(nodes)
+    arrival, start, waiting, slack = [0.0] * n, [0.0] * n, [0.0] * n, [0.0] * n
+    a, b, service, T = instance.ready_time, instance.due_time, instance.service_time, instance.arc_time
+    depot = instance.depot
+    prev = None
+    for p, i in enumerate(nodes):
+        if prev is not None:
+            clock = start[p - 1] + service[prev] + T[prev, i]
+        elif depot is not None:
+            clock = _departure(instance, horizon) + T[depot, i]
+        else:
+            clock = max(horizon[0], a[i])
+        arrival[p] = clock
+        start[p] = min(max(clock, a[i]), b[i])
+        waiting[p] = max(a[i] - clock, 0.0)
+        prev = i
+
+    following = 0.0
+    if n:
+        following = _trip_end(instance, horizon) - (start[-1] + service[nodes[-1]] + _back(instance, nodes[-1]))
+    for p in range(n - 1, -1, -1):
+        slack[p] = min(b[nodes[p]] - start[p], following)
+        following = waiting[p] + slack[p]
+    return arrival, start, waiting, slack
+
+def insertion_feasible(instance, k, nodes, schedule, horizon, ride_time, load, node, p):
+    """
+    Whether inserting a node before position p keeps a feasible route feasible, in O(1).
+
+    The visit to node must start before its window closes, and the delay it
+    pushes onto the next visit must fit in that visit's forward time slack
+    (or, when appending, the trip must still get back to the depot within
+    its horizon). Ride time (fatigue and battery) and load are checked from
+    the route totals.
+    Args:
+        instance: Compiled Instance.
+        k: Dense vehicle index serving the route.
+        nodes: Node indices of the route's customers in visiting order; the route must have no time warp.
+        schedule: route_schedule(instance, nodes, horizon) of the route.
+        horizon: (start, end) working horizon of the route.
+        ride_time: Summed travel time of the trip's arcs, depot legs included.
+        load: Summed demand of the route's customers.
+        node: Node index to insert.
+        p: Insertion position (len(nodes) appends).
+    Returns:
+        True if the new route meets every time window, its horizon, the
+        fatigue threshold, the battery range and the capacity.
+    """
+    _, start, _, slack = schedule
+    a, b, service, T = instance.ready_time, instance.due_time, instance.service_time, instance.arc_time
+    depot = instance.depot
+    n = len(nodes)
+    # Neighbours of the new visit; the depot stands in at the ends of the trip
+    prev = nodes[p - 1] if p > 0 else depot
+    nxt = nodes[p] if p < n else depot
+    if p > 0:
+        clock = start[p - 1] + service[prev] + T[prev, node]
+    elif depot is not None:
+        clock = _departure(instance, horizon) + T[depot, node]
+    else:
+        clock = max(horizon[0], a[node])
+    if clock > b[node]:
+        return False
+    finish = max(clock, a[node]) + service[node]
+
+    if prev is not None:
+        ride_time += T[prev, node]
+    if nxt is not None:
+        ride_time += T[node, nxt]
+    if prev is not None and nxt is not None and n > 0:
+        ride_time -= T[prev, nxt]
+    if p < n:
+        if finish + T[node, nxt] - start[p] > slack[p]:
+            return False
+    elif finish + _back(instance, node) > _trip_end(instance, horizon):
+        return False
+
+    return (ride_time <= instance.fatigue_threshold[k]
+            and instance.battery_rate * ride_time <= instance.battery_range[k]
+            and load + instance.demand[node] <= instance.capacity[k])
+
+def _departure(instance, horizon):
+    """Earliest time a trip can leave the depot within the horizon."""
+    depot = instance.depot
+    return max(horizon[0], float(instance.ready_time[depot])) + float(instance.service_time[depot])
+
+def _back(instance, i):
+    """Travel time from node index i back to the depot (0 without a depot)."""
+    return 0.0 if instance.depot is None else float(instance.arc_time[i, instance.depot])
+
+def _trip_end(instance, horizon):
+    """Latest return of a trip: the horizon end, or earlier if the depot closes first."""
+    if instance.depot is None:
+        return horizon[1]
+    return min(horizon[1], float(instance.due_time[instance.depot]))
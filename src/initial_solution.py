@@ -1,3 +1,4 @@
+import heapq
 import numpy as np
 import pandas as pd
 
@@ -5,44 +6,150 @@ def calculate_overlap(a_i, b_i, E_t, L_t):
     """Calculate overlap between customer time window and shift."""
     return max(0, min(b_i, L_t) - max(a_i, E_t))
 
-def generate_initial_solution(customers, vehicles, shifts):
+def shift_candidates(a, b, E_t, L_t):
     """
-    Generate the initial solution.
+    Index customer time windows against shift intervals.
+
+    Shifts are sorted by start; with the running maximum of their ends, the
+    shifts a window [a_i, b_i] can overlap form the contiguous range
+    [lo_i, hi_i) of that order, found by binary search in O(n log m).
+    Args:
+        a, b: Arrays of time-window starts and ends.
+        E_t, L_t: Arrays of shift starts and ends.
+    Returns:
+        Tuple (order, lo, hi): the shifts sorted by start, and per-customer
+        bounds into order (shifts in the range still need an overlap check
+        only when shifts are nested).
+    """
+    order = np.argsort(E_t, kind='stable')
+    starts = E_t[order]
+    latest_end = np.maximum.accumulate(L_t[order])
+    lo = np.searchsorted(latest_end, a, side='right')
+    hi = np.searchsorted(starts, b, side='left')
+    return order, lo, hi
+
+def generate_initial_solution(customers, vehicles, shifts, travel_time_matrix=None, parameters=None):
+    """
+    Generate the initial solution with one trip per (vehicle, shift).
+
+    Every customer is matched to the shifts its time window overlaps (see
+    shift_candidates), then customers are swept in order of ready time. A
+    customer goes to its eligible shifts in order of decreasing overlap,
+    and is appended to the trip last opened in that shift if the vehicle's
+    capacity, its ride-time limit (the fatigue threshold, and the battery
+    range when parameters are given), the time window and the shift end
+    allow it, counting the leg back to the depot; otherwise the next
+    vehicle, in order of decreasing fatigue threshold, opens a trip. Customers that fit nowhere
+    go to the least-loaded trip of their best shift, leaving the violation
+    to the search. Sorting dominates, so construction is O(n log n).
     Args:
-        customers: DataFrame of customers with 'a_i', 'b_i' (time window) and demand.
-        vehicles: DataFrame of vehicles with fatigue, distance, and capacity constraints.
+        customers: DataFrame of customers with 'id', 'a_i', 'b_i' (time window),
+            'demand' and optionally 'service_time'; trips start and end at the depot (id 0).
+        vehicles: DataFrame of vehicles with 'id', 'capacity' and 'fatigue_threshold'.
         shifts: DataFrame with 'E_t' and 'L_t' (shift start and end).
+        travel_time_matrix: Optional node-by-node travel times in customers
+            row order; without it travel is taken as instantaneous.
+        parameters: Optional problem parameters; with them the battery range
+            (battery_range / (3.6 * v) hours of riding) also caps the ride time.
     Returns:
-        initial_solution: A dict containing vehicle assignments.
-        set of multi-shift customers: A list containing customers that can be assigned to multiple shifts.
+        initial_solution: A dict {(vehicle_id, shift): [customer_id, ...]} with
+            shift the 0-based row of shifts, holding every trip (empty ones too).
+        multi-shift customers: A list of the customers whose window overlaps more than one shift.
     """
-    initial_solution = {}
-    multi_shift_customers = set()
-    
+    rows = np.flatnonzero(customers['id'].to_numpy() != 0)
+    ids = customers['id'].to_numpy()[rows].tolist()
+    a = customers['a_i'].to_numpy(dtype=float)[rows]
+    b = customers['b_i'].to_numpy(dtype=float)[rows]
+    demand = customers['demand'].to_numpy(dtype=float)[rows].tolist()
+    if 'service_time' in customers.columns:
+        service = customers['service_time'].to_numpy(dtype=float)
+    else:
+        service = np.zeros(len(customers))
+    E_t = shifts['E_t'].to_numpy(dtype=float)
+    L_t = shifts['L_t'].to_numpy(dtype=float)
+    travel = None if travel_time_matrix is None else np.asarray(travel_time_matrix)  # float32 is kept, not copied
+    depot = np.flatnonzero(customers['id'].to_numpy() == 0)
+    depot = int(depot[0]) if len(depot) and travel is not None else None
+
     # Sort vehicles by fatigue threshold (Gamma function)
-    vehicles = vehicles.sort_values(by='fatigue_threshold', ascending=False)
-
-    for _, shift in shifts.iterrows():
-        E_t, L_t = shift['E_t'], shift['L_t']
-        shift_customers = []
-
-        for _, customer in customers.iterrows():
-            overlap = calculate_overlap(customer['a_i'], customer['b_i'], E_t, L_t)
-            if overlap > 0:
-                shift_customers.append(customer['id'])
-                if customers[customers['id'] == customer['id']].shape[0] > 1:
-                    multi_shift_customers.add(customer['id'])
-        
-        # Assign customers to vehicles
-        for _, vehicle in vehicles.iterrows():
-            assigned = []
-            total_demand = 0
-            for c_id in shift_customers:
-                demand = customers.loc[customers['id'] == c_id, 'demand'].values[0]
-                if total_demand + demand <= vehicle['capacity']:
-                    assigned.append(c_id)
-                    total_demand += demand
-            
-            initial_solution[vehicle['id']] = assigned
-    
-    return initial_solution, list(multi_shift_customers)
+    fleet = vehicles.sort_values(by='fatigue_threshold', ascending=False, kind='stable')
+    vehicle_ids = fleet['id'].tolist()
+    capacity = fleet['capacity'].to_numpy(dtype=float).tolist()
+    max_ride = fleet['fatigue_threshold'].to_numpy(dtype=float)
+    if parameters is not None:
+        max_ride = np.minimum(max_ride, fleet['battery_range'].to_numpy(dtype=float) / (3.6 * parameters['v']))
+    max_ride = max_ride.tolist()
+
+    initial_solution = {(vehicle_id, s): [] for s in range(len(E_t)) for vehicle_id in vehicle_ids}
+    if not ids or not vehicle_ids or not initial_solution:
+        return initial_solution, []
+
+    # Eligible shifts of each customer, largest overlap first
+    order, lo, hi = shift_candidates(a, b, E_t, L_t)
+    order, lo, hi = order.tolist(), lo.tolist(), hi.tolist()
+    # Plain lists: the sweep below indexes single elements
+    a, b, E_t, L_t, service = a.tolist(), b.tolist(), E_t.tolist(), L_t.tolist(), service.tolist()
+    eligible = []
+    multi_shift_customers = []
+    for c in range(len(ids)):
+        overlaps = [(min(b[c], L_t[s]) - max(a[c], E_t[s]), s) for s in order[lo[c]:hi[c]]]
+        options = [s for overlap, s in sorted(overlaps, key=lambda o: -o[0]) if overlap > 0]
+        if len(options) > 1:
+            multi_shift_customers.append(ids[c])
+        if not options:
+            # No overlap: the shift closest to the window
+            options = [min(range(len(E_t)), key=lambda s: max(E_t[s] - b[c], a[c] - L_t[s]))]
+        eligible.append(options)
+
+    # Per shift: the next vehicle to open a trip, the open trip as
+    # [vehicle index, load, ride time, clock, last row], and the closed trips
+    # as a heap of (load, vehicle index)
+    next_vehicle = [0] * len(E_t)
+    open_trip = [None] * len(E_t)
+    closed = [[] for _ in E_t]
+
+    def place(c, s):
+        """Append customer c to the open trip of shift s, or open the next vehicle's; True if it fits."""
+        row = int(rows[c])
+        # An open trip's ride time covers its legs so far; the leg back to the depot is checked on top
+        back = 0.0 if depot is None else float(travel[row, depot])
+        trip = open_trip[s]
+        if trip is not None:
+            v, load, ride, clock, last = trip
+            leg = 0.0 if travel is None else float(travel[last, row])
+            arrival = max(a[c], clock + service[last] + leg)
+            if (load + demand[c] <= capacity[v] and ride + leg + back <= max_ride[v]
+                    and arrival <= b[c] and arrival + service[row] + back <= L_t[s]):
+                open_trip[s] = [v, load + demand[c], ride + leg, arrival, row]
+                initial_solution[vehicle_ids[v], s].append(ids[c])
+                return True
+        # A fresh trip leaves the depot at the shift start
+        out = 0.0 if depot is None else float(travel[depot, row])
+        start = max(E_t[s] + out, a[c])
+        v = next_vehicle[s]
+        if (v == len(vehicle_ids) or demand[c] > capacity[v] or out + back > max_ride[v]
+                or start > b[c] or start + service[row] + back > L_t[s]):
+            return False
+        if trip is not None:
+            heapq.heappush(closed[s], (trip[1], trip[0]))
+        next_vehicle[s] += 1
+        open_trip[s] = [v, demand[c], out, start, row]
+        initial_solution[vehicle_ids[v], s].append(ids[c])
+        return True
+
+    for c in sorted(range(len(ids)), key=a.__getitem__):
+        if any(place(c, s) for s in eligible[c]):
+            continue
+        # Nothing fits: the least-loaded trip of the best shift takes the customer
+        s = eligible[c][0]
+        if open_trip[s] is not None:
+            heapq.heappush(closed[s], (open_trip[s][1], open_trip[s][0]))
+            open_trip[s] = None
+        if next_vehicle[s] < len(vehicle_ids):
+            heapq.heappush(closed[s], (0.0, next_vehicle[s]))
+            next_vehicle[s] += 1
+        load, v = heapq.heappop(closed[s])
+        initial_solution[vehicle_ids[v], s].append(ids[c])
+        heapq.heappush(closed[s], (load + demand[c], v))
+
+    return initial_solution, multi_shift_customers
@@ -0,0 +1,163 @@
+import numpy as np
+from src.cost_function import route_violations, violations_from_totals, penalty_cost
+from src.feasibility import concat_arrays, horizon_segment, prefix_segments, suffix_segments
+
+class InsertionMatrix:
+    """
+    Insertion costs of every pending customer at every position of every route.
+
+    For each route the matrix keeps a (pending customers x positions) block
+    of energy-plus-penalty deltas, computed in one batched NumPy pass, and
+    its per-customer minimum. After an insertion only the block of the
+    route that received the customer is recomputed.
+
+    Position p of a route with n customers means inserting before the
+    customer currently at p (p == n appends). Inserting at either end of a
+    trip replaces its depot leg, and inserting into an empty route opens a
+    trip with both depot legs.
+
+    Ride time and time warp of each candidate come from the route's prefix
+    and suffix time-window segments (see src.feasibility), so every
+    customer-position pair is scored in O(1) without simulating the route.
+
+    Positions that would make a feasible route break a constraint (the
+    batched form of RouteData.can_insert) are pruned: best_cost and
+    best_position skip them, while penalized_cost and penalized_position
+    cover every position. Routes that are already infeasible keep their
+    penalized costs. A customer pruned from every route is placed by its
+    penalized costs instead.
+
+    min_position optionally maps route keys to the first position open for
+    insertion, so a route's leading customers (e.g. stops already served)
+    stay in place.
+    """
+
+    def __init__(self, instance, solution, pending, weights, min_position=None):
+        self.instance = instance
+        self.weights = weights
+        self.min_position = min_position or {}
+        self.solution = {vehicle_id: list(route) for vehicle_id, route in solution.items()}
+        self.vehicle_ids = list(self.solution)
+        self.pending = list(dict.fromkeys(pending))
+        self.nodes = instance.indices(self.pending)
+
+        n_pending, n_routes = len(self.pending), len(self.vehicle_ids)
+        self.active = np.ones(n_pending, dtype=bool)
+        self.best_cost = np.full((n_pending, n_routes), np.inf)
+        self.best_position = np.zeros((n_pending, n_routes), dtype=np.intp)
+        self.penalized_cost = np.full((n_pending, n_routes), np.inf)
+        self.penalized_position = np.zeros((n_pending, n_routes), dtype=np.intp)
+        for r in range(n_routes):
+            self._update_route(r)
+
+    def _update_route(self, r):
+        """Recompute the insertion block of route r for all pending customers."""
+        instance = self.instance
+        vehicle_id = self.vehicle_ids[r]
+        route = self.solution[vehicle_id]
+        k = instance.vehicle_of(vehicle_id)
+        idx = instance.indices(route)
+        rows = np.flatnonzero(self.active)
+        nodes = self.nodes[rows]
+        u = nodes[:, None]
+        T = instance.arc_time
+
+        # Gap p lies between left[p] and right[p]: the depot at the ends of a trip, or nothing (-1)
+        # on instances without a depot. The arcs of the trip are the bridges of its gaps.
+        n = len(idx)
+        head = [] if instance.depot is None else [instance.depot]
+        end = np.array(head or [-1], dtype=np.intp)
+        left, right = np.concatenate((end, idx)), np.concatenate((idx, end))
+        has_left, has_right = left >= 0, right >= 0
+        bridge = has_left & has_right & (n > 0)
+        bridge_energy = np.where(bridge, instance.gather_arc_energy(k, left, right), 0.0)
+        bridge_time = np.where(bridge, T[left, right], 0.0)
+        energy = (np.where(has_left, instance.gather_arc_energy(k, left[None, :], u), 0.0)
+                  + np.where(has_right, instance.gather_arc_energy(k, u, right[None, :]), 0.0)
+                  - bridge_energy)
+        to_node = np.where(has_left, T[left[None, :], u], 0.0)
+        from_node = np.where(has_right, T[u, right[None, :]], 0.0)
+        ride = bridge_time.sum() + to_node + from_node - bridge_time
+
+        # Time warp of prefix + customer + suffix, bounded by the route's horizon
+        horizon = horizon_segment(instance.horizon(vehicle_id))
+        prefix = prefix_segments(instance, head + idx.tolist())[len(head):]
+        suffix = suffix_segments(instance, idx.tolist() + head)[:n + 1]
+        prefix = concat_arrays(horizon, _stack(prefix), 0.0)
+        suffix = concat_arrays(_stack(suffix), horizon, 0.0)
+        node = tuple(np.broadcast_to(field, u.shape) for field in
+                     (instance.service_time[u], 0.0, instance.ready_time[u], instance.due_time[u]))
+        time_warp = concat_arrays(concat_arrays(prefix, node, to_node), suffix, from_node)[1]
+
+        base_violations = route_violations(instance, vehicle_id, route)
+        base_penalty = penalty_cost(base_violations, self.weights)
+        total_demand = instance.demand[idx].sum() + instance.demand[u]
+        violations = violations_from_totals(instance, k, total_demand, ride, time_warp)
+        delta = energy + penalty_cost(violations, self.weights) - base_penalty
+        first = self.min_position.get(vehicle_id, 0)
+        if first > 0:
+            delta[:, :first] = np.inf
+
+        at = np.arange(len(rows))
+        position = np.argmin(delta, axis=1)
+        self.penalized_position[rows, r] = position
+        self.penalized_cost[rows, r] = delta[at, position]
+        if not any(base_violations):
+            feasible = np.ones(delta.shape, dtype=bool)
+            for amount in violations:
+                feasible &= np.asarray(amount) <= 0.0
+            delta = np.where(feasible, delta, np.inf)
+        position = np.argmin(delta, axis=1)
+        self.best_position[rows, r] = position
+        self.best_cost[rows, r] = delta[at, position]
+
+    def _costs(self):
+        """Insertion costs used to choose: pruned ones, or penalized ones for customers pruned everywhere."""
+        placeable = np.isfinite(self.best_cost).any(axis=1, keepdims=True)
+        return np.where(placeable, self.best_cost, self.penalized_cost)
+
+    def insert(self, c):
+        """
+        Insert pending customer c (row index) at its cheapest position and refresh that route.
+        Returns:
+            Tuple (r, position): the route index and the position it was inserted at.
+        """
+        if np.isfinite(self.best_cost[c]).any():
+            r = int(np.argmin(self.best_cost[c]))
+            position = self.best_position[c, r]
+        else:
+            r = int(np.argmin(self.penalized_cost[c]))
+            position = self.penalized_position[c, r]
+        vehicle_id = self.vehicle_ids[r]
+        self.solution[vehicle_id].insert(int(position), self.pending[c])
+        self.active[c] = False
+        self.best_cost[c] = self.penalized_cost[c] = np.inf
+        if self.active.any():
+            self._update_route(r)
+        return r, int(position)
+
+    def next_greedy(self):
+        """Row index of the pending customer with the cheapest insertion overall."""
+        return int(np.argmin(self._costs().min(axis=1)))
+
+    def next_regret(self, regret_k):
+        """
+        Row index of the pending customer with the largest regret-k value,
+        sum over h = 2..k of (c_h - c_1) where c_h is its h-th cheapest route.
+        Customers with fewer than k routes regret against the routes they have;
+        a customer pruned from all but fewer than k routes has infinite regret.
+        """
+        k = min(regret_k, len(self.vehicle_ids))
+        rows = np.flatnonzero(self.active)
+        ranked = np.sort(self._costs()[rows], axis=1)[:, :k]
+        regret = (ranked - ranked[:, :1]).sum(axis=1)
+        # Break ties in favour of the cheaper insertion
+        candidates = np.flatnonzero(regret == regret.max())
+        return int(rows[candidates[np.argmin(ranked[candidates, 0])]])
+
+    def __bool__(self):
+        return bool(self.active.any())
+
+def _stack(segments):
+    """Turn a list of time-window segments into a segment of (1, len) arrays."""
+    return tuple(np.array(field, dtype=float)[None, :] for field in zip(*segments))
@@ -0,0 +1,210 @@
+import numpy as np
+
+
+class Instance:
+    """
+    Compiled, array-backed view of a CC-HMVRP instance.
+
+    Customer and vehicle ids are mapped once to dense row indices so that the
+    cost function can evaluate a route with plain NumPy gathers instead of
+    filtering DataFrames for every arc.
+
+    The energy of arc (i, j) for vehicle k in Z(s) is split into a
+    time-proportional part and a mass-proportional part:
+
+        E_k(i, j) = arc_time[i, j] * vehicle_time_coef[k]
+                    + (vehicle_mass[k] + demand[j]) * arc_load_coef[i, j]
+
+    where vehicle_time_coef holds the metabolic, drag and bearing terms and
+    arc_load_coef holds t_ij * (g * v / 0.7) * (sin(atan e_ij) + C_RR * cos(atan e_ij)).
+
+    Solutions map route keys to routes. A key is either a vehicle id or, for
+    solutions with one trip per shift, a (vehicle_id, shift) tuple whose
+    route must fit inside that shift's [E_t, L_t] bounds.
+
+    Routes list customers only. A non-empty route is a trip that leaves the
+    depot (id 0) and returns to it, and both depot legs count in its energy,
+    ride time and schedule (see route_nodes); an empty route costs nothing.
+    Instances without a node 0 have open routes.
+    """
+
+    def __init__(self, customer_ids, vehicle_ids, demand, ready_time, due_time, service_time, arc_time,
+                 arc_grade, arc_load_coef, vehicle_time_coef, vehicle_mass, capacity, battery_range,
+                 fatigue_threshold, shift_start, shift_end, parameters):
+        self.customer_ids = customer_ids
+        self.vehicle_ids = vehicle_ids
+        self.demand = demand
+        self.ready_time = ready_time
+        self.due_time = due_time
+        self.service_time = service_time
+        self.arc_time = arc_time
+        self.arc_grade = arc_grade
+        self.arc_load_coef = arc_load_coef
+        self.vehicle_time_coef = vehicle_time_coef
+        self.vehicle_mass = vehicle_mass
+        self.capacity = capacity
+        self.battery_range = battery_range
+        self.fatigue_threshold = fatigue_threshold
+        self.shift_start = shift_start
+        self.shift_end = shift_end
+        self.parameters = parameters
+        # Kilometres of battery range used per hour of riding (battery_range is in km)
+        self.battery_rate = 3.6 * parameters['v']
+
+        self.id_to_index = np.full(int(customer_ids.max()) + 1, -1, dtype=np.intp)
+        self.id_to_index[customer_ids] = np.arange(len(customer_ids))
+        self.depot = int(self.id_to_index[0]) if self.id_to_index[0] >= 0 else None
+        self.vehicle_index = {vehicle_id: k for k, vehicle_id in enumerate(vehicle_ids.tolist())}
+        self.shift_bounds = list(zip(shift_start.tolist(), shift_end.tolist()))
+        if self.shift_bounds:
+            self.day_bounds = (min(shift_start.tolist()), max(shift_end.tolist()))
+        else:
+            self.day_bounds = (-np.inf, np.inf)
+
+    @property
+    def n_nodes(self):
+        return len(self.customer_ids)
+
+    @property
+    def n_vehicles(self):
+        return len(self.vehicle_ids)
+
+    def vehicle_of(self, route_key):
+        """Dense vehicle index serving a route key (vehicle id or (vehicle_id, shift))."""
+        if isinstance(route_key, tuple):
+            route_key = route_key[0]
+        return self.vehicle_index[route_key]
+
+    def horizon(self, route_key):
+        """
+        Working horizon (start, end) of a route key: the bounds of its shift
+        for (vehicle_id, shift) keys, otherwise the span of all shifts
+        (unbounded when the instance has no shifts).
+        """
+        if isinstance(route_key, tuple) and self.shift_bounds:
+            return self.shift_bounds[route_key[1]]
+        return self.day_bounds
+
+    def indices(self, route):
+        """Map a sequence of customer ids to dense node indices."""
+        return self.id_to_index[np.asarray(route, dtype=np.intp)]
+
+    def route_nodes(self, route):
+        """Node indices of the trip of a route: the depot, the customers and the depot again."""
+        idx = self.indices(route)
+        if len(idx) == 0 or self.depot is None:
+            return idx
+        return np.concatenate(([self.depot], idx, [self.depot]))
+
+    def gather_arc_energy(self, k, i, j):
+        """
+        Energies of arcs i -> j for vehicle index k; i and j are broadcastable node index arrays.
+        """
+        return self.arc_time[i, j] * self.vehicle_time_coef[k] + (self.vehicle_mass[k] + self.demand[j]) * self.arc_load_coef[i, j]
+
+    def arc_energy(self, vehicle_id):
+        """
+        Materialise the full arc-energy matrix E_k for one vehicle.
+        Args:
+            vehicle_id: Vehicle id or route key.
+        Returns:
+            (n_nodes, n_nodes) array of arc energies.
+        """
+        k = self.vehicle_of(vehicle_id)
+        return (self.arc_time * self.vehicle_time_coef[k]
+                + (self.vehicle_mass[k] + self.demand[None, :]) * self.arc_load_coef)
+
+
+def _frame_matrix(customers, name, prefix):
+    """Recover a node-by-node matrix stored on the customers DataFrame."""
+    if name in customers.columns:
+        return np.asarray(customers[name].iloc[0], dtype=float)
+    columns = [f'{prefix}{j}' for j in customers['id']]
+    if all(column in customers.columns for column in columns):
+        return customers[columns].to_numpy(dtype=float)
+    raise KeyError(f"customers has neither a '{name}' column nor '{prefix}<id>' columns")
+
+
+def _float_matrix(matrix):
+    """The matrix as a float32 or float64 array, without copying if it already is one."""
+    matrix = np.asarray(matrix)
+    return matrix if matrix.dtype in (np.float32, np.float64) else matrix.astype(float)
+
+def compile_instance(customers, vehicles, parameters, travel_time_matrix=None, grade_matrix=None, shifts=None):
+    """
+    Build an Instance from the customer/vehicle DataFrames and the travel-time/grade matrices.
+    Args:
+        customers: DataFrame with customer details; row order matches the matrix rows.
+            An optional 'service_time' column gives the service duration at each node.
+        vehicles: DataFrame with vehicle details (mass, rider_mass, capacity, ...).
+        parameters: Dict of problem parameters.
+        travel_time_matrix: Node-by-node travel times (float32 is kept). Read from the customers
+            'travel_time_matrix' or 'travel_time_to_<id>' columns when omitted.
+        grade_matrix: Node-by-node grades. Read from the customers
+            'grade_matrix' or 'grade_to_<id>' columns when omitted.
+        shifts: Optional DataFrame with 'E_t' and 'L_t'; shift l of a
+            (vehicle_id, l) route key is row l.
+    Returns:
+        Compiled Instance.
+    """
+    if travel_time_matrix is None:
+        travel_time_matrix = _frame_matrix(customers, 'travel_time_matrix', 'travel_time_to_')
+    if grade_matrix is None:
+        grade_matrix = _frame_matrix(customers, 'grade_matrix', 'grade_to_')
+    # float32 matrices (see src.matrix_builder) are kept as they are, halving their memory
+    arc_time = _float_matrix(travel_time_matrix)
+    arc_grade = _float_matrix(grade_matrix)
+
+    n = len(customers)
+    if arc_time.shape != (n, n) or arc_grade.shape != (n, n):
+        raise ValueError(f"travel time and grade matrices must be {n}x{n} to match customers")
+
+    g = parameters['g']
+    rho = parameters['rho']
+    C_DA = parameters['C_DA']
+    v = parameters['v']
+    B_0 = parameters['B_0']
+    B_1 = parameters['B_1']
+    C_RR = parameters['C_RR']
+    METS = parameters['METS']
+
+    theta = np.arctan(arc_grade)
+    arc_load_coef = arc_time * ((1 / 0.7) * g * v) * (np.sin(theta) + C_RR * np.cos(theta))
+
+    rider_mass = vehicles['rider_mass'].to_numpy(dtype=float)
+    metabolic_cost = 3.96 * ((69.8 * 3.5 * METS * rider_mass) / 200)
+    drag_cost = (1 / 0.7) * (0.5 * rho * C_DA * v**3)
+    bearing_cost = (1 / 0.7) * ((B_0 + B_1 * v) * v)
+
+    ready_time = customers['a_i'].to_numpy(dtype=float) if 'a_i' in customers.columns else np.zeros(n)
+    due_time = customers['b_i'].to_numpy(dtype=float) if 'b_i' in customers.columns else np.full(n, np.inf)
+    if 'service_time' in customers.columns:
+        service_time = customers['service_time'].to_numpy(dtype=float)
+    else:
+        service_time = np.zeros(n)
+
+    if shifts is None:
+        shift_start = shift_end = np.zeros(0)
+    else:
+        shift_start = shifts['E_t'].to_numpy(dtype=float)
+        shift_end = shifts['L_t'].to_numpy(dtype=float)
+
+    return Instance(
+        customer_ids=customers['id'].to_numpy(dtype=np.intp),
+        vehicle_ids=vehicles['id'].to_numpy(),
+        demand=customers['demand'].to_numpy(dtype=float),
+        ready_time=ready_time,
+        due_time=due_time,
+        service_time=service_time,
+        arc_time=arc_time,
+        arc_grade=arc_grade,
+        arc_load_coef=arc_load_coef,
+        vehicle_time_coef=metabolic_cost + drag_cost + bearing_cost,
+        vehicle_mass=vehicles['mass'].to_numpy(dtype=float) + rider_mass,
+        capacity=vehicles['capacity'].to_numpy(dtype=float),
+        battery_range=vehicles['battery_range'].to_numpy(dtype=float),
+        fatigue_threshold=vehicles['fatigue_threshold'].to_numpy(dtype=float),
+        shift_start=shift_start,
+        shift_end=shift_end,
+        parameters=dict(parameters),
+    )
@@ -0,0 +1,86 @@
+import json
+
+def operator_name(operator):
+    """Readable name of an operator, looking through functools.partial wrappers."""
+    return getattr(getattr(operator, 'func', operator), '__name__', repr(operator))
+
+class TraceCollector:
+    """
+    In-memory collector of ALNS instrumentation.
+
+    alns calls record() once per iteration, and once per local search run,
+    only when a collector is passed in. Without one the loop skips all
+    timing and bookkeeping, so the hooks cost a single None check per
+    iteration. The collector keeps the raw events plus per-operator
+    aggregates (calls, wall time, acceptance outcomes) and the best-cost
+    trajectory.
+    """
+
+    def __init__(self, keep_events=True):
+        self.keep_events = keep_events
+        self.events = []
+        self.operators = {}
+        self.trajectory = []
+        self.cache_lookups = 0
+
+    def record(self, event):
+        """
+        Record one event.
+        Args:
+            event: Dict with 'kind' ('iteration' or 'local_search'), 'iteration',
+                'best_cost', 'cache_lookups' (RouteCache lookups, hits and
+                misses) and, for iterations, 'destroy', 'repair',
+                'destroy_time', 'repair_time', 'outcome' and 'cost'.
+        """
+        if self.keep_events:
+            self.events.append(event)
+        self.cache_lookups += event.get('cache_lookups', 0)
+        if event['kind'] == 'iteration':
+            self._count(event['destroy'], event['destroy_time'], event['outcome'])
+            self._count(event['repair'], event['repair_time'], event['outcome'])
+            self.trajectory.append((event['iteration'], event['best_cost']))
+        else:
+            self._count(event['kind'], event['time'], event.get('outcome'))
+
+    def _count(self, name, elapsed, outcome):
+        stats = self.operators.setdefault(name, {'calls': 0, 'time': 0.0, 'outcomes': {}})
+        stats['calls'] += 1
+        stats['time'] += elapsed
+        if outcome is not None:
+            stats['outcomes'][outcome] = stats['outcomes'].get(outcome, 0) + 1
+
+    def summary(self):
+        """
+        Aggregated statistics.
+        Returns:
+            Dict with per-operator stats, total RouteCache lookups and the best-cost trajectory.
+        """
+        return {'operators': self.operators, 'cache_lookups': self.cache_lookups, 'trajectory': self.trajectory}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class JsonlTrace(TraceCollector):
+    """
+    Collector that also streams every event as one JSON line to a file,
+    followed by a final summary line when closed.
+    """
+
+    def __init__(self, path, keep_events=False):
+        super().__init__(keep_events=keep_events)
+        self.file = open(path, 'w')
+
+    def record(self, event):
+        super().record(event)
+        self.file.write(json.dumps(event) + '\n')
+
+    def close(self):
+        if not self.file.closed:
+            self.file.write(json.dumps({'kind': 'summary', **self.summary()}) + '\n')
+            self.file.close()
@@ -0,0 +1,178 @@
+import queue
+import random
+import time
+import numpy as np
+import multiprocessing as mp
+from src.alns import alns
+from src.instance import compile_instance
+from src.parallel import share_instance, attach_instance
+from src.route_cache import RouteCache
+
+def migration_targets(topology, n_islands):
+    """
+    Resolve a migration topology into the list of peers each island sends to.
+    Args:
+        topology: 'ring' (to the next island), 'complete' (to every other island),
+            'random' (to one random peer per migration, resolved at send time), or
+            an explicit dict {island: [peer, ...]}.
+        n_islands: Number of islands.
+    Returns:
+        List of peer lists indexed by island, or None for 'random'.
+    """
+    if isinstance(topology, dict):
+        return [list(topology.get(i, [])) for i in range(n_islands)]
+    if topology == 'ring':
+        return [[(i + 1) % n_islands] for i in range(n_islands)] if n_islands > 1 else [[]]
+    if topology == 'complete':
+        return [[j for j in range(n_islands) if j != i] for i in range(n_islands)]
+    if topology == 'random':
+        return None
+    raise ValueError(f"Unknown migration topology: {topology!r}")
+
+class Migration:
+    """
+    Non-blocking migration channel of one island.
+
+    Every exchange drains the island's own inbox without waiting and sends
+    the island's best solution and operator weights to its peers with
+    put_nowait. A full inbox means the peer is slow, so the message is dropped
+    rather than waited on.
+    """
+
+    def __init__(self, island, inboxes, targets, interval, rng):
+        self.island = island
+        self.inboxes = inboxes
+        self.targets = targets
+        self.interval = interval
+        self.rng = rng
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+
+    def exchange(self, best_solution, best_cost, destroy_weights, repair_weights):
+        """
+        Send our elite to the peers and collect the best immigrant received so far.
+        Returns:
+            Tuple (solution, cost, destroy_weights, repair_weights) or None.
+        """
+        immigrant = None
+        while True:
+            try:
+                message = self.inboxes[self.island].get_nowait()
+            except queue.Empty:
+                break
+            self.received += 1
+            if immigrant is None or message[1] < immigrant[1]:
+                immigrant = message
+
+        if self.targets is None:
+            peers = [j for j in range(len(self.inboxes)) if j != self.island]
+            peers = [self.rng.choice(peers)] if peers else []
+        else:
+            peers = self.targets
+        message = (best_solution, best_cost, list(destroy_weights), list(repair_weights))
+        for peer in peers:
+            try:
+                self.inboxes[peer].put_nowait(message)
+                self.sent += 1
+            except queue.Full:
+                self.dropped += 1
+        return immigrant
+
+def _run_island(island, handle, inboxes, targets, results, initial_solution, weights, max_iter,
+                migration_interval, seed, alns_kwargs):
+    """Process entry point: run one ALNS island and post its result."""
+    instance, blocks = attach_instance(handle)
+    cache = RouteCache(instance)
+    migration = Migration(island, inboxes, targets, migration_interval, random.Random(seed))
+    start = time.perf_counter()
+    best_solution, run = alns(initial_solution, None, None, instance.parameters, weights, max_iter=max_iter,
+                              cache=cache, seed=seed, migration=migration, return_stats=True, **alns_kwargs)
+    stats = {
+        'island': island,
+        'seed': seed,
+        'best_cost': cache.solution_cost(best_solution, weights),
+        'runtime': time.perf_counter() - start,
+        'iterations': run['iterations'],
+        'migrations_sent': migration.sent,
+        'migrations_received': migration.received,
+        'migrations_dropped': migration.dropped,
+        'cache': cache.stats(),
+    }
+    results.put((best_solution, stats))
+    # Undelivered migrants are stale once we finish; never wait on them at exit
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    for block in blocks:
+        block.close()
+
+def island_alns(initial_solution, customers, vehicles, parameters, weights, n_islands=4, max_iter=100,
+                migration_interval=10, topology='ring', inbox_size=4, seed=None, instance=None,
+                travel_time_matrix=None, grade_matrix=None, shifts=None, **alns_kwargs):
+    """
+    Cooperative island-model ALNS.
+
+    Each island runs ALNS in its own process on shared-memory instance data
+    and, every migration_interval iterations, sends its best solution and
+    destroy/repair weights to its peers. It also adopts the best immigrant
+    if that beats its own best and blends the immigrant's operator weights
+    into its own.
+    Args:
+        initial_solution: Starting solution dict shared by all islands.
+        customers: DataFrame with customer data.
+        vehicles: DataFrame with vehicle details.
+        parameters: Problem parameters.
+        weights: Penalty weights for constraints.
+        n_islands: Number of island processes.
+        max_iter: Iterations per island.
+        migration_interval: Iterations between migrations (K).
+        topology: Migration topology, see migration_targets.
+        inbox_size: Messages an island's inbox holds before further ones are dropped.
+        seed: Base seed; island seeds are derived from it with numpy's SeedSequence.
+        instance: Optional compiled Instance, reused instead of compiling the frames.
+        travel_time_matrix, grade_matrix, shifts: Compiled with the frames when no
+            instance is given (see compile_instance).
+        **alns_kwargs: Extra keyword arguments forwarded to alns.
+    Returns:
+        Tuple (best_solution, island_stats), with one stats dict per island
+        (its iterations are those actually run).
+    """
+    if instance is None:
+        instance = compile_instance(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    targets = migration_targets(topology, n_islands)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_islands)]
+
+    handle, blocks = share_instance(instance)
+    inboxes = [mp.Queue(maxsize=inbox_size) for _ in range(n_islands)]
+    results = mp.Queue()
+    processes = [
+        mp.Process(target=_run_island,
+                   args=(i, handle, inboxes, None if targets is None else targets[i], results,
+                         initial_solution, weights, max_iter, migration_interval, seeds[i], alns_kwargs))
+        for i in range(n_islands)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        # Drain results before joining so no island blocks on a full pipe
+        outcomes = []
+        while len(outcomes) < n_islands:
+            try:
+                outcomes.append(results.get(timeout=0.5))
+            except queue.Empty:
+                failed = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"ALNS island exited with code {failed[0]}")
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    outcomes.sort(key=lambda outcome: outcome[1]['island'])
+    best_solution, _ = min(outcomes, key=lambda outcome: outcome[1]['best_cost'])
+    return best_solution, [stats for _, stats in outcomes]
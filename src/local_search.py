@@ -1,73 +1,252 @@
-from copy import deepcopy
-import random
-from src.cost_function import augmented_cost_function
+import time
+from src.candidates import candidate_lists
+from src.cost_function import solution_cost
+from src.instance import compile_instance
+from src.route_data import RouteData, evaluate_pieces
 
-def local_search(solution, customers, vehicles, parameters, weights):
+# Minimum cost decrease for a move to count as improving (guards against float noise)
+IMPROVEMENT_TOLERANCE = 1e-9
+
+def local_search(solution, customers, vehicles, parameters, weights, instance=None, cache=None,
+                 granularity=None, neighbors=None, deadline=None, travel_time_matrix=None, grade_matrix=None,
+                 shifts=None):
     """
     Local search procedure with relocate, exchange, and 2-opt moves.
     Applies intra-route and inter-route relocate, inter-route exchange,
     and inter-route 2-opt. Accepts only improving moves.
+
+    Every candidate move is scored as a cost delta from the prefix
+    aggregates of the routes it touches (see RouteData), so no solution is
+    copied or fully re-evaluated; routes are only rebuilt once an
+    improving move is committed.
+
+    A relocation between two feasible routes is only scored if it keeps the
+    receiving route feasible (RouteData.can_insert, O(1)).
+
+    With granular neighbourhoods (granularity or neighbors given) a move is
+    only considered if it creates at least one arc between a customer and
+    one of its candidate neighbours, which makes a pass O(n k) instead of
+    O(n^2).
+
+    With a deadline the search stops at the first customer scanned after
+    it and returns the best solution found so far.
+    Args:
+        solution: Current solution dict.
+        customers: DataFrame with customer data.
+        vehicles: DataFrame with vehicle details.
+        parameters: Problem parameters.
+        weights: Penalty weights for constraints.
+        instance: Optional compiled Instance, reused instead of compiling the frames.
+        cache: Optional RouteCache used to cost the final solution.
+        granularity: Number k of candidate neighbours per customer; None searches all moves.
+        neighbors: Precomputed candidate_lists(instance, k), reused across calls.
+        deadline: Optional time.perf_counter() value after which the search stops.
+        travel_time_matrix, grade_matrix: Node-by-node matrices, used only without an instance
+            (see compile_instance).
+        shifts: Shifts DataFrame, used only without an instance; needed for (vehicle_id, shift) route keys.
+    Returns:
+        Tuple (best_solution, best_cost).
     """
-    best_solution = deepcopy(solution)
-    best_cost = augmented_cost_function(customers, vehicles, best_solution, parameters, weights)
+    if instance is None:
+        instance = compile_instance(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    if neighbors is None and granularity is not None:
+        neighbors = candidate_lists(instance, granularity)
+
+    if neighbors is None:
+        neighbourhoods = (_relocate, _exchange, _two_opt)
+    else:
+        neighbourhoods = (_granular_relocate, _granular_exchange, _granular_two_opt)
+
+    best_solution = {vehicle_id: list(route) for vehicle_id, route in solution.items()}
+    route_data = {vehicle_id: RouteData(instance, vehicle_id, route) for vehicle_id, route in best_solution.items()}
+    where = {}
+    for vehicle_id in route_data:
+        _locate(route_data, where, vehicle_id)
     improved = True
 
     while improved:
         improved = False
+        for neighbourhood in neighbourhoods:
+            # Scan customers in turn, committing the first improving move found for each
+            for u in list(where):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if u not in where:
+                    continue
+                move = neighbourhood(instance, route_data, weights, neighbors, where, u)
+                if move is not None:
+                    for vehicle_id, route in move.items():
+                        best_solution[vehicle_id] = route
+                        route_data[vehicle_id] = RouteData(instance, vehicle_id, route)
+                        _locate(route_data, where, vehicle_id)
+                    improved = True
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    if cache is not None:
+        return best_solution, cache.solution_cost(best_solution, weights)
+    return best_solution, solution_cost(instance, best_solution, weights)
+
+# --- Move evaluation ---
+
+def _try_relocate(instance, route_data, weights, v1, i, v2, j):
+    """
+    Move the customer at position i of v1 to position j of v2 (for v1 == v2,
+    j indexes the route with the customer removed). Returns the new routes
+    as {vehicle_id: route} if the move improves, otherwise None.
+    """
+    r1 = route_data[v1]
+    n1 = len(r1)
+    if v1 == v2:
+        if j < i:
+            pieces = ((r1, 0, j - 1), (r1, i, i), (r1, j, i - 1), (r1, i + 1, n1 - 1))
+        else:
+            pieces = ((r1, 0, i - 1), (r1, i + 1, j), (r1, i, i), (r1, j + 1, n1 - 1))
+        if evaluate_pieces(instance, v1, pieces, weights) - r1.cost(weights) < -IMPROVEMENT_TOLERANCE:
+            route = list(r1.route)
+            route.insert(j, route.pop(i))
+            return {v1: route}
+        return None
+
+    r2 = route_data[v2]
+    n2 = len(r2)
+    # Between feasible routes, skip moves that would break a constraint of the receiving route
+    if r1.feasible and r2.feasible and not r2.can_insert(r1.nodes[i], j):
+        return None
+    delta = (evaluate_pieces(instance, v1, ((r1, 0, i - 1), (r1, i + 1, n1 - 1)), weights) - r1.cost(weights)
+             + evaluate_pieces(instance, v2, ((r2, 0, j - 1), (r1, i, i), (r2, j, n2 - 1)), weights) - r2.cost(weights))
+    if delta < -IMPROVEMENT_TOLERANCE:
+        route1 = list(r1.route)
+        route2 = list(r2.route)
+        route2.insert(j, route1.pop(i))
+        return {v1: route1, v2: route2}
+    return None
+
+def _try_exchange(instance, route_data, weights, v1, i, v2, j):
+    """Swap position i of v1 with position j of v2 if that improves."""
+    r1, r2 = route_data[v1], route_data[v2]
+    n1, n2 = len(r1), len(r2)
+    new_cost = (evaluate_pieces(instance, v1, ((r1, 0, i - 1), (r2, j, j), (r1, i + 1, n1 - 1)), weights)
+                + evaluate_pieces(instance, v2, ((r2, 0, j - 1), (r1, i, i), (r2, j + 1, n2 - 1)), weights))
+    if new_cost - r1.cost(weights) - r2.cost(weights) < -IMPROVEMENT_TOLERANCE:
+        route1 = list(r1.route)
+        route2 = list(r2.route)
+        route1[i], route2[j] = route2[j], route1[i]
+        return {v1: route1, v2: route2}
+    return None
+
+def _try_two_opt(instance, route_data, weights, v1, i, v2, j):
+    """Swap the tails of v1 (from position i) and v2 (from position j) if that improves."""
+    r1, r2 = route_data[v1], route_data[v2]
+    n1, n2 = len(r1), len(r2)
+    new_cost = (evaluate_pieces(instance, v1, ((r1, 0, i - 1), (r2, j, n2 - 1)), weights)
+                + evaluate_pieces(instance, v2, ((r2, 0, j - 1), (r1, i, n1 - 1)), weights))
+    if new_cost - r1.cost(weights) - r2.cost(weights) < -IMPROVEMENT_TOLERANCE:
+        return {v1: r1.route[:i] + r2.route[j:], v2: r2.route[:j] + r1.route[i:]}
+    return None
+
+def _locate(route_data, where, vehicle_id):
+    """Record the (vehicle_id, position) of every node of one route in where."""
+    for p, node in enumerate(route_data[vehicle_id].nodes):
+        where[node] = (vehicle_id, p)
+
+# --- Full neighbourhoods ---
+# Each neighbourhood returns the first improving move involving customer u
+# (a node index), as {vehicle_id: new_route}, or None.
+
+def _relocate(instance, route_data, weights, neighbors, where, u):
+    """Intra- and inter-route relocate of u to any position."""
+    v1, i = where[u]
+    # Try intra-route reinsertion
+    for j in range(len(route_data[v1])):
+        if i != j:
+            move = _try_relocate(instance, route_data, weights, v1, i, v1, j)
+            if move is not None:
+                return move
+    # Try inter-route reinsertion
+    for v2, r2 in route_data.items():
+        if v1 != v2:
+            for j in range(len(r2) + 1):
+                move = _try_relocate(instance, route_data, weights, v1, i, v2, j)
+                if move is not None:
+                    return move
+    return None
+
+def _exchange(instance, route_data, weights, neighbors, where, u):
+    """Inter-route exchange of u with any customer of another route."""
+    v1, i = where[u]
+    for v2, r2 in route_data.items():
+        if v1 != v2:
+            for j in range(len(r2)):
+                move = _try_exchange(instance, route_data, weights, v1, i, v2, j)
+                if move is not None:
+                    return move
+    return None
+
+def _two_opt(instance, route_data, weights, neighbors, where, u):
+    """Inter-route 2-opt cutting the route of u right after u."""
+    v1, i = where[u]
+    if i + 1 >= len(route_data[v1]):
+        return None
+    for v2, r2 in route_data.items():
+        if v1 != v2 and len(r2) > 1:
+            for j in range(1, len(r2)):
+                move = _try_two_opt(instance, route_data, weights, v1, i + 1, v2, j)
+                if move is not None:
+                    return move
+    return None
+
+# --- Granular neighbourhoods ---
+
+def _granular_relocate(instance, route_data, weights, neighbors, where, u):
+    """Relocate placing u directly before or after one of its candidate neighbours."""
+    v1, i = where[u]
+    for w in neighbors[u]:
+        if w not in where:
+            continue
+        v2, p = where[w]
+        # Gaps before and after w, in original positions of v2
+        for gap in (p, p + 1):
+            if v1 == v2:
+                if gap in (i, i + 1):
+                    continue
+                j = gap if gap < i else gap - 1
+            else:
+                j = gap
+            move = _try_relocate(instance, route_data, weights, v1, i, v2, j)
+            if move is not None:
+                return move
+    return None
+
+def _granular_exchange(instance, route_data, weights, neighbors, where, u):
+    """Exchange that puts u next to one of its candidate neighbours."""
+    v1, i = where[u]
+    for w in neighbors[u]:
+        if w not in where:
+            continue
+        v2, p = where[w]
+        if v2 == v1:
+            continue
+        # Swapping u with the customer before or after w makes u adjacent to w
+        for j in (p - 1, p + 1):
+            if 0 <= j < len(route_data[v2]):
+                move = _try_exchange(instance, route_data, weights, v1, i, v2, j)
+                if move is not None:
+                    return move
+    return None
 
-        # === 1. Relocate (intra & inter) ===
-        for v1, route1 in best_solution.items():
-            for i in range(len(route1)):
-                customer = route1[i]
-                # Try intra-route reinsertion
-                for j in range(len(route1)):
-                    if i != j:
-                        new_solution = deepcopy(best_solution)
-                        new_solution[v1].remove(customer)
-                        new_solution[v1].insert(j, customer)
-                        new_cost = augmented_cost_function(customers, vehicles, new_solution, parameters, weights)
-                        if new_cost < best_cost:
-                            best_solution, best_cost = new_solution, new_cost
-                            improved = True
-                # Try inter-route reinsertion
-                for v2, route2 in best_solution.items():
-                    if v1 != v2:
-                        for j in range(len(route2) + 1):
-                            new_solution = deepcopy(best_solution)
-                            new_solution[v1].remove(customer)
-                            new_solution[v2].insert(j, customer)
-                            new_cost = augmented_cost_function(customers, vehicles, new_solution, parameters, weights)
-                            if new_cost < best_cost:
-                                best_solution, best_cost = new_solution, new_cost
-                                improved = True
-
-        # === 2. Exchange (inter-route) ===
-        for v1, route1 in best_solution.items():
-            for v2, route2 in best_solution.items():
-                if v1 < v2 and route1 and route2:
-                    for i in range(len(route1)):
-                        for j in range(len(route2)):
-                            new_solution = deepcopy(best_solution)
-                            new_solution[v1][i], new_solution[v2][j] = new_solution[v2][j], new_solution[v1][i]
-                            new_cost = augmented_cost_function(customers, vehicles, new_solution, parameters, weights)
-                            if new_cost < best_cost:
-                                best_solution, best_cost = new_solution, new_cost
-                                improved = True
-
-        # === 3. 2-opt (inter-route) ===
-        for v1, route1 in best_solution.items():
-            for v2, route2 in best_solution.items():
-                if v1 < v2 and len(route1) > 1 and len(route2) > 1:
-                    for i in range(1, len(route1)):
-                        for j in range(1, len(route2)):
-                            new_solution = deepcopy(best_solution)
-                            new_route1 = route1[:i] + route2[j:]
-                            new_route2 = route2[:j] + route1[i:]
-                            new_solution[v1] = new_route1
-                            new_solution[v2] = new_route2
-                            new_cost = augmented_cost_function(customers, vehicles, new_solution, parameters, weights)
-                            if new_cost < best_cost:
-                                best_solution, best_cost = new_solution, new_cost
-                                improved = True
-
-    return best_solution, best_cost
+def _granular_two_opt(instance, route_data, weights, neighbors, where, u):
+    """Tail swap that links u to one of its candidate neighbours."""
+    v1, i = where[u]
+    if i + 1 >= len(route_data[v1]):
+        return None
+    for w in neighbors[u]:
+        if w not in where:
+            continue
+        v2, p = where[w]
+        # Cutting after u and before w creates the arc u -> w
+        if v2 != v1 and p >= 1:
+            move = _try_two_opt(instance, route_data, weights, v1, i + 1, v2, p)
+            if move is not None:
+                return move
+    return None
@@ -0,0 +1,69 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between points given in radians; arrays broadcast."""
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+def build_matrices(latitude, longitude, elevation=None, speed_kmh=15.0, chunk_size=512, dtype=np.float32,
+                   out=None):
+    """
+    Travel-time and grade matrices from coordinates and elevations.
+
+    Rows are computed chunk_size at a time in float64 and written to the
+    float32 (by default) results, so the working memory stays at
+    O(chunk_size * n) on top of the two n x n outputs; a 10,000-node
+    instance takes 2 x 400 MB. The grade of arc (i, j) is its rise over its
+    run, (elevation[j] - elevation[i]) / distance, as used by the energy
+    model; it is 0 on the diagonal and without elevations.
+    Args:
+        latitude, longitude: Node coordinates in degrees, in customers row order.
+        elevation: Optional node elevations in metres.
+        speed_kmh: Riding speed turning distances into travel times (hours).
+        chunk_size: Matrix rows computed per NumPy pass.
+        dtype: dtype of the returned matrices.
+        out: Optional (travel_time_matrix, grade_matrix) arrays to fill, e.g.
+            memory-mapped .npy files from np.lib.format.open_memmap.
+    Returns:
+        Tuple (travel_time_matrix, grade_matrix).
+    """
+    lat = np.radians(np.asarray(latitude, dtype=float))
+    lon = np.radians(np.asarray(longitude, dtype=float))
+    height = None if elevation is None else np.asarray(elevation, dtype=float)
+    n = len(lat)
+    if out is None:
+        travel_time_matrix, grade_matrix = np.empty((n, n), dtype=dtype), np.empty((n, n), dtype=dtype)
+    else:
+        travel_time_matrix, grade_matrix = out
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        distance_km = haversine_km(lat[start:stop, None], lon[start:stop, None], lat[None, :], lon[None, :])
+        travel_time_matrix[start:stop] = distance_km / speed_kmh
+        if height is None:
+            grade_matrix[start:stop] = 0.0
+        else:
+            rise = height[None, :] - height[start:stop, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                grade_matrix[start:stop] = np.where(distance_km > 0, rise / (1000 * distance_km), 0.0)
+    return travel_time_matrix, grade_matrix
+
+def matrices_from_customers(customers, elevation=None, speed_kmh=15.0, chunk_size=512, dtype=np.float32,
+                            out=None):
+    """
+    Build the matrices for a customers DataFrame (see build_matrices).
+    Args:
+        customers: DataFrame with 'latitude', 'longitude' and optionally
+            'elevation' (metres) columns; row order gives the matrix order.
+        elevation: Optional elevation array overriding the 'elevation' column.
+        speed_kmh, chunk_size, dtype, out: As in build_matrices.
+    Returns:
+        Tuple (travel_time_matrix, grade_matrix).
+    """
+    if elevation is None and 'elevation' in customers.columns:
+        elevation = customers['elevation'].to_numpy(dtype=float)
+    return build_matrices(customers['latitude'].to_numpy(dtype=float), customers['longitude'].to_numpy(dtype=float),
+                          elevation, speed_kmh=speed_kmh, chunk_size=chunk_size, dtype=dtype, out=out)
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+import numpy as np
+
+# Default cache directory, created next to the source spreadsheet
+CACHE_DIR_NAME = '.matrix_cache'
+
+_CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+
+def _local(tag):
+    """Strip the XML namespace, so transitional and strict OOXML parse alike."""
+    return tag.rsplit('}', 1)[-1]
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+def read_xlsx_matrix(path):
+    """
+    Parse a square node-by-node matrix from the first worksheet of an xlsx file.
+
+    The sheet layout is the one of bike_travel_time_matrix.xlsx: node ids in
+    the first row and first column, values from B2 onwards. The file is read
+    with a streaming XML parser, which also handles strict OOXML workbooks
+    that openpyxl rejects.
+    Args:
+        path: Path to the .xlsx file.
+    Returns:
+        Tuple (ids, matrix) of the node ids and the float64 matrix.
+    """
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        shared_strings = []
+        if 'xl/sharedStrings.xml' in names:
+            with archive.open('xl/sharedStrings.xml') as f:
+                for _, element in ET.iterparse(f):
+                    if _local(element.tag) == 'si':
+                        shared_strings.append(''.join(t.text or '' for t in element.iter() if _local(t.tag) == 't'))
+                        element.clear()
+        sheets = sorted(name for name in names if name.startswith('xl/worksheets/sheet'))
+        if not sheets:
+            raise ValueError(f"{path} contains no worksheets")
+
+        rows, cols, values = [], [], []
+        with archive.open(sheets[0]) as f:
+            for _, element in ET.iterparse(f):
+                tag = _local(element.tag)
+                if tag == 'c':
+                    value = next((child.text for child in element if _local(child.tag) == 'v'), None)
+                    if value is not None:
+                        if element.get('t') == 's':
+                            value = shared_strings[int(value)]
+                        letters, row = _CELL_REF.fullmatch(element.get('r')).groups()
+                        rows.append(int(row) - 1)
+                        cols.append(_column_index(letters))
+                        values.append(float(value))
+                elif tag == 'row':
+                    element.clear()
+
+    rows, cols, values = np.array(rows), np.array(cols), np.array(values)
+    header = rows == 0
+    index = cols == 0
+    body = ~header & ~index
+    ids = values[header][np.argsort(cols[header])]
+    matrix = np.zeros((len(ids), len(ids)))
+    matrix[rows[body] - 1, cols[body] - 1] = values[body]
+    row_ids = values[index][np.argsort(rows[index])]
+    if len(row_ids) != len(ids) or not np.array_equal(row_ids, ids):
+        raise ValueError(f"{path} row and column node ids do not match")
+    return ids.astype(np.int64), matrix
+
+def _content_hash(path, chunk_size=2**20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+def _save_atomic(path, array):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+def load_matrix(path, cache_dir=None):
+    """
+    Load a node-by-node matrix spreadsheet through a binary .npy cache.
+
+    The first call parses the spreadsheet and writes <name>-<hash>.npy and
+    <name>-<hash>.ids.npy, where <hash> is derived from the file contents.
+    Later calls memory-map the cached matrix read-only, so the returned array
+    can be handed to compile_instance without copying. Editing the spreadsheet
+    changes the hash and triggers a fresh conversion.
+    Args:
+        path: Path to the .xlsx matrix.
+        cache_dir: Directory holding the cache (default: .matrix_cache next to path).
+    Returns:
+        Tuple (ids, matrix): the node ids and a read-only memory-mapped float64 matrix.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(cache_dir, f'{stem}-{_content_hash(path)}')
+
+    if not (os.path.exists(cached + '.npy') and os.path.exists(cached + '.ids.npy')):
+        ids, matrix = read_xlsx_matrix(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_atomic(cached + '.ids.npy', ids)
+        _save_atomic(cached + '.npy', matrix)
+
+    return np.load(cached + '.ids.npy'), np.load(cached + '.npy', mmap_mode='r')
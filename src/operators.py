@@ -1,44 +1,56 @@
 import random
 import numpy as np
+from src.insertion import InsertionMatrix
+from src.removal import removal_savings
 
 # --- Destroy Operators ---
+# Destroy operators remove customers from a Solution in place and return the
+# removed customer ids; repair operators insert them back in place. The
+# caller marks the solution beforehand and rolls back a rejected candidate.
 
-def random_removal(solution, n_remove):
+def random_removal(solution, n_remove, rng=random):
     """
-    Randomly removes n customers from the current solution.
+    Randomly removes n customers from every route of the solution.
+    rng is the random source (a random.Random instance for reproducible runs).
     """
-    destroyed_solution = solution.copy()
     removed_customers = []
-    for vehicle, customers in destroyed_solution.items():
-        to_remove = random.sample(customers, min(n_remove, len(customers)))
+    for r in range(len(solution)):
+        customers = solution.route(r)
+        to_remove = rng.sample(customers, min(n_remove, len(customers)))
         for customer in to_remove:
-            customers.remove(customer)
+            solution.remove(int(solution.instance.id_to_index[customer]))
             removed_customers.append(customer)
-    return destroyed_solution, removed_customers
+    return removed_customers
 
 
-def worst_removal(solution, cost_function, customers, vehicles, weights, n_remove):
+def worst_removal(solution, n_remove, instance, weights, rng=random, determinism=3.0):
     """
-    Removes the customers with the worst insertion cost.
+    Removes customers with the largest removal savings, randomized.
+    The savings of all customers come from one batched pass (see
+    removal_savings). Customers are ranked by saving and the one at rank
+    floor(y ** determinism * n) is removed, with y uniform in [0, 1), so
+    higher determinism favours the worst customers more strongly (None
+    always takes the worst). After each removal only the savings of the
+    route it left are recomputed.
+    rng is the random source (a random.Random instance for reproducible runs).
     """
-    customer_costs = []
-    for vehicle, assigned_customers in solution.items():
-        for customer_id in assigned_customers:
-            temp_solution = solution.copy()
-            temp_solution[vehicle].remove(customer_id)
-            cost = cost_function(temp_solution, customers, vehicles, weights)
-            customer_costs.append((customer_id, cost))
-    
-    # Sort customers by their cost impact
-    customer_costs.sort(key=lambda x: x[1], reverse=True)
-    to_remove = [customer for customer, _ in customer_costs[:n_remove]]
-    
-    destroyed_solution = solution.copy()
+    routes = solution.to_dict()
+    savings = removal_savings(instance, routes, weights)
     removed_customers = []
-    for vehicle in destroyed_solution:
-        destroyed_solution[vehicle] = [c for c in destroyed_solution[vehicle] if c not in to_remove]
-        removed_customers.extend(to_remove)
-    return destroyed_solution, removed_customers
+    for _ in range(n_remove):
+        candidates = [(saving, key, p) for key, route_savings in savings.items()
+                      for p, saving in enumerate(route_savings.tolist())]
+        if not candidates:
+            break
+        candidates.sort(key=lambda candidate: -candidate[0])
+        rank = 0 if determinism is None else int(rng.random() ** determinism * len(candidates))
+        _, key, p = candidates[rank]
+        customer = routes[key].pop(p)
+        solution.remove(int(instance.id_to_index[customer]))
+        removed_customers.append(customer)
+        savings.pop(key)
+        savings.update(removal_savings(instance, routes, weights, keys=[key]))
+    return removed_customers
 
 
 def overlap_removal(solution, customers, overlap_costs, n_remove):
@@ -48,89 +60,67 @@ def overlap_removal(solution, customers, overlap_costs, n_remove):
     customer_overlap = [(c_id, overlap_costs[c_id]) for c_id in overlap_costs]
     customer_overlap.sort(key=lambda x: x[1], reverse=True)
 
-    to_remove = [c_id for c_id, _ in customer_overlap[:n_remove]]
-    destroyed_solution = solution.copy()
+    to_remove = {c_id for c_id, _ in customer_overlap[:n_remove]}
     removed_customers = []
-    for vehicle in destroyed_solution:
-        destroyed_solution[vehicle] = [c for c in destroyed_solution[vehicle] if c not in to_remove]
-        removed_customers.extend(to_remove)
-    return destroyed_solution, removed_customers
+    for r in range(len(solution)):
+        for customer in solution.route(r):
+            if customer in to_remove:
+                solution.remove(int(solution.instance.id_to_index[customer]))
+                removed_customers.append(customer)
+    return removed_customers
 
 
-import random
-
 def worst_route_removal(solution, n_remove, cost_function):
     """
     Removes up to n_remove routes with the highest cost.
+    cost_function(vehicle_id, route) returns the cost of a single route.
     """
-    destroyed_solution = solution.copy()
-    
-    # Compute cost of each route
+    # Compute cost of each non-empty route
     route_costs = []
-    for vehicle, customers in destroyed_solution.items():
-        if customers:  # skip empty routes
-            c = cost_function(vehicle, customers)
-            route_costs.append((vehicle, c))
-    
+    for r, vehicle in enumerate(solution.keys):
+        if solution.length[r]:
+            route_costs.append((r, cost_function(vehicle, solution.route(r))))
+
     # Sort routes by descending cost (worst first)
     route_costs.sort(key=lambda x: x[1], reverse=True)
-    
-    # Select up to n_remove worst routes
-    routes_to_remove = route_costs[:min(n_remove, len(route_costs))]
-    
-    removed_routes = []
-    for vehicle, _ in routes_to_remove:
-        removed_customers = destroyed_solution[vehicle]
-        removed_routes.append((vehicle, removed_customers))
-        destroyed_solution[vehicle] = []  # clear the route
-    
-    return destroyed_solution, removed_routes
+
+    # Clear up to n_remove worst routes
+    removed_customers = []
+    for r, _ in route_costs[:min(n_remove, len(route_costs))]:
+        removed_customers.extend(solution.route(r))
+        for node in solution.nodes(r):
+            solution.remove(node)
+    return removed_customers
 
 
 # --- Repair Operators ---
 
-def greedy_insertion(solution, removed_customers, customers, vehicles):
+def _insert_all(solution, matrix, choose):
+    """Insert the matrix's pending customers in the order choose() picks, mirroring each into solution."""
+    instance = solution.instance
+    while matrix:
+        c = choose()
+        r, position = matrix.insert(c)
+        route = matrix.solution[matrix.vehicle_ids[r]]
+        prev = int(instance.id_to_index[route[position - 1]]) if position > 0 else -1
+        solution.insert(int(instance.id_to_index[route[position]]), r, prev)
+
+
+def greedy_insertion(solution, removed_customers, customers, vehicles, instance, weights):
     """
     Greedy insertion: Inserts customers into the best possible position.
+    Repeatedly inserts the removed customer with the cheapest energy-plus-penalty
+    insertion over all positions of all routes.
     """
-    for customer_id in removed_customers:
-        best_vehicle = None
-        best_cost = float('inf')
-        for vehicle_id in solution.keys():
-            vehicle_capacity = vehicles.loc[vehicles['id'] == vehicle_id, 'capacity'].values[0]
-            total_demand = sum(customers.loc[customers['id'] == c_id, 'demand'].values[0]
-                               for c_id in solution[vehicle_id])
-            if total_demand + customers.loc[customers['id'] == customer_id, 'demand'].values[0] <= vehicle_capacity:
-                cost = total_demand
-                if cost < best_cost:
-                    best_vehicle = vehicle_id
-                    best_cost = cost
-
-        if best_vehicle:
-            solution[best_vehicle].append(customer_id)
-    return solution
-
-
-def regret_insertion(solution, removed_customers, customers, vehicles, regret_k=3):
+    matrix = InsertionMatrix(instance, solution.to_dict(), removed_customers, weights)
+    _insert_all(solution, matrix, matrix.next_greedy)
+
+
+def regret_insertion(solution, removed_customers, customers, vehicles, instance, weights, regret_k=3):
     """
     Regret insertion with a lookahead strategy.
+    Repeatedly inserts the removed customer with the largest regret-k value,
+    i.e. the most to lose by not being placed in its best route now.
     """
-    for customer_id in removed_customers:
-        insertion_costs = []
-        for vehicle_id in solution.keys():
-            vehicle_capacity = vehicles.loc[vehicles['id'] == vehicle_id, 'capacity'].values[0]
-            total_demand = sum(customers.loc[customers['id'] == c_id, 'demand'].values[0]
-                               for c_id in solution[vehicle_id])
-            if total_demand + customers.loc[customers['id'] == customer_id, 'demand'].values[0] <= vehicle_capacity:
-                insertion_costs.append((vehicle_id, total_demand))
-        
-        if len(insertion_costs) >= regret_k:
-            regret_cost = sum(sorted([c[1] for c in insertion_costs])[:regret_k])
-            best_vehicle = sorted(insertion_costs, key=lambda x: x[1])[0][0]
-        elif insertion_costs:
-            best_vehicle = sorted(insertion_costs, key=lambda x: x[1])[0][0]
-        else:
-            continue
-
-        solution[best_vehicle].append(customer_id)
-    return solution
+    matrix = InsertionMatrix(instance, solution.to_dict(), removed_customers, weights)
+    _insert_all(solution, matrix, lambda: matrix.next_regret(regret_k))
@@ -0,0 +1,120 @@
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from src.alns import alns
+from src.instance import Instance, compile_instance
+from src.route_cache import RouteCache
+
+# Node-by-node matrices placed in shared memory; everything else is small and pickled
+SHARED_FIELDS = ('arc_time', 'arc_grade', 'arc_load_coef')
+INSTANCE_FIELDS = ('customer_ids', 'vehicle_ids', 'demand', 'ready_time', 'due_time', 'service_time',
+                   'arc_time', 'arc_grade', 'arc_load_coef', 'vehicle_time_coef', 'vehicle_mass', 'capacity',
+                   'battery_range', 'fatigue_threshold', 'shift_start', 'shift_end', 'parameters')
+
+def share_instance(instance):
+    """
+    Copy the matrices of an Instance into shared memory blocks.
+    Args:
+        instance: Compiled Instance.
+    Returns:
+        Tuple (handle, blocks): a picklable handle for attach_instance, and the
+        SharedMemory blocks, which the caller must close and unlink when done.
+    """
+    handle = {}
+    blocks = []
+    for field in INSTANCE_FIELDS:
+        value = getattr(instance, field)
+        if field in SHARED_FIELDS:
+            block = shared_memory.SharedMemory(create=True, size=max(value.nbytes, 1))
+            np.ndarray(value.shape, dtype=value.dtype, buffer=block.buf)[...] = value
+            blocks.append(block)
+            value = ('shm', block.name, value.shape, value.dtype.str)
+        handle[field] = value
+    return handle, blocks
+
+def attach_instance(handle):
+    """
+    Rebuild an Instance whose matrices are read-only views of shared memory.
+    Args:
+        handle: Handle returned by share_instance.
+    Returns:
+        Tuple (instance, blocks); keep the blocks referenced while the instance is in use.
+    """
+    fields = {}
+    blocks = []
+    for field, value in handle.items():
+        if field in SHARED_FIELDS:
+            _, name, shape, dtype = value
+            block = shared_memory.SharedMemory(name=name)
+            value = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            value.flags.writeable = False
+            blocks.append(block)
+        fields[field] = value
+    return Instance(**fields), blocks
+
+# Per-process state set up once by _init_worker
+_worker = {}
+
+def _init_worker(handle):
+    instance, blocks = attach_instance(handle)
+    _worker['instance'] = instance
+    _worker['blocks'] = blocks
+
+def _run_worker(initial_solution, weights, max_iter, seed, alns_kwargs):
+    """Run one seeded ALNS on the shared instance and report its statistics."""
+    instance = _worker['instance']
+    cache = RouteCache(instance)
+    start = time.perf_counter()
+    best_solution, run = alns(initial_solution, None, None, instance.parameters, weights,
+                              max_iter=max_iter, cache=cache, seed=seed, return_stats=True, **alns_kwargs)
+    stats = {
+        'seed': seed,
+        'best_cost': cache.solution_cost(best_solution, weights),
+        'runtime': time.perf_counter() - start,
+        'iterations': run['iterations'],
+        'cache': cache.stats(),
+    }
+    return best_solution, stats
+
+def parallel_alns(initial_solution, customers, vehicles, parameters, weights, n_workers=4, n_runs=None,
+                  max_iter=100, seed=None, instance=None, travel_time_matrix=None, grade_matrix=None,
+                  shifts=None, **alns_kwargs):
+    """
+    Multi-start ALNS: independent seeded runs spread over a process pool.
+    Args:
+        initial_solution: Starting solution dict shared by all runs.
+        customers: DataFrame with customer data.
+        vehicles: DataFrame with vehicle details.
+        parameters: Problem parameters.
+        weights: Penalty weights for constraints.
+        n_workers: Number of worker processes.
+        n_runs: Number of ALNS runs (defaults to n_workers).
+        max_iter: Iterations per run.
+        seed: Base seed; run seeds are derived from it with numpy's SeedSequence.
+        instance: Optional compiled Instance, reused instead of compiling the frames.
+        travel_time_matrix, grade_matrix, shifts: Compiled with the frames when no
+            instance is given (see compile_instance).
+        **alns_kwargs: Extra keyword arguments forwarded to alns.
+    Returns:
+        Tuple (best_solution, run_stats), where run_stats holds one dict per run
+        with its seed, best cost, runtime, iterations actually run and cache statistics.
+    """
+    if instance is None:
+        instance = compile_instance(customers, vehicles, parameters, travel_time_matrix, grade_matrix, shifts)
+    n_runs = n_workers if n_runs is None else n_runs
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_runs)]
+
+    handle, blocks = share_instance(instance)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(handle,)) as pool:
+            futures = [pool.submit(_run_worker, initial_solution, weights, max_iter, run_seed, alns_kwargs)
+                       for run_seed in seeds]
+            results = [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    best_solution, _ = min(results, key=lambda result: result[1]['best_cost'])
+    return best_solution, [stats for _, stats in results]
@@ -0,0 +1,92 @@
+import numpy as np
+from src.cost_function import violations_from_totals, penalty_cost
+from src.feasibility import concat_arrays, horizon_segment, prefix_segments, suffix_segments
+
+def removal_savings(instance, solution, weights, keys=None):
+    """
+    Cost saved by removing each customer from its route, for all customers at once.
+
+    All routes are laid end to end in one flat node array. Removing the
+    customer at position p drops its two arcs and adds the arc between its
+    neighbours, the depot standing in for the missing neighbour at either
+    end of a trip (removing a route's only customer drops the whole trip);
+    energy and ride time follow from gathers over the flat array, and
+    the time warp of the shortened route from concatenating the time-window
+    segments of its prefix and suffix (see src.feasibility). Every removal
+    is then costed by one violations_from_totals call.
+    Args:
+        instance: Compiled Instance.
+        solution: Dict of route key -> list of customer ids.
+        weights: Penalty weights for constraints.
+        keys: Optional route keys to score (default all).
+    Returns:
+        Dict of route key -> array of savings (old route cost minus new route
+        cost), one per position; larger is better to remove.
+    """
+    keys = [key for key in (solution if keys is None else keys) if solution[key]]
+    if not keys:
+        return {}
+    lengths = np.array([len(solution[key]) for key in keys], dtype=np.intp)
+    idx = instance.indices(np.concatenate([np.asarray(solution[key]) for key in keys]))
+    starts = np.cumsum(lengths) - lengths
+    route = np.repeat(np.arange(len(keys)), lengths)
+    k_route = np.array([instance.vehicle_of(key) for key in keys], dtype=np.intp)
+    k = k_route[route]
+    position = np.arange(len(idx)) - starts[route]
+    has_prev = position > 0
+    has_next = position < lengths[route] - 1
+    # Ends of a trip connect to the depot; without one, routes are open
+    depot = -1 if instance.depot is None else instance.depot
+    prev = np.where(has_prev, np.roll(idx, 1), depot)
+    nxt = np.where(has_next, np.roll(idx, -1), depot)
+    T = instance.arc_time
+
+    # Arcs into and out of every position, and the arc that replaces them
+    into = prev >= 0
+    out = nxt >= 0
+    into_energy = np.where(into, instance.gather_arc_energy(k, prev, idx), 0.0)
+    out_energy = np.where(out, instance.gather_arc_energy(k, idx, nxt), 0.0)
+    bridge = into & out & (lengths[route] > 1)
+    bridge_energy = np.where(bridge, instance.gather_arc_energy(k, prev, nxt), 0.0)
+    into_time = np.where(into, T[prev, idx], 0.0)
+    out_time = np.where(out, T[idx, nxt], 0.0)
+    bridge_time = np.where(bridge, T[prev, nxt], 0.0)
+
+    # Every arc of a route enters one of its positions, except the return leg out of the last
+    route_energy = np.bincount(route, weights=into_energy + np.where(has_next, 0.0, out_energy), minlength=len(keys))
+    route_ride = np.bincount(route, weights=into_time + np.where(has_next, 0.0, out_time), minlength=len(keys))
+    route_demand = np.bincount(route, weights=instance.demand[idx], minlength=len(keys))
+
+    # Segments of the visits before and after every position, each bounded by its route's horizon
+    prefixes, suffixes, full, horizons = [], [], [], []
+    head = [] if instance.depot is None else [instance.depot]
+    for key, nodes in zip(keys, np.split(idx, starts[1:])):
+        nodes = nodes.tolist()
+        n = len(nodes)
+        prefix = prefix_segments(instance, head + nodes + head)
+        prefixes.extend(prefix[len(head):len(head) + n])
+        suffixes.extend(suffix_segments(instance, nodes + head)[1:n + 1])
+        full.append(prefix[-1])
+        horizons.append(instance.horizon(key))
+    horizon = tuple(np.asarray(field, dtype=float) for field in zip(*(horizon_segment(h) for h in horizons)))
+    horizon_at = tuple(field[route] for field in horizon)
+    prefix = concat_arrays(horizon_at, _fields(prefixes), 0.0)
+    suffix = concat_arrays(_fields(suffixes), horizon_at, 0.0)
+    time_warp = concat_arrays(prefix, suffix, bridge_time)[1]
+    route_warp = concat_arrays(concat_arrays(horizon, _fields(full), 0.0), horizon, 0.0)[1]
+
+    old_cost = route_energy + penalty_cost(
+        violations_from_totals(instance, k_route, route_demand, route_ride, route_warp), weights)
+    new_energy = route_energy[route] - into_energy - out_energy + bridge_energy
+    new_ride = route_ride[route] - into_time - out_time + bridge_time
+    new_demand = route_demand[route] - instance.demand[idx]
+    new_cost = new_energy + penalty_cost(
+        violations_from_totals(instance, k, new_demand, new_ride, time_warp), weights)
+    # Emptying a route removes the whole trip
+    new_cost = np.where(lengths[route] > 1, new_cost, 0.0)
+    savings = old_cost[route] - new_cost
+    return dict(zip(keys, np.split(savings, starts[1:])))
+
+def _fields(segments):
+    """Turn a list of time-window segments into a segment of flat arrays."""
+    return tuple(np.array(field, dtype=float) for field in zip(*segments))
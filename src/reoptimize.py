@@ -0,0 +1,183 @@
+import random
+import time
+import numpy as np
+from src.acceptance import HillClimbing
+from src.insertion import InsertionMatrix
+from src.route_cache import RouteCache
+
+def nearest_nodes(instance, nodes, k):
+    """
+    The k nodes closest to each of the given nodes, by min(t_ij, t_ji).
+
+    Only the rows of the given nodes are read, so this costs O(len(nodes) * n)
+    instead of building candidate lists for the whole instance.
+    Args:
+        instance: Compiled Instance.
+        nodes: Node indices.
+        k: Neighbours per node.
+    Returns:
+        Set of node indices.
+    """
+    nodes = np.asarray(nodes, dtype=np.intp)
+    k = min(k, instance.n_nodes - 1)
+    if len(nodes) == 0 or k <= 0:
+        return set()
+    dist = np.minimum(instance.arc_time[nodes], instance.arc_time[:, nodes].T)
+    dist[np.arange(len(nodes)), nodes] = np.inf
+    # Keep the depot (id 0) out: it is never a stop on a route
+    if instance.id_to_index[0] >= 0:
+        dist[:, instance.id_to_index[0]] = np.inf
+    return set(np.argpartition(dist, k - 1, axis=1)[:, :k].ravel().tolist())
+
+def affected_routes(instance, solution, new_customers, cancelled, locked, granularity=10):
+    """
+    Route keys touched by a batch of order changes.
+
+    These are the routes that lost a cancelled customer, the routes holding
+    one of the granularity nearest customers of a new or cancelled one, and
+    the empty routes whose horizon overlaps a new customer's time window.
+    Args:
+        instance: Compiled Instance.
+        solution: Route key -> list of customer ids, cancellations already removed.
+        new_customers: Ids of the new customers.
+        cancelled: Dict of cancelled customer id -> route key it was removed from.
+        locked: Dict of route key -> number of leading stops that may not move.
+        granularity: Nearest customers looked at per changed customer.
+    Returns:
+        List of route keys, in solution order.
+    """
+    route_of = {}
+    for key, route in solution.items():
+        for customer_id in route[locked.get(key, 0):]:
+            route_of[customer_id] = key
+    changed = instance.indices(list(new_customers) + list(cancelled))
+    keys = set(cancelled.values())
+    for node in nearest_nodes(instance, changed, granularity):
+        key = route_of.get(int(instance.customer_ids[node]))
+        if key is not None:
+            keys.add(key)
+
+    windows = [(instance.ready_time[node], instance.due_time[node]) for node in instance.indices(new_customers)]
+    for key, route in solution.items():
+        if key not in keys and not route:
+            start, end = instance.horizon(key)
+            if any(a <= end and b >= start for a, b in windows):
+                keys.add(key)
+    return [key for key in solution if key in keys]
+
+def reoptimize(solution, instance, weights, new_customers=(), cancelled=(), executed=None, time_budget=0.2,
+               max_iter=None, n_remove=3, granularity=10, cache=None, seed=None, acceptance=None):
+    """
+    Fold same-day order changes into a committed solution within a latency budget.
+
+    Cancelled customers are dropped from their routes and new customers are
+    inserted at their cheapest positions (regret insertion), then a short
+    destroy/repair burst improves only the affected routes (see
+    affected_routes) until time_budget seconds have passed or max_iter
+    iterations have run. Every other route is returned unchanged.
+
+    The first executed[key] stops of each route have been served or are
+    under way: they are never removed or reordered, and nothing is inserted
+    in front of them. Route costs go through the RouteCache, so a cache kept
+    across calls makes unchanged routes free to evaluate. The instance must
+    include the new customers (compile it over all the day's locations, or
+    recompile it when orders arrive with a fresh cache).
+    Args:
+        solution: Committed solution dict of route key -> list of customer ids.
+        instance: Compiled Instance covering every customer in solution and new_customers.
+        weights: Penalty weights for constraints.
+        new_customers: Ids of customers to insert.
+        cancelled: Ids of customers to drop; they may not be in an executed prefix.
+        executed: Dict of route key -> number of leading stops already executed.
+        time_budget: Wall-clock budget in seconds, including the initial insertion.
+        max_iter: Optional limit on burst iterations.
+        n_remove: Customers removed per burst iteration.
+        granularity: Nearest customers looked at per changed customer.
+        cache: Optional RouteCache of the same instance, reused across calls.
+        seed: Seed of the burst's random generator.
+        acceptance: Acceptance criterion called as acceptance(candidate_cost,
+            current_cost, best_cost, rng) (default HillClimbing).
+    Returns:
+        Tuple (solution, stats), where stats holds the affected routes, the
+        number of iterations, the cost of the affected routes after the
+        insertion and at the end, and the elapsed time.
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    rng = random.Random(seed)
+    if cache is None:
+        cache = RouteCache(instance)
+    if acceptance is None:
+        acceptance = HillClimbing()
+    locked = {key: count for key, count in (executed or {}).items() if count > 0}
+
+    result = {key: list(route) for key, route in solution.items()}
+    removed_from = {}
+    cancelled = set(cancelled)
+    for key, route in result.items():
+        hits = [p for p, customer_id in enumerate(route) if customer_id in cancelled]
+        if not hits:
+            continue
+        if hits[0] < locked.get(key, 0):
+            raise ValueError(f"Customer {route[hits[0]]} of route {key} is already executed")
+        for customer_id in route[hits[0]:]:
+            if customer_id in cancelled:
+                removed_from[customer_id] = key
+        result[key] = [customer_id for customer_id in route if customer_id not in cancelled]
+
+    new_customers = [c for c in dict.fromkeys(new_customers) if c not in cancelled]
+    keys = affected_routes(instance, result, new_customers, removed_from, locked, granularity)
+    if new_customers and not keys:
+        keys = list(result)
+    current = {key: result[key] for key in keys}
+    if new_customers:
+        matrix = InsertionMatrix(instance, current, new_customers, weights, min_position=locked)
+        while matrix:
+            matrix.insert(matrix.next_regret(3))
+        current = matrix.solution
+    current_cost = inserted_cost = cache.solution_cost(current, weights)
+    best, best_cost = current, current_cost
+
+    # Destroy/repair burst. Each iteration removes a movable customer and some of
+    # its nearest movable customers, and reinserts them into the routes around
+    # them only, so an iteration costs a few route evaluations however many
+    # routes are affected.
+    iterations = 0
+    while time.perf_counter() < deadline and (max_iter is None or iterations < max_iter):
+        route_of = {customer_id: key for key in keys for customer_id in current[key][locked.get(key, 0):]}
+        if not route_of:
+            break
+        seed_customer = rng.choice(list(route_of))
+        nearby = [int(instance.customer_ids[node])
+                  for node in nearest_nodes(instance, instance.indices([seed_customer]), granularity)]
+        related = [c for c in nearby if c in route_of]
+        removed = [seed_customer] + rng.sample(related, min(n_remove - 1, len(related)))
+        region = {route_of[c] for c in removed}
+        region.update(key for key in (route_of.get(c) for c in nearby) if key is not None)
+
+        destroyed = {key: [c for c in current[key] if c not in removed] for key in keys if key in region}
+        matrix = InsertionMatrix(instance, destroyed, removed, weights, min_position=locked)
+        regret = rng.random() < 0.5
+        while matrix:
+            matrix.insert(matrix.next_regret(3) if regret else matrix.next_greedy())
+        candidate = dict(current)
+        candidate.update(matrix.solution)
+        candidate_cost = current_cost + (cache.solution_cost(matrix.solution, weights)
+                                         - cache.solution_cost({key: current[key] for key in destroyed}, weights))
+
+        if candidate_cost < best_cost:
+            best, best_cost = candidate, candidate_cost
+            current, current_cost = candidate, candidate_cost
+        elif acceptance(candidate_cost, current_cost, best_cost, rng):
+            current, current_cost = candidate, candidate_cost
+        iterations += 1
+
+    result.update(best)
+    stats = {
+        'affected_routes': keys,
+        'iterations': iterations,
+        'inserted_cost': inserted_cost,
+        'final_cost': cache.solution_cost(best, weights),
+        'elapsed': time.perf_counter() - start,
+    }
+    return result, stats
@@ -0,0 +1,84 @@
+import sys
+from collections import OrderedDict
+from src.cost_function import evaluate_route, evaluation_cost
+
+# Approximate bytes held per cache entry besides the key tuple
+# (OrderedDict slot and link, RouteEvaluation and its five floats)
+ENTRY_OVERHEAD = 360
+
+class RouteCache:
+    """
+    Memoized route evaluations keyed by (vehicle_id, tuple(route)).
+
+    Entries hold the energy and the unweighted violation of each penalty
+    term, so one cache stays valid when the penalty weights change. The
+    cache is bounded by an approximate memory budget and evicts the least
+    recently used routes first.
+    """
+
+    def __init__(self, instance, max_bytes=64 * 2**20):
+        self.instance = instance
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def evaluate(self, vehicle_id, route):
+        """
+        Evaluation of a route, computed on a miss and memoized.
+        Args:
+            vehicle_id: Vehicle serving the route.
+            route: Sequence of customer ids.
+        Returns:
+            RouteEvaluation of the route.
+        """
+        key = (vehicle_id, tuple(route))
+        evaluation = self._entries.get(key)
+        if evaluation is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return evaluation
+
+        self.misses += 1
+        evaluation = evaluate_route(self.instance, vehicle_id, route)
+        self._entries[key] = evaluation
+        self.bytes += sys.getsizeof(key[1]) + ENTRY_OVERHEAD
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            (_, old_route), _ = self._entries.popitem(last=False)
+            self.bytes -= sys.getsizeof(old_route) + ENTRY_OVERHEAD
+            self.evictions += 1
+        return evaluation
+
+    def route_cost(self, vehicle_id, route, weights):
+        """Augmented cost of a single route."""
+        return evaluation_cost(self.evaluate(vehicle_id, route), weights)
+
+    def solution_cost(self, solution, weights):
+        """Augmented cost f(s) of a solution as the sum of its cached route costs."""
+        return sum(self.route_cost(vehicle_id, route, weights) for vehicle_id, route in solution.items())
+
+    def clear(self):
+        """Drop all entries and reset the statistics."""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = self.bytes = 0
+
+    def stats(self):
+        """
+        Hit/miss statistics.
+        Returns:
+            Dict with hits, misses, evictions, entries, bytes and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,155 @@
+import numpy as np
+from src.cost_function import violations_from_totals, penalty_cost
+from src.feasibility import (EMPTY_SEGMENT, bounded_time_warp, concat, insertion_feasible, node_segment,
+                             prefix_segments, route_schedule, sequence_segment, suffix_segments, trip_segment)
+
+class RouteData:
+    """
+    Prefix aggregates of one route, used to score moves without re-evaluating it.
+
+    For node positions a <= b, the sums over the arcs between them are
+    cum_x[b] - cum_x[a] (arc time, arc load coefficient and demand-weighted
+    load coefficient), and the sums over the nodes themselves are
+    cum_x[b + 1] - cum_x[a] (demand). Suffix aggregates follow as the route
+    total minus the prefix. Together these give the energy of any segment
+    under any vehicle in O(1):
+
+        c_k * sum(t) + M_k * sum(S) + sum(d_j * S)
+
+    The route also keeps the time-window segment of every prefix and suffix
+    (see src.feasibility), so the time warp of a route assembled from them
+    is known in O(1) as well.
+
+    The aggregates cover the customers only; the depot legs of a trip depend
+    on its first and last customer and are added by energy, violations and
+    evaluate_pieces.
+    """
+
+    def __init__(self, instance, vehicle_id, route):
+        self.instance = instance
+        self.vehicle_id = vehicle_id
+        self.k = instance.vehicle_of(vehicle_id)
+        self.horizon = instance.horizon(vehicle_id)
+        self.route = list(route)
+
+        idx = instance.indices(self.route)
+        self.nodes = idx.tolist()
+        i, j = idx[:-1], idx[1:]
+        arc_time = instance.arc_time[i, j]
+        arc_load = instance.arc_load_coef[i, j]
+        self.cum_time = _prefix(arc_time)
+        self.cum_load = _prefix(arc_load)
+        self.cum_dload = _prefix(instance.demand[j] * arc_load)
+        self.cum_demand = _prefix(instance.demand[idx])
+        self.prefix = prefix_segments(instance, self.nodes)
+        self.suffix = suffix_segments(instance, self.nodes)
+
+        self._schedule = None
+        if self.nodes:
+            first, last = self.nodes[0], self.nodes[-1]
+            leg_time, leg_energy = depot_legs(instance, self.k, first, last)
+            self.energy = self.segment_energy(self.k, 0, len(self.nodes) - 1) + leg_energy
+            self.ride_time = self.cum_time[-1] + leg_time
+            time_warp = bounded_time_warp(trip_segment(instance, self.prefix[-1], first, last), self.horizon)
+        else:
+            self.energy = self.ride_time = time_warp = 0.0
+        self.violations = violations_from_totals(instance, self.k, self.cum_demand[-1], self.ride_time, time_warp)
+        self.feasible = not any(self.violations)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def segment_energy(self, k, a, b):
+        """Energy of the arcs between positions a and b when driven by vehicle index k."""
+        if b <= a:
+            return 0.0
+        return (self.instance.vehicle_time_coef[k] * (self.cum_time[b] - self.cum_time[a])
+                + self.instance.vehicle_mass[k] * (self.cum_load[b] - self.cum_load[a])
+                + (self.cum_dload[b] - self.cum_dload[a]))
+
+    def segment(self, a, b):
+        """Time-window segment of positions a..b; O(1) for prefixes, suffixes and single visits."""
+        if a == 0:
+            return self.prefix[b + 1]
+        if b == len(self.nodes) - 1:
+            return self.suffix[a]
+        if a == b:
+            return node_segment(self.instance, self.nodes[a])
+        return sequence_segment(self.instance, self.nodes[a:b + 1])
+
+    def cost(self, weights):
+        """Augmented cost of the route."""
+        return self.energy + penalty_cost(self.violations, weights)
+
+    @property
+    def schedule(self):
+        """route_schedule of the route (arrival, start, waiting, slack), built on first use."""
+        if self._schedule is None:
+            self._schedule = route_schedule(self.instance, self.nodes, self.horizon)
+        return self._schedule
+
+    def can_insert(self, node, p):
+        """Whether inserting node index node before position p keeps this feasible route feasible, in O(1)."""
+        return insertion_feasible(self.instance, self.k, self.nodes, self.schedule, self.horizon,
+                                  self.ride_time, self.cum_demand[-1], node, p)
+
+def _prefix(values):
+    """Cumulative sums with a leading zero, as a list for fast scalar access."""
+    return np.concatenate(([0.0], np.cumsum(values))).tolist()
+
+def depot_legs(instance, k, first, last):
+    """
+    Travel time and energy (for vehicle index k) of the depot legs of a trip
+    whose first and last customers are node indices first and last.
+    """
+    depot = instance.depot
+    if depot is None:
+        return 0.0, 0.0
+    time = float(instance.arc_time[depot, first] + instance.arc_time[last, depot])
+    energy = float(instance.gather_arc_energy(k, depot, first) + instance.gather_arc_energy(k, last, depot))
+    return time, energy
+
+def evaluate_pieces(instance, vehicle_id, pieces, weights):
+    """
+    Augmented cost of a route assembled from segments of existing routes.
+    Args:
+        instance: Compiled Instance.
+        vehicle_id: Vehicle that would serve the assembled route.
+        pieces: Sequence of (RouteData, a, b) giving inclusive position ranges
+            concatenated in order; ranges with a > b are skipped.
+        weights: Penalty weights for constraints.
+    Returns:
+        Augmented cost of the assembled trip, depot legs included, in
+        O(len(pieces)) when every piece is a prefix, a suffix or a single
+        visit of its route. An empty assembly costs 0.
+    """
+    k = instance.vehicle_of(vehicle_id)
+    time = load = dload = demand = 0.0
+    segment = EMPTY_SEGMENT
+    prev = None
+    for data, a, b in pieces:
+        if a > b:
+            continue
+        first = data.nodes[a]
+        travel = 0.0
+        if prev is None:
+            first_node = first
+        else:
+            arc_load = instance.arc_load_coef[prev, first]
+            travel = float(instance.arc_time[prev, first])
+            time += travel
+            load += arc_load
+            dload += instance.demand[first] * arc_load
+        segment = concat(segment, data.segment(a, b), travel)
+        time += data.cum_time[b] - data.cum_time[a]
+        load += data.cum_load[b] - data.cum_load[a]
+        dload += data.cum_dload[b] - data.cum_dload[a]
+        demand += data.cum_demand[b + 1] - data.cum_demand[a]
+        prev = data.nodes[b]
+
+    if prev is None:
+        return 0.0
+    leg_time, leg_energy = depot_legs(instance, k, first_node, prev)
+    energy = instance.vehicle_time_coef[k] * time + instance.vehicle_mass[k] * load + dload + leg_energy
+    time_warp = bounded_time_warp(trip_segment(instance, segment, first_node, prev), instance.horizon(vehicle_id))
+    return float(energy) + penalty_cost(violations_from_totals(instance, k, demand, time + leg_time, time_warp), weights)
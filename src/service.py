@@ -0,0 +1,455 @@
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from src.alns import alns
+from src.initial_solution import generate_initial_solution
+from src.instance import compile_instance
+from src.instrumentation import TraceCollector
+from src.matrix_store import load_matrix
+from src.route_cache import RouteCache
+
+# Local solve service.
+#
+# A long-lived asyncio server speaking JSON-RPC 2.0 over newline-delimited
+# JSON on a localhost TCP socket. Jobs are queued onto a warm process pool;
+# each worker keeps its compiled instances and route caches between jobs,
+# so requests that share matrices skip the compile step.
+#
+# Methods (params in brackets):
+#   submit [instance spec, see solve_spec]  -> {"job": id}
+#   status [job]                            -> job summary
+#   result [job]                            -> waits for the job, returns its result
+#   watch  [job]                            -> streams "progress" notifications, then the result
+#   cancel [job]                            -> job summary
+
+# Compiled instances and attached matrices each worker keeps, least recently used evicted first
+WORKER_INSTANCE_SLOTS = 8
+WORKER_MATRIX_SLOTS = 16
+
+# Finished jobs the service keeps for status/result queries: for at most
+# JOB_TTL seconds, and never more than MAX_FINISHED_JOBS of them
+JOB_TTL = 3600.0
+MAX_FINISHED_JOBS = 1000
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SOLVE_ERROR = -32000
+
+# --- Worker side ---
+
+_worker = {}
+
+def init_worker(events=None):
+    """Pool initializer: empty instance and matrix caches, and the queue progress events go to."""
+    _worker['events'] = events
+    _worker['instances'] = OrderedDict()
+    _worker['matrices'] = OrderedDict()
+
+def _evict_matrices():
+    """
+    Drop the least recently used matrices beyond WORKER_MATRIX_SLOTS.
+    Compiled instances may view a shared-memory matrix without a copy, so
+    the instances built on an evicted matrix are dropped before its block
+    is closed.
+    """
+    matrices, instances = _worker['matrices'], _worker['instances']
+    while len(matrices) > WORKER_MATRIX_SLOTS:
+        key, (block, _) = matrices.popitem(last=False)
+        for instance_key in [instance_key for instance_key, (_, matrix_keys) in instances.items()
+                             if key in matrix_keys]:
+            del instances[instance_key]
+        if block is not None:
+            block.close()
+
+def _matrix(spec, name):
+    """
+    Matrix of a spec and a key identifying it. The matrix is given inline as
+    '<name>', as a shared-memory handle ('shm', block, shape, dtype) under
+    '<name>', or as a spreadsheet path '<name>_path'; shared and spreadsheet
+    matrices are attached or loaded once per worker (see _evict_matrices).
+    """
+    matrices = _worker['matrices']
+    path = spec.get(f'{name}_path')
+    value = spec.get(name)
+    if path is not None:
+        key = path
+        if key not in matrices:
+            matrices[key] = (None, load_matrix(path)[1])
+    elif isinstance(value, tuple) and value[0] == 'shm':
+        _, key, shape, dtype = value
+        if key not in matrices:
+            block = shared_memory.SharedMemory(name=key)
+            matrix = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            matrix.flags.writeable = False
+            matrices[key] = (block, matrix)
+    elif value is None:
+        return None, None
+    else:
+        matrix = np.asarray(value, dtype=float)
+        return hashlib.sha256(matrix.tobytes()).hexdigest(), matrix
+    matrices.move_to_end(key)
+    matrix = matrices[key][1]
+    _evict_matrices()
+    return key, matrix
+
+def _matrix_rows(spec, customers):
+    """
+    Matrix row of each customer row when the spec's matrices cover more nodes
+    than its customers ('matrix_ids' lists the node id of every matrix row),
+    or None when the matrices match the customers row for row.
+    """
+    matrix_ids = spec.get('matrix_ids')
+    if matrix_ids is None:
+        return None
+    row_of = {int(node_id): row for row, node_id in enumerate(matrix_ids)}
+    missing = [int(node_id) for node_id in customers['id'] if int(node_id) not in row_of]
+    if missing:
+        raise ValueError(f"Nodes {missing} are not in matrix_ids")
+    return np.array([row_of[int(node_id)] for node_id in customers['id']], dtype=np.intp)
+
+def _spec_key(spec, matrix_keys):
+    """Digest identifying the compiled instance of a spec."""
+    matrix_ids = spec.get('matrix_ids')
+    if matrix_ids is not None:
+        matrix_ids = [int(node_id) for node_id in matrix_ids]
+    digest = hashlib.sha256()
+    digest.update(json.dumps([spec['customers'], spec['vehicles'], spec['shifts'], spec['parameters'],
+                              matrix_keys, matrix_ids], sort_keys=True, default=float).encode())
+    return digest.hexdigest()
+
+def worker_instance(spec):
+    """
+    Compiled instance and route cache of a spec, reused while the worker holds them.
+    Returns:
+        Tuple (customers, vehicles, shifts, instance, cache).
+    """
+    customers = pd.DataFrame(spec['customers'])
+    vehicles = pd.DataFrame(spec['vehicles'])
+    shifts = pd.DataFrame(spec['shifts'])
+    (time_key, travel_time_matrix), (grade_key, grade_matrix) = (_matrix(spec, 'travel_time_matrix'),
+                                                                 _matrix(spec, 'grade_matrix'))
+    key = _spec_key(spec, [time_key, grade_key])
+
+    instances = _worker['instances']
+    matrix_keys = (time_key, grade_key)
+    if key in instances:
+        instances.move_to_end(key)
+    else:
+        rows = _matrix_rows(spec, customers)
+        if rows is not None:
+            # Only the customers' rows and columns are copied out of the shared matrices
+            travel_time_matrix = travel_time_matrix[np.ix_(rows, rows)]
+            grade_matrix = grade_matrix[np.ix_(rows, rows)]
+        instance = compile_instance(customers, vehicles, spec['parameters'], travel_time_matrix, grade_matrix,
+                                    shifts=shifts)
+        instances[key] = (RouteCache(instance), matrix_keys)
+        while len(instances) > WORKER_INSTANCE_SLOTS:
+            instances.popitem(last=False)
+    cache = instances[key][0]
+    return customers, vehicles, shifts, cache.instance, cache
+
+class ProgressReporter(TraceCollector):
+    """Collector that posts a 'progress' event whenever a job's best cost improves."""
+
+    def __init__(self, events, job_id):
+        super().__init__(keep_events=False)
+        self.events = events
+        self.job_id = job_id
+        self.best_cost = float('inf')
+        self.start = time.perf_counter()
+        # Tell the service the job left the queue
+        events.put((job_id, None))
+
+    def record(self, event):
+        super().record(event)
+        if event['best_cost'] < self.best_cost:
+            self.best_cost = event['best_cost']
+            self.events.put((self.job_id, {
+                'iteration': event['iteration'],
+                'best_cost': float(event['best_cost']),
+                'elapsed': time.perf_counter() - self.start,
+            }))
+
+def solve_spec(job_id, spec, cancel, deadline=None):
+    """
+    Solve one instance spec in a worker process.
+    Args:
+        job_id: Job id attached to progress events.
+        spec: Dict with 'customers', 'vehicles' and 'shifts' (lists of
+            records), 'parameters', 'weights', the matrices as
+            'travel_time_matrix'/'grade_matrix' (nested lists) or
+            'travel_time_matrix_path'/'grade_matrix_path' (spreadsheets),
+            optional 'matrix_ids' (the node id of every matrix row, so a
+            subset of customers can use a larger matrix such as a depot's
+            full matrix), and optional ALNS settings 'max_iter', 'seed',
+            'granularity', 'stagnation_limit'.
+        cancel: Optional event set to stop the run early.
+        deadline: Optional time.time() by which the run must finish.
+    Returns:
+        Dict with the solution, its cost, the number of iterations run, the
+        runtime and the route cache statistics.
+    """
+    start = time.perf_counter()
+    customers, vehicles, shifts, instance, cache = worker_instance(spec)
+    weights = spec['weights']
+    initial_solution, _ = generate_initial_solution(customers, vehicles, shifts, instance.arc_time,
+                                                    spec['parameters'])
+
+    # Progress events are only posted when the pool was set up with an event queue
+    if _worker['events'] is not None:
+        reporter = ProgressReporter(_worker['events'], job_id)
+    else:
+        reporter = TraceCollector(keep_events=False)
+    time_limit = None if deadline is None else max(deadline - time.time(), 0.0)
+    best_solution = alns(initial_solution, customers, vehicles, spec['parameters'], weights,
+                         max_iter=spec.get('max_iter', 100), cache=cache, seed=spec.get('seed'),
+                         granularity=spec.get('granularity'), stagnation_limit=spec.get('stagnation_limit'),
+                         time_limit=time_limit, recorder=reporter,
+                         should_stop=None if cancel is None else cancel.is_set)
+    return {
+        'solution': [[_plain(vehicle_id), [int(c) for c in route]] for vehicle_id, route in best_solution.items()],
+        'cost': cache.solution_cost(best_solution, weights),
+        'iterations': len(reporter.trajectory),
+        'runtime': time.perf_counter() - start,
+        'cache': cache.stats(),
+    }
+
+def _plain(key):
+    """JSON-friendly form of a route key (vehicle id or (vehicle_id, shift))."""
+    return [int(part) for part in key] if isinstance(key, tuple) else int(key)
+
+# --- Service side ---
+
+class Job:
+    """State of one submitted job, as seen by the service."""
+
+    def __init__(self, job_id, cancel, deadline):
+        self.id = job_id
+        self.cancel = cancel
+        self.deadline = deadline
+        self.status = 'queued'
+        self.progress = []
+        self.result = None
+        self.error = None
+        self.future = None
+        self.finished = None
+        self.changed = asyncio.Event()
+        self.done = asyncio.Event()
+
+    def summary(self):
+        return {
+            'job': self.id,
+            'status': self.status,
+            'best_cost': self.progress[-1]['best_cost'] if self.progress else None,
+            'error': self.error,
+        }
+
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+class SolveService:
+    """
+    Asyncio job service in front of a warm ALNS process pool.
+
+    Finished jobs stay queryable for job_ttl seconds, and only the
+    max_finished_jobs most recent ones are kept; older ones are evicted
+    (and become unknown jobs) whenever a job is submitted or finishes.
+    Args:
+        n_workers: Worker processes; jobs beyond that wait in the pool's queue.
+        job_ttl: Seconds a finished job is kept.
+        max_finished_jobs: Finished jobs kept at most.
+    """
+
+    def __init__(self, n_workers=2, job_ttl=JOB_TTL, max_finished_jobs=MAX_FINISHED_JOBS):
+        self.n_workers = n_workers
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._manager = None
+        self._pool = None
+        self._events = None
+        self._pump = None
+
+    async def __aenter__(self):
+        self._manager = mp.Manager()
+        self._events = mp.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.n_workers, initializer=init_worker,
+                                         initargs=(self._events,))
+        loop = asyncio.get_running_loop()
+        self._pump = threading.Thread(target=self._pump_events, args=(loop,), daemon=True)
+        self._pump.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        for job in self.jobs.values():
+            job.cancel.set()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+        self._pump.join()
+        self._manager.shutdown()
+
+    def _pump_events(self, loop):
+        """Forward progress events from the workers to the event loop (runs in a thread)."""
+        while True:
+            message = self._events.get()
+            if message is None:
+                return
+            loop.call_soon_threadsafe(self._on_progress, *message)
+
+    def _on_progress(self, job_id, event):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.status = 'running'
+            if event is not None:
+                job.progress.append(event)
+            job.notify()
+
+    def submit(self, spec, deadline=None):
+        """
+        Queue a job.
+        Args:
+            spec: Instance spec (see solve_spec).
+            deadline: Optional seconds from now by which the job must finish,
+                time spent queued included.
+        Returns:
+            The Job.
+        """
+        self._evict_jobs()
+        job_id = next(self._ids)
+        job = Job(job_id, self._manager.Event(), None if deadline is None else time.time() + deadline)
+        self.jobs[job_id] = job
+        job.future = self._pool.submit(solve_spec, job_id, spec, job.cancel, job.deadline)
+        asyncio.ensure_future(self._finish(job))
+        return job
+
+    async def _finish(self, job):
+        try:
+            job.result = await asyncio.wrap_future(job.future)
+            job.status = 'cancelled' if job.cancel.is_set() else 'done'
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+        except Exception as error:
+            job.status = 'failed'
+            job.error = f"{type(error).__name__}: {error}"
+        job.finished = time.monotonic()
+        job.notify()
+        job.done.set()
+        self._evict_jobs()
+
+    def _evict_jobs(self):
+        """Forget finished jobs older than job_ttl, and the oldest beyond max_finished_jobs."""
+        finished = sorted((job for job in self.jobs.values() if job.finished is not None),
+                          key=lambda job: job.finished)
+        expired = time.monotonic() - self.job_ttl
+        excess = len(finished) - self.max_finished_jobs
+        for position, job in enumerate(finished):
+            if position < excess or job.finished < expired:
+                del self.jobs[job.id]
+
+    def cancel(self, job):
+        """Cancel a job: queued jobs never start, running ones stop at the next iteration."""
+        if not job.future.cancel():
+            job.cancel.set()
+
+    async def watch(self, job):
+        """Yield the job's progress events as they arrive, until it finishes."""
+        seen = 0
+        while True:
+            changed = job.changed
+            while seen < len(job.progress):
+                yield job.progress[seen]
+                seen += 1
+            if job.done.is_set():
+                return
+            await changed.wait()
+
+    # --- JSON-RPC over newline-delimited JSON ---
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """Serve JSON-RPC requests on host:port until cancelled."""
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=2**30)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+
+        async def send(message):
+            async with lock:
+                writer.write(json.dumps({'jsonrpc': '2.0', **message}).encode() + b'\n')
+                await writer.drain()
+
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.ensure_future(self._dispatch(line, send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def _dispatch(self, line, send):
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as error:
+            await send({'id': None, 'error': {'code': PARSE_ERROR, 'message': str(error)}})
+            return
+        request_id = request.get('id')
+        params = request.get('params') or {}
+        method = request.get('method')
+        try:
+            if method == 'submit':
+                job = self.submit(params['spec'], params.get('deadline'))
+                result = {'job': job.id}
+            elif method in ('status', 'result', 'watch', 'cancel'):
+                job = self.jobs.get(params.get('job'))
+                if job is None:
+                    raise KeyError(f"unknown job {params.get('job')!r}")
+                if method == 'cancel':
+                    self.cancel(job)
+                elif method == 'watch':
+                    async for event in self.watch(job):
+                        await send({'method': 'progress', 'params': {'job': job.id, **event}})
+                if method in ('result', 'watch'):
+                    await job.done.wait()
+                    if job.status == 'failed':
+                        await send({'id': request_id, 'error': {'code': SOLVE_ERROR, 'message': job.error}})
+                        return
+                    result = {**job.summary(), 'result': job.result}
+                else:
+                    result = job.summary()
+            else:
+                await send({'id': request_id, 'error': {'code': METHOD_NOT_FOUND, 'message': f"unknown method {method!r}"}})
+                return
+        except (KeyError, TypeError, ValueError) as error:
+            await send({'id': request_id, 'error': {'code': INVALID_PARAMS, 'message': str(error)}})
+            return
+        await send({'id': request_id, 'result': result})
+
+async def _main(args):
+    async with SolveService(args.workers) as service:
+        print(f"Serving on {args.host}:{args.port} with {args.workers} workers")
+        await service.serve(args.host, args.port)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local CC-HMVRP solve service (JSON-RPC over TCP).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    asyncio.run(_main(parser.parse_args()))
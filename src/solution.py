@@ -0,0 +1,157 @@
+class Solution:
+    """
+    Array-backed solution: every route is a doubly linked list over dense node indices.
+
+    succ[i] and pred[i] are the next and previous node of node i on its
+    route (-1 at the ends) and route_of[i] is the route index holding i (-1
+    if unassigned). Per route it keeps the first and last node, the length,
+    the load (summed demand) and the ride time (summed arc travel time,
+    depot legs included), all updated in O(1) by insert and remove.
+
+    Every change is appended to an undo log, so a move can be applied
+    tentatively and rolled back:
+
+        mark = solution.mark()
+        solution.remove(u); solution.insert(u, r, prev)
+        if not better:
+            solution.rollback(mark)
+        solution.commit()
+
+    Each node can be visited at most once; route keys keep their order so
+    from_dict/to_dict round-trip losslessly, empty routes included.
+    """
+
+    __slots__ = ('instance', 'keys', 'index', 'succ', 'pred', 'route_of', 'first', 'last', 'length', 'load',
+                 'ride_time', '_log')
+
+    def __init__(self, instance, keys):
+        n, r = instance.n_nodes, len(keys)
+        self.instance = instance
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.succ = [-1] * n
+        self.pred = [-1] * n
+        self.route_of = [-1] * n
+        self.first = [-1] * r
+        self.last = [-1] * r
+        self.length = [0] * r
+        self.load = [0.0] * r
+        self.ride_time = [0.0] * r
+        self._log = []
+
+    @classmethod
+    def from_dict(cls, instance, solution):
+        """
+        Build a Solution from the {route_key: [customer_id, ...]} format.
+        Raises:
+            ValueError: If a customer is visited more than once.
+        """
+        result = cls(instance, solution)
+        for r, route in enumerate(solution.values()):
+            prev = -1
+            for node in instance.indices(route).tolist():
+                if result.route_of[node] != -1:
+                    raise ValueError(f"customer {instance.customer_ids[node]} is visited more than once")
+                result.insert(node, r, prev)
+                prev = node
+        result.commit()
+        return result
+
+    def to_dict(self):
+        """The solution in the {route_key: [customer_id, ...]} format."""
+        return {key: self.route(r) for r, key in enumerate(self.keys)}
+
+    def nodes(self, r):
+        """Node indices of route r in visiting order."""
+        nodes = []
+        node = self.first[r]
+        while node != -1:
+            nodes.append(node)
+            node = self.succ[node]
+        return nodes
+
+    def route(self, r):
+        """Customer ids of route r in visiting order."""
+        return self.instance.customer_ids[self.nodes(r)].tolist()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def copy(self):
+        """Independent copy sharing only the instance; the undo log starts empty."""
+        other = Solution.__new__(Solution)
+        other.instance = self.instance
+        other.keys = self.keys
+        other.index = self.index
+        for name in ('succ', 'pred', 'route_of', 'first', 'last', 'length', 'load', 'ride_time'):
+            setattr(other, name, list(getattr(self, name)))
+        other._log = []
+        return other
+
+    def _arc(self, i, j):
+        """Travel time of arc (i, j), the depot standing in for a missing end (0 without a depot)."""
+        depot = self.instance.depot
+        i = depot if i == -1 else i
+        j = depot if j == -1 else j
+        return float(self.instance.arc_time[i, j]) if i is not None and j is not None else 0.0
+
+    def insert(self, node, r, prev):
+        """Insert an unassigned node into route r after node prev (-1 for the front)."""
+        nxt = self.first[r] if prev == -1 else self.succ[prev]
+        self.succ[node], self.pred[node], self.route_of[node] = nxt, prev, r
+        if prev == -1:
+            self.first[r] = node
+        else:
+            self.succ[prev] = node
+        if nxt == -1:
+            self.last[r] = node
+        else:
+            self.pred[nxt] = node
+        # An empty route had no depot-to-depot arc to replace
+        bridge = self._arc(prev, nxt) if self.length[r] else 0.0
+        self.length[r] += 1
+        self.load[r] += float(self.instance.demand[node])
+        self.ride_time[r] += self._arc(prev, node) + self._arc(node, nxt) - bridge
+        self._log.append(('insert', node, r))
+
+    def remove(self, node):
+        """Remove an assigned node from its route."""
+        r, prev, nxt = self.route_of[node], self.pred[node], self.succ[node]
+        if prev == -1:
+            self.first[r] = nxt
+        else:
+            self.succ[prev] = nxt
+        if nxt == -1:
+            self.last[r] = prev
+        else:
+            self.pred[nxt] = prev
+        self.succ[node] = self.pred[node] = self.route_of[node] = -1
+        self.length[r] -= 1
+        bridge = self._arc(prev, nxt) if self.length[r] else 0.0
+        self.load[r] -= float(self.instance.demand[node])
+        self.ride_time[r] -= self._arc(prev, node) + self._arc(node, nxt) - bridge
+        self._log.append(('remove', node, r, prev))
+
+    def mark(self):
+        """Position in the undo log to roll back to."""
+        return len(self._log)
+
+    def touched(self, mark):
+        """Indices of the routes changed since mark, in order of first change."""
+        return list(dict.fromkeys(entry[2] for entry in self._log[mark:]))
+
+    def rollback(self, mark):
+        """Undo every change made since mark, most recent first."""
+        while len(self._log) > mark:
+            entry = self._log.pop()
+            if entry[0] == 'insert':
+                self.remove(entry[1])
+            else:
+                _, node, r, prev = entry
+                self.insert(node, r, prev)
+            # Undoing must not log the inverse change
+            self._log.pop()
+
+    def commit(self):
+        """Accept all changes so far and clear the undo log."""
+        self._log.clear()
@@ -1,56 +1,145 @@
-import geopandas as gpd
-import matplotlib.pyplot as plt
-from shapely.geometry import LineString, Point
+import numpy as np
+import pandas as pd
 
-def visualize_routes(customers, depot, solution, shifts):
+# Line style of each shift, by 0-based shift position (cycled for more shifts)
+SHIFT_STYLES = ['solid', 'dashed', 'dotted', 'dashdot']
+
+def _depot_coordinates(depot):
+    """(longitude, latitude) of a depot given as a (latitude, longitude) tuple or a customers-style row/frame."""
+    if isinstance(depot, pd.DataFrame):
+        depot = depot.iloc[0]
+    if isinstance(depot, pd.Series):
+        return float(depot['longitude']), float(depot['latitude'])
+    return float(depot[1]), float(depot[0])
+
+def route_segments(customers, depot, solution):
+    """
+    Depot-to-depot polylines of every non-empty route, from array lookups.
+
+    All stops are gathered into one id array and mapped to customer rows
+    with a single index lookup, so the cost is linear in the number of stops
+    whatever the number of routes.
+    Args:
+        customers (DataFrame): Customers with 'id', 'latitude' and 'longitude'.
+        depot: (latitude, longitude) tuple, or the depot row of the customers frame.
+        solution (dict): Route key (vehicle id or (vehicle_id, shift)) -> list of customer ids.
+    Returns:
+        Tuple (segments, shifts): a list of (n_stops + 2, 2) longitude/latitude
+        arrays, and the 0-based shift of each route (None for plain vehicle keys).
+    """
+    keys = [key for key, route in solution.items() if len(route) > 0]
+    if not keys:
+        return [], []
+    lengths = np.array([len(solution[key]) for key in keys])
+    stops = np.concatenate([np.asarray(solution[key]) for key in keys])
+    rows = pd.Index(customers['id']).get_indexer(stops)
+    if (rows < 0).any():
+        raise KeyError(f"Unknown customer ids in solution: {sorted(set(stops[rows < 0].tolist()))}")
+
+    points = np.column_stack([customers['longitude'].to_numpy(dtype=float)[rows],
+                              customers['latitude'].to_numpy(dtype=float)[rows]])
+    depot_point = np.array([_depot_coordinates(depot)])
+    segments = [np.concatenate([depot_point, route, depot_point])
+                for route in np.split(points, np.cumsum(lengths)[:-1])]
+    shifts = [key[1] if isinstance(key, tuple) else None for key in keys]
+    return segments, shifts
+
+def _shift_label(shift, shifts):
+    """Legend label of a 0-based shift, with its hours when the shifts DataFrame is given."""
+    if shifts is None or shift >= len(shifts):
+        return f'Shift {shift + 1}'
+    row = shifts.iloc[shift]
+    return f"Shift {shift + 1} ({row['E_t']:g}-{row['L_t']:g})"
+
+def draw_routes(ax, customers, depot, solution, linewidth=1.0, title="Vehicle Routes Visualization by Shift",
+                shifts=None):
+    """
+    Draw all routes on ax at once as a single LineCollection.
+
+    Routes are coloured per route key and styled per shift; customers and
+    the depot are drawn as two scatter plots. Given the shifts, the legend
+    shows the hours of every shift, including shifts without routes.
+    Args:
+        ax: Matplotlib Axes.
+        customers (DataFrame): Customers with 'id', 'latitude' and 'longitude'.
+        depot: (latitude, longitude) tuple, or the depot row of the customers frame.
+        solution (dict): Route key -> list of customer ids.
+        linewidth: Route line width.
+        title: Plot title.
+        shifts: Optional DataFrame with 'E_t' and 'L_t', row l being shift l of the route keys.
+    """
+    from matplotlib import colormaps
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    segments, route_shifts = route_segments(customers, depot, solution)
+    if segments:
+        colors = colormaps['tab20'](np.arange(len(segments)) % 20)
+        styles = [SHIFT_STYLES[(shift or 0) % len(SHIFT_STYLES)] for shift in route_shifts]
+        ax.add_collection(LineCollection(segments, colors=colors, linestyles=styles, linewidths=linewidth))
+    legend_shifts = {shift for shift in route_shifts if shift is not None}
+    if shifts is not None:
+        legend_shifts.update(range(len(shifts)))
+    shift_handles = [Line2D([], [], color='gray', linestyle=SHIFT_STYLES[shift % len(SHIFT_STYLES)],
+                            label=_shift_label(shift, shifts))
+                     for shift in sorted(legend_shifts)]
+
+    ax.scatter(customers['longitude'], customers['latitude'], s=8, color='blue', label='Customers', zorder=2)
+    depot_x, depot_y = _depot_coordinates(depot)
+    ax.scatter([depot_x], [depot_y], s=80, color='red', marker='s', label='Depot', zorder=3)
+    ax.autoscale_view()
+    ax.set_title(title)
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.legend(handles=ax.get_legend_handles_labels()[0] + shift_handles, loc='upper right')
+
+def render_routes(customers, depot, solution, path, figsize=(10, 10), dpi=150, linewidth=1.0, shifts=None):
+    """
+    Write the routes plot to a file without a display.
+
+    The figure is drawn on its own Agg canvas, with no pyplot window or
+    global figure state, so this works headless (cron jobs, servers) and a
+    few thousand routes render in seconds.
+    Args:
+        customers (DataFrame): Customers with 'id', 'latitude' and 'longitude'.
+        depot: (latitude, longitude) tuple, or the depot row of the customers frame.
+        solution (dict): Route key -> list of customer ids.
+        path: Output file; the format (png, svg, pdf, ...) follows its extension.
+        figsize, dpi: Figure size in inches and raster resolution.
+        linewidth: Route line width.
+        shifts: Optional shifts DataFrame for the legend (see draw_routes).
+    Returns:
+        The path written.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    draw_routes(fig.add_subplot(), customers, depot, solution, linewidth=linewidth, shifts=shifts)
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def visualize_routes(customers, depot, solution, shifts=None, path=None):
     """
     Visualize the routes assigned to vehicles for different shifts.
 
+    With a path the plot is written headlessly by render_routes; without
+    one it is shown in an interactive pyplot window.
     Args:
         customers (DataFrame): DataFrame with customer locations (latitude, longitude).
-        depot (tuple): Latitude and longitude of the depot.
-        solution (dict): Dictionary with vehicle IDs, their assigned customers, and shifts.
-        shifts (list): List of shifts (e.g., [1, 2, 3]).
-    """
-    # Create GeoDataFrames for customers and depot
-    customer_points = [Point(row['longitude'], row['latitude']) for _, row in customers.iterrows()]
-    customer_gdf = gpd.GeoDataFrame(customers, geometry=customer_points)
-    
-    depot_point = Point(depot[1], depot[0])
-    depot_gdf = gpd.GeoDataFrame({'geometry': [depot_point]}, geometry='geometry')
-
-    # Line styles for each shift
-    shift_styles = {
-        1: 'o-',   # First shift: Solid line with circles
-        2: 's--',  # Second shift: Dashed line with square
-        3: '^:'   # Third shift: Dotted line with triangles
-    }
-
-    # Initialize plot
+        depot: (latitude, longitude) tuple, or the depot row of the customers frame.
+        solution (dict): Route key (vehicle id or (vehicle_id, shift)) -> assigned customers.
+        shifts: Optional DataFrame with 'E_t' and 'L_t'; the legend then labels
+            every shift with its hours (route shifts come from the
+            (vehicle_id, shift) keys either way).
+        path: Optional output file (e.g. 'routes.png' or 'routes.svg').
+    """
+    if path is not None:
+        render_routes(customers, depot, solution, path, shifts=shifts)
+        return
+
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(10, 10))
-    base = customer_gdf.plot(ax=ax, color='blue', markersize=50, label='Customers')
-    depot_gdf.plot(ax=base, color='red', markersize=100, label='Depot')
-
-    # Plot routes
-    for vehicle, assignments in solution.items():
-        for shift, assigned_customers in assignments.items():
-            if len(assigned_customers) == 0:
-                continue
-
-            # Collect route points: depot -> assigned customers -> depot
-            route_points = [depot_point]
-            for customer_id in assigned_customers:
-                customer = customers.loc[customers['id'] == customer_id].iloc[0]
-                route_points.append(Point(customer['longitude'], customer['latitude']))
-            route_points.append(depot_point)
-
-            # Create a LineString for the route
-            route_line = LineString(route_points)
-            gpd.GeoSeries([route_line]).plot(ax=base, linewidth=2, linestyle=shift_styles.get(shift, '-'), label=f'Vehicle {vehicle}, Shift {shift}')
-
-    # Add legend and labels
-    plt.title("Vehicle Routes Visualization by Shift")
-    plt.xlabel("Longitude")
-    plt.ylabel("Latitude")
-    plt.legend()
+    draw_routes(ax, customers, depot, solution, shifts=shifts)
     plt.show()
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generator import generate_instance
+from src.initial_solution import generate_initial_solution
+from src.instance import compile_instance
+
+@pytest.fixture(scope='session')
+def data():
+    """Small seeded synthetic instance (see benchmarks.generator)."""
+    return generate_instance(25, seed=3)
+
+@pytest.fixture(scope='session')
+def instance(data):
+    """Compiled instance of data, with shifts."""
+    return compile_instance(data['customers'], data['vehicles'], data['parameters'], data['travel_time_matrix'],
+                            data['grade_matrix'], data['shifts'])
+
+@pytest.fixture
+def solution(data):
+    """Initial solution of data, keyed by (vehicle_id, shift)."""
+    initial_solution, _ = generate_initial_solution(data['customers'], data['vehicles'], data['shifts'],
+                                                    data['travel_time_matrix'], data['parameters'])
+    return initial_solution
+
+@pytest.fixture
+def weights(data):
+    """Penalty weights with a non-zero time-window weight, so time warp is checked too."""
+    return dict(data['weights'], wT=7)
+
+@pytest.fixture(scope='session')
+def long_range_data(data):
+    """The test instance with 20 times the battery range, so that many routes are feasible."""
+    vehicles = data['vehicles'].assign(battery_range=20 * data['vehicles']['battery_range'])
+    return dict(data, vehicles=vehicles)
+
+@pytest.fixture(scope='session')
+def long_range_instance(long_range_data):
+    """Compiled instance of long_range_data, with shifts."""
+    return compile_instance(long_range_data['customers'], long_range_data['vehicles'], long_range_data['parameters'],
+                            long_range_data['travel_time_matrix'], long_range_data['grade_matrix'],
+                            long_range_data['shifts'])
+
+@pytest.fixture
+def long_range_solution(long_range_data):
+    """Initial solution of long_range_data, keyed by (vehicle_id, shift)."""
+    solution, _ = generate_initial_solution(long_range_data['customers'], long_range_data['vehicles'],
+                                            long_range_data['shifts'], long_range_data['travel_time_matrix'],
+                                            long_range_data['parameters'])
+    return solution
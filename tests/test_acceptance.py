@@ -0,0 +1,90 @@
+import math
+import random
+
+import pytest
+
+from src.acceptance import (AcceptAll, HillClimbing, LateAcceptance, RecordToRecordTravel, SimulatedAnnealing,
+                            ThresholdAccepting)
+from src.alns import alns, segment_weights
+from src.route_cache import RouteCache
+
+def test_accept_all_and_hill_climbing():
+    rng = random.Random(0)
+    assert AcceptAll()(1e9, 0.0, 0.0, rng)
+    assert HillClimbing()(10.0, 10.0, 5.0, rng)
+    assert not HillClimbing()(10.5, 10.0, 5.0, rng)
+
+def test_simulated_annealing_accepts_worse_with_boltzmann_probability():
+    criterion = SimulatedAnnealing(10.0, step=1.0)
+    rng, reference = random.Random(3), random.Random(3)
+    for _ in range(200):
+        assert criterion(105.0, 100.0, 90.0, rng) == (reference.random() < math.exp(-0.5))
+    # Improvements never draw from the rng
+    state = rng.getstate()
+    assert criterion(99.0, 100.0, 90.0, rng)
+    assert rng.getstate() == state
+
+@pytest.mark.parametrize('method, expected', [('exponential', [50.0, 25.0, 12.5, 10.0]),
+                                              ('linear', [70.0, 40.0, 10.0, 10.0])])
+def test_simulated_annealing_cooling(method, expected):
+    criterion = SimulatedAnnealing(100.0, end_temperature=10.0, step=0.5 if method == 'exponential' else 30.0,
+                                   method=method)
+    temperatures = []
+    for _ in expected:
+        criterion(1.0, 0.0, 0.0, random.Random(0))
+        temperatures.append(criterion.temperature)
+    assert temperatures == pytest.approx(expected)
+
+def test_unknown_schedule_method_is_rejected():
+    with pytest.raises(ValueError):
+        SimulatedAnnealing(1.0, method='cubic')
+    with pytest.raises(ValueError):
+        ThresholdAccepting(1.0, method='cubic')
+
+def test_record_to_record_travel_measures_from_best():
+    criterion = RecordToRecordTravel(10.0, step=0.5)
+    rng = random.Random(0)
+    assert criterion(110.0, 200.0, 100.0, rng)
+    # The threshold halved to 5
+    assert not criterion(106.0, 200.0, 100.0, rng)
+    assert criterion(102.5, 90.0, 100.0, rng)
+    assert criterion.threshold == pytest.approx(1.25)
+
+def test_threshold_accepting_measures_from_current():
+    criterion = ThresholdAccepting(10.0, end_threshold=2.0, step=4.0, method='linear')
+    rng = random.Random(0)
+    assert criterion(110.0, 100.0, 0.0, rng)
+    assert not criterion(107.0, 100.0, 0.0, rng)
+    assert criterion(102.0, 100.0, 0.0, rng)
+    assert not criterion(102.5, 100.0, 0.0, rng)
+    assert criterion.threshold == 2.0
+
+def test_late_acceptance_compares_with_cost_history_length_decisions_ago():
+    criterion = LateAcceptance(history_length=2)
+    rng = random.Random(0)
+    # While the history fills up only non-worsening candidates pass
+    assert not criterion(12.0, 10.0, 10.0, rng)
+    assert criterion(8.0, 10.0, 10.0, rng)
+    assert list(criterion.history) == [10.0, 8.0]
+    # 9 is worse than the current 8 but no worse than the cost two decisions ago
+    assert criterion(9.0, 8.0, 8.0, rng)
+    assert not criterion(9.5, 9.0, 8.0, rng)
+    assert list(criterion.history) == [9.0, 9.0]
+
+def test_segment_weights_smooth_used_operators_and_normalise():
+    weights = segment_weights([0.5, 0.25, 0.25], scores=[30.0, 0.0, 5.0], uses=[3, 0, 1], smoothing_factor=0.5)
+    # Used operators move to the average score per use, unused ones keep their weight
+    raw = [0.5 * 0.5 + 0.5 * 10.0, 0.25, 0.5 * 0.25 + 0.5 * 5.0]
+    assert weights == pytest.approx([w / sum(raw) for w in raw])
+    assert sum(weights) == pytest.approx(1.0)
+
+def test_segment_weights_without_uses_keep_ratios():
+    assert segment_weights([2.0, 1.0, 1.0], [0.0] * 3, [0] * 3, 0.7) == pytest.approx([0.5, 0.25, 0.25])
+
+@pytest.mark.parametrize('acceptance', [lambda: SimulatedAnnealing(100.0), lambda: RecordToRecordTravel(50.0),
+                                        lambda: ThresholdAccepting(50.0), lambda: LateAcceptance(5)])
+def test_seeded_alns_with_criterion_and_segments_is_reproducible(data, instance, solution, weights, acceptance):
+    def run():
+        return alns(solution, data['customers'], data['vehicles'], data['parameters'], weights, max_iter=15,
+                    cache=RouteCache(instance), seed=11, segment_length=4, acceptance=acceptance())
+    assert run() == run()
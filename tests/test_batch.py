@@ -0,0 +1,58 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from src import batch
+from src.batch import solve_batch
+
+@pytest.fixture
+def specs(data):
+    """
+    Three specs over one shared matrix pair: the full instance, a day with
+    half of the customers picked out by matrix_ids, and a day whose
+    matrix_ids miss one of its customers.
+    """
+    customers = data['customers']
+    node_ids = customers['id'].tolist()
+    base = {'vehicles': data['vehicles'], 'shifts': data['shifts'], 'parameters': data['parameters'],
+            'weights': data['weights'], 'travel_time_matrix': data['travel_time_matrix'],
+            'grade_matrix': data['grade_matrix'], 'max_iter': 10, 'seed': 3}
+    half = customers.iloc[::2]
+    return [dict(base, customers=customers),
+            dict(base, customers=half, matrix_ids=node_ids),
+            dict(base, customers=customers.iloc[:5], matrix_ids=node_ids[1:])]
+
+def test_solve_batch_shares_one_matrix_and_reports_failing_jobs(data, specs, monkeypatch):
+    names = []
+    share_matrices = batch._share_matrices
+
+    def recording_share(specs):
+        prepared, blocks = share_matrices(specs)
+        names.extend(block.name for block in blocks)
+        return prepared, blocks
+
+    monkeypatch.setattr(batch, '_share_matrices', recording_share)
+    results = dict(solve_batch(specs, n_workers=2))
+    assert sorted(results) == [0, 1, 2]
+
+    # The failing job yields its exception; the others still finish
+    assert isinstance(results[2], ValueError) and 'not in matrix_ids' in str(results[2])
+    for i in (0, 1):
+        expected = sorted(c for c in specs[i]['customers']['id'] if c != 0)
+        assert sorted(c for route in results[i]['solution'].values() for c in route) == expected
+
+    # Every spec used the same two blocks, which are unlinked after the batch
+    assert len(names) == 2
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+def test_matrix_ids_select_the_same_rows_as_a_sliced_matrix(data, specs):
+    subset = specs[1]
+    rows = np.flatnonzero(data['customers']['id'].isin(subset['customers']['id']))
+    sliced = dict(subset, matrix_ids=None, travel_time_matrix=data['travel_time_matrix'][np.ix_(rows, rows)],
+                  grade_matrix=data['grade_matrix'][np.ix_(rows, rows)])
+    results = dict(solve_batch([subset, sliced], n_workers=1))
+    assert results[0]['solution'] == results[1]['solution']
+    assert results[0]['cost'] == pytest.approx(results[1]['cost'])
@@ -0,0 +1,19 @@
+from benchmarks.run import compare, fingerprint_mismatch
+
+def report(cpu='Test CPU', **metrics):
+    values = {'compile_time': 0.5, 'alns_iterations_per_sec': 100.0, 'final_cost': 1000.0}
+    values.update(metrics)
+    return {'python': '3.11.7', 'machine': 'x86_64', 'cpu': cpu, 'results': {'10': values}}
+
+def test_compare_flags_regressions():
+    assert compare(report(), report()) == []
+    regressions = compare(report(compile_time=1.0, alns_iterations_per_sec=50.0, final_cost=1500.0), report())
+    assert [message.split(':')[0] for message in regressions] == [
+        'n=10 compile_time', 'n=10 alns_iterations_per_sec', 'n=10 final_cost']
+
+def test_compare_skips_machine_dependent_metrics_on_another_machine():
+    other = report(cpu='Other CPU', compile_time=5.0, alns_iterations_per_sec=10.0, final_cost=1500.0)
+    assert 'cpu' in fingerprint_mismatch(other, report())
+    assert [message.split(':')[0] for message in compare(other, report())] == ['n=10 final_cost']
+    # A baseline without a fingerprint counts as another machine
+    assert compare(report(compile_time=5.0), {'results': report()['results']}) == []
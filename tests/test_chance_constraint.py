@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from src.chance_constraint import (FatigueRisk, exceedance_probability, fatigue_thresholds, monte_carlo_exceedance,
+                                   route_ride_times, sample_tolerances)
+
+ALPHA = np.array([2.0, 4.5, 9.0])
+BETA = np.array([1.5, 0.8, 0.3])
+
+@pytest.mark.parametrize('p', [0.05, 0.5, 0.95])
+def test_threshold_has_probability_p(p):
+    thresholds = fatigue_thresholds(ALPHA, BETA, p)
+    assert exceedance_probability(thresholds, ALPHA, BETA) == pytest.approx(np.full(3, p), abs=1e-9)
+
+def test_monte_carlo_matches_closed_form():
+    tolerances = sample_tolerances(ALPHA, BETA, n_samples=20000, seed=0)
+    ride_time = fatigue_thresholds(ALPHA, BETA, 0.5)
+    estimate = monte_carlo_exceedance(ride_time, tolerances)
+    assert estimate == pytest.approx(exceedance_probability(ride_time, ALPHA, BETA), abs=0.02)
+
+def test_route_ride_times_include_depot_legs(instance, solution):
+    keys = list(solution)
+    routes = [solution[key] for key in keys]
+    # An empty route between others rides nothing
+    keys.insert(1, keys[0])
+    routes.insert(1, [])
+    k, ride_time = route_ride_times(instance, keys, routes)
+    for key, route, vehicle, value in zip(keys, routes, k.tolist(), ride_time.tolist()):
+        nodes = instance.route_nodes(route)
+        assert vehicle == instance.vehicle_of(key)
+        assert value == pytest.approx(instance.arc_time[nodes[:-1], nodes[1:]].sum(), abs=1e-12)
+    assert ride_time[1] == 0.0
+
+def test_route_risks_use_each_rider(data, instance, solution):
+    risk = FatigueRisk.from_vehicles(data['vehicles'], p=0.9, n_samples=20000, seed=1)
+    closed = risk.route_risks(instance, solution)
+    sampled = risk.route_risks(instance, solution, monte_carlo=True)
+    for key, route in solution.items():
+        nodes = instance.route_nodes(route)
+        k = instance.vehicle_of(key)
+        expected = exceedance_probability(instance.arc_time[nodes[:-1], nodes[1:]].sum(), risk.alpha[k], risk.beta[k])
+        assert closed[key] == pytest.approx(float(expected), abs=1e-12)
+        assert sampled[key] == pytest.approx(closed[key], abs=0.02)
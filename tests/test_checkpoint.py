@@ -0,0 +1,38 @@
+import pickle
+
+import pytest
+
+from src.acceptance import SimulatedAnnealing
+from src.alns import alns
+from src.checkpoint import load_checkpoint, save_checkpoint
+from src.route_cache import RouteCache
+
+def _run(data, instance, solution, weights, **kwargs):
+    return alns(solution, data['customers'], data['vehicles'], data['parameters'], weights,
+                cache=RouteCache(instance), seed=7, local_search_interval=5, segment_length=4,
+                acceptance=SimulatedAnnealing(100.0), **kwargs)
+
+def test_resumed_run_matches_uninterrupted_run(data, instance, solution, weights, tmp_path):
+    path = tmp_path / 'alns.pkl'
+    uninterrupted = _run(data, instance, solution, weights, max_iter=20)
+
+    # Stop after 7 iterations, between two periodic checkpoints
+    polls = iter(range(100))
+    _run(data, instance, solution, weights, max_iter=20, checkpoint_path=path, checkpoint_interval=3,
+         should_stop=lambda: next(polls) >= 7)
+    assert load_checkpoint(path)['iteration'] == 7
+
+    resumed, stats = _run(data, instance, solution, weights, max_iter=20, resume=path, return_stats=True)
+    assert stats['iterations'] == 13
+    assert resumed == uninterrupted
+
+def test_checkpoint_version_is_checked(tmp_path):
+    path = tmp_path / 'state.pkl'
+    save_checkpoint(path, {'iteration': 3})
+    assert load_checkpoint(path)['iteration'] == 3
+    assert not (tmp_path / 'state.pkl.tmp').exists()
+
+    with open(path, 'wb') as f:
+        pickle.dump({'version': -1}, f)
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from src import cost_function
+from src.cost_function import (augmented_cost_function, calculate_energy_consumption, route_cost, route_energy,
+                               route_violations, solution_energy)
+from src.instance import compile_instance
+
+def reference_energy(customers, vehicles, solution, parameters):
+    """
+    Energy Z(s) row by row, as the original implementation computed it from
+    per-customer columns, over trips that start and end at the depot (id 0).
+    """
+    g, rho, C_DA, v = parameters['g'], parameters['rho'], parameters['C_DA'], parameters['v']
+    B_0, B_1, C_RR, METS = parameters['B_0'], parameters['B_1'], parameters['C_RR'], parameters['METS']
+    total_cost = 0
+    for vehicle_id, assigned_customers in solution.items():
+        vehicle = vehicles.loc[vehicles['id'] == vehicle_id].iloc[0]
+        mc_k, mr_k = vehicle['mass'], vehicle['rider_mass']
+        trip = [0] + list(assigned_customers) + [0] if len(assigned_customers) else []
+        for i, j in zip(trip[:-1], trip[1:]):
+            t_ij = customers.loc[customers['id'] == i, f'travel_time_to_{j}'].values[0]
+            e_ij = customers.loc[customers['id'] == i, f'grade_to_{j}'].values[0]
+            m_ijk_t = customers.loc[customers['id'] == j, 'demand'].values[0]
+            metabolic_cost = 3.96 * ((69.8 * 3.5 * METS * mr_k) / 200)
+            grade_cost = (1 / 0.7) * ((mc_k + mr_k + m_ijk_t) * g * v * np.sin(np.arctan(e_ij)))
+            drag_cost = (1 / 0.7) * (0.5 * rho * C_DA * v**3)
+            bearing_cost = (1 / 0.7) * ((B_0 + B_1 * v) * v)
+            rolling_cost = (1 / 0.7) * (C_RR * (mc_k + mr_k + m_ijk_t) * g * np.cos(np.arctan(e_ij)) * v)
+            total_cost += t_ij * (metabolic_cost + grade_cost + drag_cost + bearing_cost + rolling_cost)
+    return total_cost
+
+@pytest.fixture
+def random_solution(data):
+    """Customers shuffled over the vehicles, keyed by vehicle id."""
+    ids = [c for c in data['customers']['id'] if c != 0]
+    rng = np.random.default_rng(1)
+    rng.shuffle(ids)
+    vehicle_ids = data['vehicles']['id'].tolist()
+    return {vehicle_id: ids[r::len(vehicle_ids)] for r, vehicle_id in enumerate(vehicle_ids)}
+
+def test_compiled_energy_matches_original(data, random_solution):
+    customers = data['customers'].copy()
+    for column, j in enumerate(customers['id']):
+        customers[f'travel_time_to_{j}'] = data['travel_time_matrix'][:, column]
+        customers[f'grade_to_{j}'] = data['grade_matrix'][:, column]
+    expected = reference_energy(customers, data['vehicles'], random_solution, data['parameters'])
+
+    # From the per-customer columns, as the original did, and from the matrices
+    from_columns = calculate_energy_consumption(customers, data['vehicles'], random_solution, data['parameters'])
+    instance = compile_instance(data['customers'], data['vehicles'], data['parameters'], data['travel_time_matrix'],
+                                data['grade_matrix'])
+    assert from_columns == pytest.approx(expected, rel=1e-9)
+    assert solution_energy(instance, random_solution) == pytest.approx(expected, rel=1e-9)
+
+def test_float32_matrices_stay_close(data, random_solution, weights):
+    exact = compile_instance(data['customers'], data['vehicles'], data['parameters'], data['travel_time_matrix'],
+                             data['grade_matrix'])
+    single = compile_instance(data['customers'], data['vehicles'], data['parameters'],
+                              data['travel_time_matrix'].astype(np.float32), data['grade_matrix'].astype(np.float32))
+    assert single.arc_time.dtype == np.float32
+    for vehicle_id, route in random_solution.items():
+        assert route_cost(single, vehicle_id, route, weights) == pytest.approx(
+            route_cost(exact, vehicle_id, route, weights), rel=1e-5)
+
+def test_singleton_and_empty_routes(instance, solution, weights):
+    key = next(iter(solution))
+    customer = next(c for route in solution.values() for c in route)
+    # A single customer still costs the depot legs
+    assert route_energy(instance, key, [customer]) > 0
+    depot, node = instance.depot, instance.id_to_index[customer]
+    ride_time = instance.arc_time[depot, node] + instance.arc_time[node, depot]
+    assert route_violations(instance, key, [customer])[1] == pytest.approx(
+        max(ride_time - instance.fatigue_threshold[instance.vehicle_of(key)], 0.0))
+    assert route_cost(instance, key, [], weights) == 0.0
+
+def test_wrappers_compile_once(data, random_solution, weights, monkeypatch):
+    calls = []
+    original = cost_function.compile_instance
+    monkeypatch.setattr(cost_function, 'compile_instance', lambda *args: calls.append(args) or original(*args))
+    monkeypatch.setattr(cost_function, '_COMPILED', type(cost_function._COMPILED)())
+    args = (data['customers'], data['vehicles'], random_solution, data['parameters'])
+    matrices = (data['travel_time_matrix'], data['grade_matrix'])
+    first = calculate_energy_consumption(*args, *matrices)
+    assert calculate_energy_consumption(*args, *matrices) == first
+    augmented_cost_function(*args, weights, *matrices)
+    assert len(calls) == 1
+    # A given instance is used as is
+    instance = compile_instance(data['customers'], data['vehicles'], data['parameters'], *matrices)
+    assert calculate_energy_consumption(None, None, random_solution, None, instance=instance) == pytest.approx(first)
+    assert len(calls) == 1
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from benchmarks.generator import generate_instance
+from src.decomposition import assign_shifts, bisect, decompose, decomposed_alns, share_fleet
+from src.instance import compile_instance
+from src.route_cache import RouteCache
+
+@pytest.fixture(scope='module')
+def fleet_data():
+    """Seeded instance with enough vehicles for four parts."""
+    return generate_instance(40, seed=4, n_vehicles=6)
+
+def customer_ids(data):
+    return sorted(data['customers'].loc[data['customers']['id'] != 0, 'id'].tolist())
+
+def test_bisect_partitions_ids_into_nonempty_groups():
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, 12)
+    x, y, demand = rng.uniform(size=11), rng.uniform(size=11), rng.integers(1, 5, 11).astype(float)
+    for n_parts in (1, 3, 4, 11):
+        groups = bisect(ids, x, y, demand, n_parts)
+        assert len(groups) == n_parts
+        assert all(len(group) for group in groups)
+        assert sorted(np.concatenate(groups).tolist()) == ids.tolist()
+
+def test_share_fleet_gives_every_part_a_vehicle():
+    shares = share_fleet([10.0, 40.0, 20.0], ['a', 'b', 'c', 'd', 'e'], [5.0, 30.0, 10.0, 10.0, 20.0])
+    assert all(shares)
+    assert sorted(v for share in shares for v in share) == ['a', 'b', 'c', 'd', 'e']
+    # The largest vehicle serves the part with the most demand
+    assert 'b' in shares[1]
+
+def test_assign_shifts_picks_an_overlapping_shift(fleet_data):
+    customers, shifts = fleet_data['customers'], fleet_data['shifts']
+    assigned = assign_shifts(customers, shifts)
+    for (a_i, b_i), s in zip(zip(customers['a_i'], customers['b_i']), assigned.tolist()):
+        E_t, L_t = shifts['E_t'].iloc[s], shifts['L_t'].iloc[s]
+        overlaps = [min(b_i, L) - max(a_i, E) > 0 for E, L in zip(shifts['E_t'], shifts['L_t'])]
+        assert min(b_i, L_t) - max(a_i, E_t) > 0 or not any(overlaps)
+
+@pytest.mark.parametrize('with_shifts', [False, True])
+def test_decompose_places_every_customer_once_and_gives_every_part_routes(fleet_data, with_shifts):
+    shifts = fleet_data['shifts'] if with_shifts else None
+    parts = decompose(fleet_data['customers'], fleet_data['vehicles'], shifts, n_parts=4)
+    assert len(parts) == 4
+    placed = [c for part in parts for c in part['customers']]
+    assert sorted(placed) == customer_ids(fleet_data)
+    for part in parts:
+        assert part['route_keys']
+    keys = [key for part in parts for key in part['route_keys']]
+    assert len(keys) == len(set(keys))
+    if with_shifts:
+        assert all(isinstance(key, tuple) for key in keys)
+
+def test_decompose_caps_parts_by_fleet(data):
+    parts = decompose(data['customers'], data['vehicles'], n_parts=8)
+    assert len(parts) == len(data['vehicles'])
+
+def test_decomposed_alns_covers_all_customers(fleet_data):
+    data = fleet_data
+    instance = compile_instance(data['customers'], data['vehicles'], data['parameters'], data['travel_time_matrix'],
+                                data['grade_matrix'], data['shifts'])
+    solution, stats = decomposed_alns(data['customers'], data['vehicles'], data['parameters'], data['weights'],
+                                      shifts=data['shifts'], n_parts=3, n_workers=2, max_iter=10,
+                                      boundary_iterations=5, seed=3, instance=instance)
+    visited = [c for route in solution.values() for c in route]
+    assert sorted(visited) == customer_ids(data)
+    assert len(stats['parts']) == 3
+    assert sum(part['customers'] for part in stats['parts']) == len(visited)
+    assert stats['final_cost'] == pytest.approx(RouteCache(instance).solution_cost(solution, data['weights']))
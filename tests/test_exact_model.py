@@ -0,0 +1,143 @@
+import io
+import re
+
+import pytest
+
+from benchmarks.generator import generate_instance
+from src import exact_model
+from src.alns import alns
+from src.cost_function import route_violations
+from src.initial_solution import generate_initial_solution
+from src.instance import compile_instance
+from src.route_cache import RouteCache
+
+SENSES = ('<=', '>=', '=')
+
+def parse_lp(text):
+    """
+    Rows of a CPLEX LP file, independent of number formatting and term order.
+    Returns:
+        Dict with the objective as {variable: coefficient}, the constraints as
+        {name: ({variable: coefficient}, sense, rhs)} and the set of binaries.
+    """
+    sections = {}
+    section = None
+    for line in text.splitlines():
+        if not line or line.startswith('\\'):
+            continue
+        if not line[0].isspace():
+            section = line.strip()
+            sections[section] = []
+        else:
+            sections[section].append(line.strip())
+
+    def rows(lines):
+        # Continuation lines start with a sign; a new row starts with 'name:'
+        joined = []
+        for line in lines:
+            if re.match(r'^[\w\[\]]+:', line):
+                joined.append(line)
+            else:
+                joined[-1] += ' ' + line
+        for row in joined:
+            name, expression = row.split(':', 1)
+            yield name, expression.split()
+
+    def linear(tokens):
+        terms = {}
+        sign, coefficient = 1.0, 1.0
+        for token in tokens:
+            if token in ('+', '-'):
+                sign, coefficient = (1.0 if token == '+' else -1.0), 1.0
+            elif re.fullmatch(r'-?[\d.]+(e[-+]?\d+)?', token):
+                coefficient = float(token)
+            else:
+                if token.startswith('-'):
+                    sign, token = -1.0, token[1:]
+                terms[token] = terms.get(token, 0.0) + sign * coefficient
+                sign, coefficient = 1.0, 1.0
+        return {name: value for name, value in terms.items() if value != 0.0}
+
+    (_, objective), = rows(sections['Minimize'])
+    constraints = {}
+    for name, tokens in rows(sections['Subject To']):
+        at = next(p for p, token in enumerate(tokens) if token in SENSES)
+        constraints[name] = (linear(tokens[:at]), tokens[at], float(tokens[at + 1]))
+    binaries = {name for line in sections.get('Binaries', []) for name in line.split()}
+    return {'objective': linear(objective), 'constraints': constraints, 'binaries': binaries}
+
+def assert_same_terms(got, expected):
+    assert set(got) == set(expected)
+    for name, value in expected.items():
+        assert got[name] == pytest.approx(value, rel=1e-9)
+
+@pytest.fixture(scope='module')
+def model_data():
+    data = generate_instance(4, seed=2, n_shifts=2, n_vehicles=2)
+    return exact_model.model_data(data['customers'], data['vehicles'], data['shifts'], data['parameters'],
+                                  data['travel_time_matrix'], data['grade_matrix'])
+
+@pytest.mark.parametrize('relax', [False, True])
+def test_streamed_lp_matches_docplex(model_data, relax):
+    pytest.importorskip('docplex')
+    mdl, _ = exact_model.build_model(model_data, relax=relax)
+    expected = parse_lp(mdl.export_as_lp_string())
+    stream = io.StringIO()
+    exact_model.write_lp(model_data, stream, relax=relax)
+    got = parse_lp(stream.getvalue())
+
+    assert_same_terms(got['objective'], expected['objective'])
+    assert expected['constraints'] and list(got['constraints']) == list(expected['constraints'])
+    for name, (terms, sense, rhs) in expected['constraints'].items():
+        got_terms, got_sense, got_rhs = got['constraints'][name]
+        assert_same_terms(got_terms, terms)
+        assert got_sense == sense
+        assert got_rhs == pytest.approx(rhs, rel=1e-9)
+    assert got['binaries'] == expected['binaries']
+
+@pytest.fixture(scope='module', params=[2, 5])
+def feasible_start(request):
+    """Model data and an ALNS solution without violations, on long-range vehicles."""
+    data = generate_instance(4, seed=request.param, n_shifts=2, n_vehicles=2)
+    vehicles = data['vehicles'].assign(battery_range=20 * data['vehicles']['battery_range'])
+    instance = compile_instance(data['customers'], vehicles, data['parameters'], data['travel_time_matrix'],
+                                data['grade_matrix'], data['shifts'])
+    initial, _ = generate_initial_solution(data['customers'], vehicles, data['shifts'], data['travel_time_matrix'],
+                                           data['parameters'])
+    # Heavy penalties keep the search on feasible solutions
+    weights = {name: 1000.0 for name in data['weights']}
+    solution = alns(initial, data['customers'], vehicles, data['parameters'], weights, max_iter=30,
+                    cache=RouteCache(instance), seed=1)
+    assert not any(any(route_violations(instance, key, route)) for key, route in solution.items())
+    return exact_model.model_data(data['customers'], vehicles, data['shifts'], data['parameters'],
+                                  data['travel_time_matrix'], data['grade_matrix']), solution
+
+def test_start_values_of_feasible_solution_violate_no_row(feasible_start):
+    data, solution = feasible_start
+    values = exact_model.start_values(data, solution)
+    assert exact_model.violated_rows(data, values) == []
+    for key, route in solution.items():
+        k, l = key[0], data['shifts'][key[1]]
+        path = [0] + route + [data['nodes'][-1], 0] if route else []
+        for i, j in zip(path, path[1:]):
+            assert values[exact_model.var_name('x', (i, j, k, l))] == 1
+
+def test_violated_rows_reports_broken_assignment(feasible_start):
+    data, solution = feasible_start
+    values = exact_model.start_values(data, solution)
+    customer = data['customers'][0]
+    for k in data['vehicles']:
+        for l in data['shifts']:
+            values[exact_model.var_name('y', (customer, k, l))] = 0
+    # Row c1 of (21) is the first customer's visit
+    assert 1 in exact_model.violated_rows(data, values)
+
+def test_warm_start_sets_cutoff_from_feasible_start(feasible_start):
+    pytest.importorskip('docplex')
+    data, solution = feasible_start
+    mdl, _ = exact_model.build_model(data)
+    objective, violated = exact_model.warm_start(mdl, data, solution)
+    assert violated == []
+    assert objective == pytest.approx(exact_model.objective_value(data, exact_model.start_values(data, solution)))
+    assert mdl.number_of_mip_starts == 1
+    assert mdl.parameters.mip.tolerances.uppercutoff.get() == pytest.approx(objective, rel=1e-6)
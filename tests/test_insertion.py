@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.cost_function import route_cost, route_violations
+from src.insertion import InsertionMatrix
+
+def _routes(solution):
+    return [(key, route) for key, route in solution.items() if len(route) >= 2]
+
+def test_insertion_matrix_matches_brute_force(long_range_instance, long_range_solution, weights):
+    instance, solution = long_range_instance, long_range_solution
+    keys = [key for key, _ in _routes(solution)][:3]
+    pending = [solution[key].pop() for key in keys]
+    partial = {key: solution[key] for key in keys}
+    # An empty route opens a new trip
+    partial[next(key for key in solution if key not in partial)] = []
+    matrix = InsertionMatrix(instance, partial, pending, weights)
+    n_feasible = 0
+    for c, customer_id in enumerate(pending):
+        for r, key in enumerate(matrix.vehicle_ids):
+            route = partial[key]
+            base = route_cost(instance, key, route, weights)
+            candidates = [route[:p] + [customer_id] + route[p:] for p in range(len(route) + 1)]
+            deltas = [route_cost(instance, key, candidate, weights) - base for candidate in candidates]
+            assert matrix.penalized_cost[c, r] == pytest.approx(min(deltas), rel=1e-9, abs=1e-9)
+            assert deltas[matrix.penalized_position[c, r]] == pytest.approx(min(deltas), rel=1e-9, abs=1e-9)
+            # Only positions giving a route without violations count as feasible
+            feasible = [delta for delta, candidate in zip(deltas, candidates)
+                        if not any(route_violations(instance, key, candidate))]
+            n_feasible += len(feasible)
+            if feasible:
+                assert matrix.best_cost[c, r] == pytest.approx(min(feasible), rel=1e-9, abs=1e-9)
+                assert deltas[matrix.best_position[c, r]] == pytest.approx(min(feasible), rel=1e-9, abs=1e-9)
+            else:
+                assert matrix.best_cost[c, r] == np.inf
+    assert n_feasible > 0
+
+def test_insertion_prefers_feasible_positions(long_range_instance, long_range_solution, weights):
+    instance = long_range_instance
+    key, route = next((key, route) for key, route in _routes(long_range_solution)
+                      if not any(route_violations(instance, key, route)))
+    # Taking a customer out of a feasible route leaves at least its old position feasible
+    customer_id = route.pop(1)
+    matrix = InsertionMatrix(instance, {key: route}, [customer_id], weights)
+    assert np.isfinite(matrix.best_cost[0, 0])
+    matrix.insert(matrix.next_greedy())
+    assert not any(route_violations(instance, key, matrix.solution[key]))
+
+def test_insertion_matrix_respects_min_position(instance, solution, weights):
+    key, route = _routes(solution)[0]
+    customer_id = route.pop()
+    matrix = InsertionMatrix(instance, {key: route}, [customer_id], weights, min_position={key: len(route)})
+    assert matrix.penalized_position[0, 0] == len(route)
+    assert np.isfinite(matrix.penalized_cost[0, 0])
+    matrix.insert(0)
+    assert matrix.solution[key][-1] == customer_id
@@ -0,0 +1,34 @@
+import queue
+import random
+
+import pytest
+
+from src.islands import Migration, island_alns, migration_targets
+from src.route_cache import RouteCache
+
+def test_migration_targets():
+    assert migration_targets('ring', 3) == [[1], [2], [0]]
+    assert migration_targets('complete', 3) == [[1, 2], [0, 2], [0, 1]]
+    assert migration_targets({0: [2]}, 3) == [[2], [], []]
+    assert migration_targets('random', 3) is None
+    with pytest.raises(ValueError):
+        migration_targets('star', 3)
+
+def test_migration_keeps_best_immigrant_and_drops_when_full():
+    inboxes = [queue.Queue(maxsize=1) for _ in range(2)]
+    inboxes[0].put(({1: [2]}, 5.0, [1.0], [1.0]))
+    migration = Migration(0, inboxes, [1], interval=1, rng=random.Random(0))
+    assert migration.exchange({1: [3]}, 9.0, [1.0], [1.0])[1] == 5.0
+    assert migration.exchange({1: [3]}, 9.0, [1.0], [1.0]) is None
+    # The peer's inbox held one message, so the second was dropped
+    assert (migration.received, migration.sent, migration.dropped) == (1, 1, 1)
+
+def test_island_alns_migrates_and_returns_best_island(data, instance, solution, weights):
+    best, stats = island_alns(solution, None, None, data['parameters'], weights, n_islands=2, max_iter=20,
+                              migration_interval=5, seed=3, instance=instance)
+    assert [island['island'] for island in stats] == [0, 1]
+    assert all(island['migrations_sent'] + island['migrations_dropped'] == 4 for island in stats)
+    assert sum(island['migrations_received'] for island in stats) > 0
+    cost = RouteCache(instance).solution_cost(best, weights)
+    assert cost == pytest.approx(min(island['best_cost'] for island in stats))
+    assert cost <= RouteCache(instance).solution_cost(solution, weights)
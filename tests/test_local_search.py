@@ -0,0 +1,49 @@
+from src import local_search as ls
+from src.candidates import candidate_lists
+from src.cost_function import solution_cost
+from src.route_data import RouteData
+
+def test_relocate_skips_infeasible_targets(long_range_instance, long_range_solution, weights):
+    instance = long_range_instance
+    route_data = {key: RouteData(instance, key, route) for key, route in long_range_solution.items()}
+    feasible = [key for key, data in route_data.items() if data.feasible and len(data)]
+    pruned = 0
+    for v1 in feasible:
+        for v2 in feasible:
+            if v1 == v2:
+                continue
+            for i, node in enumerate(route_data[v1].nodes):
+                for j in range(len(route_data[v2]) + 1):
+                    if not route_data[v2].can_insert(node, j):
+                        assert ls._try_relocate(instance, route_data, weights, v1, i, v2, j) is None
+                        pruned += 1
+    assert pruned > 0
+
+def test_local_search_does_not_worsen(long_range_data, long_range_instance, long_range_solution, weights):
+    data = long_range_data
+    improved, cost = ls.local_search(long_range_solution, data['customers'], data['vehicles'], data['parameters'],
+                                     weights, instance=long_range_instance)
+    assert cost <= solution_cost(long_range_instance, long_range_solution, weights)
+    assert sorted(c for route in improved.values() for c in route) == sorted(
+        c for route in long_range_solution.values() for c in route)
+
+def test_candidate_lists_are_nearest_compatible_customers(instance):
+    k = 5
+    neighbors = candidate_lists(instance, k, chunk_size=7)
+    T, a, b = instance.arc_time, instance.ready_time, instance.due_time
+    for u in range(instance.n_nodes):
+        compatible = [w for w in range(instance.n_nodes) if w not in (u, instance.depot)
+                      and (a[u] + T[u, w] <= b[w] or a[w] + T[w, u] <= b[u])]
+        expected = sorted(compatible, key=lambda w: min(T[u, w], T[w, u]))[:k]
+        assert neighbors[u] == expected
+
+def test_granular_local_search_is_close_to_full_scan(long_range_data, long_range_instance, long_range_solution,
+                                                     weights):
+    data = long_range_data
+    args = (long_range_solution, data['customers'], data['vehicles'], data['parameters'], weights)
+    _, full = ls.local_search(*args, instance=long_range_instance)
+    granular, cost = ls.local_search(*args, instance=long_range_instance, granularity=10)
+    # First-improvement searches over different neighbourhoods stop in different local optima
+    assert cost <= 1.05 * full
+    assert sorted(c for route in granular.values() for c in route) == sorted(
+        c for route in long_range_solution.values() for c in route)
@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.matrix_builder import EARTH_RADIUS_KM, build_matrices, matrices_from_customers
+
+N = 7
+
+@pytest.fixture(scope='module')
+def nodes():
+    rng = np.random.default_rng(5)
+    latitude = 41.88 + rng.uniform(-0.05, 0.05, N)
+    longitude = -87.62 + rng.uniform(-0.05, 0.05, N)
+    elevation = rng.uniform(170.0, 200.0, N)
+    # A duplicate location has zero distance and therefore zero grade
+    latitude[3], longitude[3] = latitude[1], longitude[1]
+    return latitude, longitude, elevation
+
+def dense_reference(latitude, longitude, elevation, speed_kmh):
+    """Travel times and grades pair by pair, in float64."""
+    travel_time = np.zeros((N, N))
+    grade = np.zeros((N, N))
+    for i in range(N):
+        for j in range(N):
+            lat1, lon1, lat2, lon2 = map(math.radians, (latitude[i], longitude[i], latitude[j], longitude[j]))
+            h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            distance_km = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(h, 1.0)))
+            travel_time[i, j] = distance_km / speed_kmh
+            if distance_km > 0:
+                grade[i, j] = (elevation[j] - elevation[i]) / (1000 * distance_km)
+    return travel_time, grade
+
+@pytest.mark.parametrize('chunk_size', [1, 3, N, 2 * N])
+def test_chunked_build_matches_dense_reference(nodes, chunk_size):
+    latitude, longitude, elevation = nodes
+    expected_time, expected_grade = dense_reference(latitude, longitude, elevation, 12.0)
+    travel_time, grade = build_matrices(latitude, longitude, elevation, speed_kmh=12.0, chunk_size=chunk_size,
+                                        dtype=np.float64)
+    np.testing.assert_allclose(travel_time, expected_time, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(grade, expected_grade, rtol=1e-9, atol=1e-12)
+    assert grade[1, 3] == 0.0 and np.all(np.diag(grade) == 0.0)
+
+def test_float32_build_and_missing_elevation(nodes):
+    latitude, longitude, elevation = nodes
+    expected_time, _ = dense_reference(latitude, longitude, elevation, 15.0)
+    travel_time, grade = build_matrices(latitude, longitude, chunk_size=2)
+    assert travel_time.dtype == grade.dtype == np.float32
+    np.testing.assert_allclose(travel_time, expected_time, rtol=1e-6)
+    assert not grade.any()
+
+def test_matrices_from_customers_fills_out_arrays(nodes, tmp_path):
+    latitude, longitude, elevation = nodes
+    customers = pd.DataFrame({'latitude': latitude, 'longitude': longitude, 'elevation': elevation})
+    out = tuple(np.lib.format.open_memmap(tmp_path / f'{name}.npy', mode='w+', dtype=np.float32, shape=(N, N))
+                for name in ('travel_time', 'grade'))
+    result = matrices_from_customers(customers, chunk_size=3, out=out)
+    assert result[0] is out[0] and result[1] is out[1]
+    expected = build_matrices(latitude, longitude, elevation, chunk_size=N)
+    np.testing.assert_array_equal(np.load(tmp_path / 'travel_time.npy'), expected[0])
+    np.testing.assert_array_equal(np.load(tmp_path / 'grade.npy'), expected[1])
@@ -0,0 +1,61 @@
+import zipfile
+
+import numpy as np
+import pytest
+
+from src import matrix_store
+from src.matrix_store import load_matrix, read_xlsx_matrix
+
+def write_xlsx(path, ids, matrix):
+    """Minimal workbook in the layout of bike_travel_time_matrix.xlsx: ids in row 1 and column A."""
+    letters = [chr(ord('A') + c) for c in range(len(ids) + 1)]
+
+    def cell(row, col, value):
+        return f'<c r="{letters[col]}{row + 1}"><v>{value!r}</v></c>'
+
+    rows = [[cell(0, c + 1, int(i)) for c, i in enumerate(ids)]]
+    for r, i in enumerate(ids):
+        rows.append([cell(r + 1, 0, int(i))] + [cell(r + 1, c + 1, float(v)) for c, v in enumerate(matrix[r])])
+    body = ''.join(f'<row r="{r + 1}">{"".join(cells)}</row>' for r, cells in enumerate(rows))
+    sheet = ('<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+             f'<sheetData>{body}</sheetData></worksheet>')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('xl/worksheets/sheet1.xml', sheet)
+
+@pytest.fixture
+def spreadsheet(tmp_path):
+    ids = np.array([0, 4, 7])
+    matrix = np.arange(9, dtype=float).reshape(3, 3) / 4
+    path = tmp_path / 'matrix.xlsx'
+    write_xlsx(path, ids, matrix)
+    return path, ids, matrix
+
+def test_read_xlsx_matrix(spreadsheet):
+    path, ids, matrix = spreadsheet
+    got_ids, got = read_xlsx_matrix(path)
+    np.testing.assert_array_equal(got_ids, ids)
+    np.testing.assert_array_equal(got, matrix)
+
+def test_cold_build_then_warm_memory_mapped_hit(spreadsheet, tmp_path, monkeypatch):
+    path, ids, matrix = spreadsheet
+    cache_dir = tmp_path / 'cache'
+    got_ids, got = load_matrix(path, cache_dir=cache_dir)
+    np.testing.assert_array_equal(got_ids, ids)
+    np.testing.assert_array_equal(got, matrix)
+    assert sorted(p.name.split('-')[0] for p in cache_dir.iterdir()) == ['matrix', 'matrix']
+
+    # A warm hit never parses the spreadsheet and maps the cached matrix read-only
+    monkeypatch.setattr(matrix_store, 'read_xlsx_matrix', lambda path: pytest.fail("spreadsheet parsed again"))
+    _, warm = load_matrix(path, cache_dir=cache_dir)
+    assert isinstance(warm, np.memmap) and not warm.flags.writeable
+    np.testing.assert_array_equal(warm, matrix)
+
+def test_changed_spreadsheet_invalidates_cache(spreadsheet, tmp_path):
+    path, ids, matrix = spreadsheet
+    cache_dir = tmp_path / 'cache'
+    load_matrix(path, cache_dir=cache_dir)
+    write_xlsx(path, ids, matrix + 1)
+    _, changed = load_matrix(path, cache_dir=cache_dir)
+    np.testing.assert_array_equal(changed, matrix + 1)
+    # One .npy pair per content hash
+    assert len(list(cache_dir.glob('matrix-*.ids.npy'))) == 2
@@ -0,0 +1,28 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from src import parallel
+from src.parallel import parallel_alns
+
+def test_parallel_alns_is_reproducible_and_frees_shared_memory(data, instance, solution, weights, monkeypatch):
+    names = []
+    share_instance = parallel.share_instance
+
+    def recording_share(instance):
+        handle, blocks = share_instance(instance)
+        names.extend(block.name for block in blocks)
+        return handle, blocks
+
+    monkeypatch.setattr(parallel, 'share_instance', recording_share)
+    runs = [parallel_alns(solution, None, None, data['parameters'], weights, n_workers=2, max_iter=15, seed=7,
+                          instance=instance) for _ in range(2)]
+    (first, first_stats), (second, second_stats) = runs
+    assert first == second
+    assert [stats['best_cost'] for stats in first_stats] == [stats['best_cost'] for stats in second_stats]
+    assert len({stats['seed'] for stats in first_stats}) == 2
+    # Both runs placed their matrices in shared memory and unlinked them afterwards
+    assert len(names) == 2 * len(parallel.SHARED_FIELDS)
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
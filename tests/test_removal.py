@@ -0,0 +1,32 @@
+import pytest
+
+from src.cost_function import route_cost
+from src.removal import removal_savings
+
+def _brute_force(instance, solution, weights):
+    savings = {}
+    for key, route in solution.items():
+        if route:
+            base = route_cost(instance, key, route, weights)
+            savings[key] = [base - route_cost(instance, key, route[:p] + route[p + 1:], weights)
+                            for p in range(len(route))]
+    return savings
+
+def test_removal_savings_match_brute_force(instance, solution, weights):
+    # A single-customer route and an empty one exercise the edge cases
+    keys = list(solution)
+    solution[keys[0]] = solution[keys[0]][:1]
+    solution[keys[1]] = []
+    savings = removal_savings(instance, solution, weights)
+    expected = _brute_force(instance, solution, weights)
+    assert set(savings) == set(expected)
+    for key, values in expected.items():
+        assert savings[key].tolist() == pytest.approx(values, rel=1e-9, abs=1e-9)
+
+def test_removal_savings_of_selected_routes(instance, solution, weights):
+    keys = [key for key, route in solution.items() if route][:2]
+    savings = removal_savings(instance, solution, weights, keys=keys)
+    assert list(savings) == keys
+    expected = _brute_force(instance, {key: solution[key] for key in keys}, weights)
+    for key in keys:
+        assert savings[key].tolist() == pytest.approx(expected[key], rel=1e-9, abs=1e-9)
@@ -0,0 +1,65 @@
+import pytest
+
+from src.reoptimize import affected_routes, reoptimize
+from src.route_cache import RouteCache
+
+@pytest.fixture
+def committed(long_range_solution):
+    """
+    The long-range initial solution with two customers held back as new
+    orders, the first two stops of every route executed and one later
+    stop cancelled.
+    """
+    solution = {key: list(route) for key, route in long_range_solution.items()}
+    routes = [key for key, route in solution.items() if len(route) >= 4]
+    new_customers = [solution[routes[0]].pop(), solution[routes[-1]].pop()]
+    executed = {key: min(2, len(route)) for key, route in solution.items()}
+    cancelled = [solution[routes[0]][2]]
+    return solution, new_customers, cancelled, executed
+
+def run(committed, instance, weights, **kwargs):
+    solution, new_customers, cancelled, executed = committed
+    return reoptimize(solution, instance, weights, new_customers=new_customers, cancelled=cancelled,
+                      executed=executed, time_budget=60.0, max_iter=40, seed=5, **kwargs)
+
+def test_reoptimize_keeps_executed_prefixes_and_inserts_new_customers(committed, long_range_instance, weights):
+    solution, new_customers, cancelled, executed = committed
+    result, stats = run(committed, long_range_instance, weights)
+    assert stats['iterations'] == 40
+    for key, route in solution.items():
+        assert result[key][:executed[key]] == route[:executed[key]]
+    visited = [c for route in result.values() for c in route]
+    expected = [c for route in solution.values() for c in route if c not in cancelled] + new_customers
+    assert sorted(visited) == sorted(expected)
+    assert stats['final_cost'] <= stats['inserted_cost']
+
+def test_reoptimize_returns_unaffected_routes_unchanged(committed, long_range_instance, weights):
+    solution, _, cancelled, _ = committed
+    # Few neighbours per changed customer, so the burst stays local on this small instance
+    result, stats = run(committed, long_range_instance, weights, granularity=2)
+    unaffected = [key for key in solution if key not in stats['affected_routes']]
+    assert any(solution[key] for key in unaffected)
+    for key in unaffected:
+        assert result[key] == solution[key]
+    # The route that lost the cancelled customer is always reworked
+    assert any(cancelled[0] in solution[key] for key in stats['affected_routes'])
+
+def test_reoptimize_is_reproducible_with_a_shared_cache(committed, long_range_instance, weights):
+    cache = RouteCache(long_range_instance)
+    first, _ = run(committed, long_range_instance, weights, cache=cache)
+    second, _ = run(committed, long_range_instance, weights, cache=cache)
+    assert first == second
+
+def test_cancelling_an_executed_stop_raises(committed, long_range_instance, weights):
+    solution, _, _, executed = committed
+    key = next(key for key, count in executed.items() if count)
+    with pytest.raises(ValueError, match='already executed'):
+        reoptimize(solution, long_range_instance, weights, cancelled=[solution[key][0]], executed=executed,
+                   max_iter=1)
+
+def test_affected_routes_ignore_locked_stops(committed, long_range_instance):
+    solution, new_customers, _, _ = committed
+    # With every stop locked only empty routes whose horizon fits a new customer qualify
+    locked = {key: len(route) for key, route in solution.items()}
+    keys = affected_routes(long_range_instance, solution, new_customers, {}, locked)
+    assert all(not solution[key] for key in keys)
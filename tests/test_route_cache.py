@@ -0,0 +1,38 @@
+import pytest
+
+from src.cost_function import route_cost, solution_cost
+from src.route_cache import ENTRY_OVERHEAD, RouteCache
+
+def test_cached_costs_match_direct_costs(instance, solution, weights):
+    cache = RouteCache(instance)
+    assert cache.solution_cost(solution, weights) == pytest.approx(solution_cost(instance, solution, weights))
+    assert cache.misses == len(solution) and cache.hits == 0
+
+    # A second pass, under other weights, is served from the cache
+    other = {name: 2 * value for name, value in weights.items()}
+    assert cache.solution_cost(solution, other) == pytest.approx(solution_cost(instance, solution, other))
+    assert cache.hits == len(solution) and cache.misses == len(solution)
+
+def test_cache_evicts_least_recently_used(instance, solution, weights):
+    routes = [(key, route) for key, route in solution.items() if route][:3]
+    cache = RouteCache(instance, max_bytes=2 * (ENTRY_OVERHEAD + 200))
+    for key, route in routes:
+        cache.evaluate(key, route)
+    assert len(cache) < len(routes) and cache.evictions > 0
+    assert cache.bytes <= cache.max_bytes
+
+    # The most recent route is still cached, the first one was evicted
+    misses = cache.misses
+    cache.evaluate(*routes[-1])
+    assert cache.misses == misses
+    cache.evaluate(*routes[0])
+    assert cache.misses == misses + 1
+    key, route = routes[0]
+    assert cache.route_cost(key, route, weights) == pytest.approx(route_cost(instance, key, route, weights))
+
+def test_clear_resets_statistics(instance, solution, weights):
+    cache = RouteCache(instance)
+    cache.solution_cost(solution, weights)
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'bytes': 0, 'hit_rate': 0.0}
@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+
+from src.cost_function import route_cost, route_violations
+from src.route_data import RouteData, evaluate_pieces
+
+def _routes(solution):
+    return [(key, route) for key, route in solution.items() if len(route) >= 2]
+
+def test_route_data_cost_matches_route_cost(instance, solution, weights):
+    for key, route in solution.items():
+        data = RouteData(instance, key, route)
+        assert data.cost(weights) == pytest.approx(route_cost(instance, key, route, weights), rel=1e-9, abs=1e-9)
+
+def test_two_opt_star_pieces(instance, solution, weights):
+    (key_a, route_a), (key_b, route_b) = _routes(solution)[:2]
+    a, b = RouteData(instance, key_a, route_a), RouteData(instance, key_b, route_b)
+    for p, q in itertools.product(range(len(route_a) + 1), range(len(route_b) + 1)):
+        # Prefix of a before p followed by the suffix of b from q, served by a's vehicle
+        expected = route_cost(instance, key_a, route_a[:p] + route_b[q:], weights)
+        got = evaluate_pieces(instance, key_a, [(a, 0, p - 1), (b, q, len(route_b) - 1)], weights)
+        assert got == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+def test_relocate_and_swap_pieces(instance, solution, weights):
+    (key_a, route_a), (key_b, route_b) = _routes(solution)[:2]
+    a, b = RouteData(instance, key_a, route_a), RouteData(instance, key_b, route_b)
+    n_a = len(route_a)
+    for p, q in itertools.product(range(n_a), range(len(route_b))):
+        # Customer p of a moved before position q of b
+        expected = route_cost(instance, key_b, route_b[:q] + [route_a[p]] + route_b[q:], weights)
+        got = evaluate_pieces(instance, key_b, [(b, 0, q - 1), (a, p, p), (b, q, len(route_b) - 1)], weights)
+        assert got == pytest.approx(expected, rel=1e-9, abs=1e-9)
+        # Customer q of b swapped into position p of a
+        expected = route_cost(instance, key_a, route_a[:p] + [route_b[q]] + route_a[p + 1:], weights)
+        got = evaluate_pieces(instance, key_a, [(a, 0, p - 1), (b, q, q), (a, p + 1, n_a - 1)], weights)
+        assert got == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+def test_can_insert_matches_brute_force(long_range_instance, long_range_solution):
+    instance = long_range_instance
+    customers = [c for route in long_range_solution.values() for c in route]
+    outcomes = set()
+    for key, route in long_range_solution.items():
+        data = RouteData(instance, key, route)
+        if not data.feasible:
+            continue
+        for customer_id in customers:
+            if customer_id in route:
+                continue
+            node = int(instance.id_to_index[customer_id])
+            for p in range(len(route) + 1):
+                expected = not any(route_violations(instance, key, route[:p] + [customer_id] + route[p:]))
+                assert data.can_insert(node, p) == expected
+                outcomes.add(expected)
+    # Both feasible and infeasible insertions were checked
+    assert outcomes == {True, False}
+
+def test_schedule_respects_windows(long_range_instance, long_range_solution):
+    instance = long_range_instance
+    for key, route in long_range_solution.items():
+        data = RouteData(instance, key, route)
+        if not data.feasible:
+            continue
+        arrival, start, waiting, slack = data.schedule
+        for p, node in enumerate(data.nodes):
+            assert instance.ready_time[node] <= start[p] <= instance.due_time[node]
+            assert waiting[p] == pytest.approx(max(instance.ready_time[node] - arrival[p], 0.0))
+            assert slack[p] >= 0.0
@@ -0,0 +1,38 @@
+import time
+from multiprocessing import shared_memory
+
+from src import service
+from src.service import Job, SolveService
+
+def test_finished_jobs_are_evicted():
+    solve_service = SolveService(job_ttl=60, max_finished_jobs=2)
+    now = time.monotonic()
+    for job_id, finished in enumerate([now - 120, now - 3, now - 2, now - 1, None], 1):
+        job = Job(job_id, None, None)
+        job.finished = finished
+        solve_service.jobs[job_id] = job
+    solve_service._evict_jobs()
+    # The expired job and the oldest beyond two finished ones go; the running job stays
+    assert sorted(solve_service.jobs) == [3, 4, 5]
+
+def test_worker_matrices_are_bounded(monkeypatch):
+    monkeypatch.setattr(service, 'WORKER_MATRIX_SLOTS', 2)
+    service.init_worker()
+    blocks = [shared_memory.SharedMemory(create=True, size=4 * 8) for _ in range(3)]
+    try:
+        spec = lambda block: {'travel_time_matrix': ('shm', block.name, (2, 2), 'float64')}
+        key, matrix = service._matrix(spec(blocks[0]), 'travel_time_matrix')
+        assert key == blocks[0].name and matrix.shape == (2, 2) and not matrix.flags.writeable
+        service._worker['instances']['on first'] = (None, (blocks[0].name, None))
+        service._worker['instances']['on second'] = (None, (blocks[1].name, None))
+        del matrix
+        for block in blocks[1:]:
+            service._matrix(spec(block), 'travel_time_matrix')
+        # The least recently used matrix and the instances built on it are gone
+        assert list(service._worker['matrices']) == [block.name for block in blocks[1:]]
+        assert list(service._worker['instances']) == ['on second']
+    finally:
+        service.init_worker()
+        for block in blocks:
+            block.close()
+            block.unlink()
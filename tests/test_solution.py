@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from src.operators import greedy_insertion, random_removal, worst_removal
+from src.solution import Solution
+
+def _ride_time(instance, route):
+    nodes = instance.route_nodes(route)
+    return float(instance.arc_time[nodes[:-1], nodes[1:]].sum())
+
+def _assert_consistent(instance, state):
+    routes = state.to_dict()
+    for r, route in enumerate(routes.values()):
+        assert state.length[r] == len(route)
+        assert state.load[r] == pytest.approx(float(instance.demand[instance.indices(route)].sum()), abs=1e-9)
+        assert state.ride_time[r] == pytest.approx(_ride_time(instance, route), abs=1e-9)
+
+def test_dict_round_trip(instance, solution):
+    state = Solution.from_dict(instance, solution)
+    assert state.to_dict() == solution
+    assert list(state.to_dict()) == list(solution)
+    _assert_consistent(instance, state)
+
+def test_repeated_customer_is_rejected(instance, solution):
+    key, route = next((key, route) for key, route in solution.items() if route)
+    other = next(k for k in solution if k != key)
+    with pytest.raises(ValueError):
+        Solution.from_dict(instance, {**solution, other: solution[other] + [route[0]]})
+
+def test_apply_and_undo(instance, solution):
+    state = Solution.from_dict(instance, solution)
+    (r1, route1), (r2, route2) = [(r, route) for r, route in enumerate(solution.values()) if len(route) >= 2][:2]
+    mark = state.mark()
+    # Move the first customer of r1 behind the first customer of r2, then empty r2
+    u = int(instance.id_to_index[route1[0]])
+    state.remove(u)
+    state.insert(u, r2, int(instance.id_to_index[route2[0]]))
+    for node in state.nodes(r2):
+        state.remove(node)
+    assert state.touched(mark) == [r1, r2]
+    assert state.to_dict()[state.keys[r1]] == route1[1:]
+    assert state.to_dict()[state.keys[r2]] == []
+    _assert_consistent(instance, state)
+
+    state.rollback(mark)
+    assert state.to_dict() == solution
+    assert state.touched(state.mark()) == []
+    _assert_consistent(instance, state)
+
+def test_copy_is_independent(instance, solution):
+    state = Solution.from_dict(instance, solution)
+    other = state.copy()
+    other.remove(other.first[next(r for r in range(len(other)) if other.length[r])])
+    assert state.to_dict() == solution
+    assert other.to_dict() != solution
+
+def test_operators_work_in_place_and_roll_back(instance, solution, weights):
+    state = Solution.from_dict(instance, solution)
+    rng = random.Random(4)
+    for destroy in (lambda s: random_removal(s, 2, rng), lambda s: worst_removal(s, 3, instance, weights, rng)):
+        mark = state.mark()
+        removed = destroy(state)
+        assert removed and all(state.route_of[instance.id_to_index[c]] == -1 for c in removed)
+        greedy_insertion(state, removed, None, None, instance, weights)
+        assert sorted(c for route in state.to_dict().values() for c in route) == sorted(
+            c for route in solution.values() for c in route)
+        _assert_consistent(instance, state)
+        state.rollback(mark)
+        assert state.to_dict() == solution
@@ -0,0 +1,26 @@
+import pytest
+
+from src.visualize_routes import draw_routes, route_segments
+
+def test_route_segments_are_closed_trips(data, solution):
+    customers, depot = data['customers'].iloc[1:], data['customers'].iloc[:1]
+    segments, shifts = route_segments(customers, depot, solution)
+    routes = [(key, route) for key, route in solution.items() if route]
+    assert len(segments) == len(routes)
+    assert shifts == [key[1] for key, _ in routes]
+    for segment, (_, route) in zip(segments, routes):
+        assert segment.shape == (len(route) + 2, 2)
+        assert (segment[0] == segment[-1]).all()
+
+def test_legend_labels_every_shift_with_its_hours(data, solution):
+    pytest.importorskip('matplotlib')
+    from matplotlib.figure import Figure
+
+    customers, depot = data['customers'].iloc[1:], data['customers'].iloc[:1]
+    # Only the first shift has routes; the legend still lists all of them
+    first_shift = {key: route for key, route in solution.items() if key[1] == 0}
+    ax = Figure().add_subplot()
+    draw_routes(ax, customers, depot, first_shift, shifts=data['shifts'])
+    labels = [text.get_text() for text in ax.get_legend().get_texts()]
+    expected = [f"Shift {l + 1} ({row.E_t:g}-{row.L_t:g})" for l, row in enumerate(data['shifts'].itertuples())]
+    assert labels == ['Customers', 'Depot'] + expected